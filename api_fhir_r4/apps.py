@@ -3,6 +3,7 @@ from collections import OrderedDict
 
 import yaml
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 from api_fhir_r4.configurations import ModuleConfiguration
 from api_fhir_r4.defaultConfig import DEFAULT_CFG
@@ -10,6 +11,26 @@ from api_fhir_r4.defaultConfig import DEFAULT_CFG
 logger = logging.getLogger(__name__)
 
 MODULE_NAME = "api_fhir_r4"
+WARM_UP_DISPATCH_UID = 'fhir_reference_data_warm_up'
+
+# Models behind the FHIR resources, their versions are used to invalidate cached counts and resources
+VERSIONED_MODELS = [
+    'insuree.Insuree', 'insuree.Family', 'insuree.InsureePolicy', 'policy.Policy', 'claim.Claim',
+    'claim.ClaimItem', 'claim.ClaimService', 'claim.ClaimAdmin', 'core.Officer', 'location.Location',
+    'location.HealthFacility', 'medical.Item', 'medical.Service', 'medical.Diagnosis', 'product.Product',
+    'contribution.Premium', 'policyholder.PolicyHolder', 'invoice.Invoice', 'invoice.Bill',
+    # CodeSystem tables
+    'insuree.FamilyType', 'insuree.ConfirmationType', 'insuree.Education', 'insuree.IdentificationType',
+    'insuree.Profession', 'insuree.Relation', 'location.HealthFacilityLegalForm',
+    # reference data cache tables
+    'insuree.Gender'
+]
+
+# Lookup tables used by the converters, kept in the reference data cache
+REFERENCE_DATA_MODELS = [
+    'insuree.Relation', 'insuree.Education', 'insuree.Profession', 'insuree.IdentificationType', 'insuree.Gender',
+    'insuree.FamilyType', 'insuree.ConfirmationType'
+]
 
 
 class ApiFhirConfig(AppConfig):
@@ -20,6 +41,8 @@ class ApiFhirConfig(AppConfig):
         cfg = ModuleConfiguration.get_or_default(MODULE_NAME, DEFAULT_CFG)
         self.__configure_module(cfg)
         setup_yaml()
+        self.__track_model_versions()
+        self.__register_reference_data()
 
         from openIMIS.ExceptionHandlerRegistry import ExceptionHandlerRegistry
         from .exceptions.fhir_api_exception_handler import fhir_api_exception_handler
@@ -29,6 +52,25 @@ class ApiFhirConfig(AppConfig):
         ModuleConfiguration.build_configuration(cfg)
         logger.info(F'Module {MODULE_NAME} configured successfully')
 
+    def __track_model_versions(self):
+        from api_fhir_r4.cache import ModelVersions
+        ModelVersions.track(*VERSIONED_MODELS)
+
+    def __register_reference_data(self):
+        from api_fhir_r4.cache import ReferenceDataCache, LocationIndex, ProductCoverageCache
+        ReferenceDataCache.register(*REFERENCE_DATA_MODELS)
+        LocationIndex.register()
+        ProductCoverageCache.register()
+        # no queries in ready() (migrate, test database not created yet), caches are loaded by the first request
+        request_started.connect(warm_up_reference_data, dispatch_uid=WARM_UP_DISPATCH_UID)
+
+
+def warm_up_reference_data(sender, **kwargs):
+    from api_fhir_r4.cache import ReferenceDataCache, LocationIndex
+    request_started.disconnect(dispatch_uid=WARM_UP_DISPATCH_UID)
+    ReferenceDataCache.warm_up()
+    LocationIndex.warm_up()
+
 
 def setup_yaml():
     def represent_ordered_dict(dumper, data):
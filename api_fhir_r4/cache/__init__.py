@@ -0,0 +1,5 @@
+from api_fhir_r4.cache.modelVersions import ModelVersions
+from api_fhir_r4.cache.referenceData import ReferenceDataCache, ReferenceTable
+from api_fhir_r4.cache.locationIndex import LocationIndex, LocationNode
+from api_fhir_r4.cache.productCoverage import ProductCoverageCache, ProductCoverage
+from api_fhir_r4.cache.renderedResources import RenderedResourceCache
@@ -0,0 +1,165 @@
+import logging
+import time
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save, post_delete
+
+from api_fhir_r4.cache.modelVersions import ModelVersions
+from api_fhir_r4.configurations import GeneralConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class LocationNode(object):
+    """
+    Location of the index, `ancestors` contains the parents of the location from the nearest one up to the root.
+    Node has `id`, `uuid` and `code` attributes, so it can be used as reference object by LocationConverter.
+    """
+    __slots__ = ('id', 'uuid', 'code', 'name', 'type', 'parent_id', 'ancestors', 'row')
+
+    def __init__(self, id, uuid, code, name, type, parent_id, row):
+        self.id = id
+        self.uuid = uuid
+        self.code = code
+        self.name = name
+        self.type = type
+        self.parent_id = parent_id
+        self.ancestors = None
+        self.row = row
+
+    @property
+    def parent(self):
+        return self.ancestors[0] if self.ancestors else None
+
+
+class LocationIndex(object):
+    """
+    Process wide index of the active locations tree by id, uuid and code. Index is built with a single query, kept
+    for `reference_data_cache_ttl` seconds (no expiration if None) and dropped on post_save/post_delete of Location.
+    Changes made by other workers are detected through the ModelVersions version of Location, checked on access at
+    most once per `model_version_check_interval` seconds.
+    Lookups returning IMIS Location objects create new instances from the indexed rows, so they can be used
+    (and modified) as if they were fetched from the database.
+    """
+    _model = None
+    _field_names = None
+    # (expiration time, Location version, {id: node}, {uuid: node}, {code: node}, {name: {type: [node]}})
+    _index = None
+    _next_version_check = 0
+
+    @classmethod
+    def register(cls):
+        from location.models import Location
+        if cls._model is not None:
+            return
+        cls._model = Location
+        cls._field_names = [field.attname for field in Location._meta.concrete_fields]
+        post_save.connect(cls._on_location_change, sender=Location, dispatch_uid='fhir_location_index_save')
+        post_delete.connect(cls._on_location_change, sender=Location, dispatch_uid='fhir_location_index_delete')
+
+    @classmethod
+    def warm_up(cls):
+        try:
+            cls._get_index()
+        except Exception as e:
+            # warm up is optional, the index is loaded again on first use
+            logger.warning(f'Location index not loaded: {e}')
+
+    @classmethod
+    def invalidate(cls):
+        cls._index = None
+
+    @classmethod
+    def get_node(cls, id=None, uuid=None, code=None):
+        _, _, by_id, by_uuid, by_code, _ = cls._get_index()
+        if id is not None:
+            return by_id.get(id)
+        if uuid is not None:
+            return by_uuid.get(str(uuid).lower())
+        if code is not None:
+            return by_code.get(code)
+        return None
+
+    @classmethod
+    def get_location(cls, id=None, uuid=None, code=None):
+        node = cls.get_node(id=id, uuid=uuid, code=code)
+        return cls.to_imis_location(node) if node is not None else None
+
+    @classmethod
+    def find_nodes(cls, name, parent_name=None, type=None):
+        by_type = cls._get_index()[5].get(name, {})
+        nodes = by_type.get(type, []) if type is not None else [node for nodes in by_type.values() for node in nodes]
+        if parent_name is None:
+            return list(nodes)
+        return [node for node in nodes if node.parent is not None and node.parent.name == parent_name]
+
+    @classmethod
+    def to_imis_location(cls, node):
+        return cls._model.from_db(DEFAULT_DB_ALIAS, cls._field_names, node.row)
+
+    @classmethod
+    def _get_index(cls):
+        cls.register()
+        index = cls._index
+        now = time.monotonic()
+        is_expired = index is None or (index[0] is not None and index[0] <= now)
+        if not is_expired and now < cls._next_version_check:
+            return index
+        version = cls._get_version()
+        cls._next_version_check = now + GeneralConfiguration.get_model_version_check_interval()
+        if is_expired or index[1] != version:
+            index = cls._build_index(version)
+            cls._index = index
+        return index
+
+    @classmethod
+    def _get_version(cls):
+        # None if Location versions are not tracked
+        return ModelVersions.get_versions([cls._model]).get(cls._model._meta.label)
+
+    @classmethod
+    def _build_index(cls, version):
+        id_index = cls._field_names.index('id')
+        uuid_index = cls._field_names.index('uuid')
+        code_index = cls._field_names.index('code')
+        name_index = cls._field_names.index('name')
+        type_index = cls._field_names.index('type')
+        parent_index = cls._field_names.index('parent_id')
+
+        by_id = {}
+        by_name = {}
+        for row in cls._model.objects.filter(validity_to__isnull=True).values_list(*cls._field_names):
+            by_id[row[id_index]] = LocationNode(
+                row[id_index], row[uuid_index], row[code_index], row[name_index], row[type_index],
+                row[parent_index], row
+            )
+        for node in by_id.values():
+            cls._set_ancestors(node, by_id)
+            by_name.setdefault(node.name, {}).setdefault(node.type, []).append(node)
+
+        ttl = GeneralConfiguration.get_reference_data_cache_ttl()
+        return (
+            time.monotonic() + ttl if ttl is not None else None,
+            version,
+            by_id,
+            {str(node.uuid).lower(): node for node in by_id.values()},
+            {node.code: node for node in by_id.values()},
+            by_name,
+        )
+
+    @classmethod
+    def _set_ancestors(cls, node, by_id):
+        path = []
+        current = node
+        # collect nodes without ancestors up to the first one already resolved (or the root)
+        while current is not None and current.ancestors is None and current not in path:
+            path.append(current)
+            current = by_id.get(current.parent_id)
+        ancestors = (current,) + current.ancestors if current is not None and current.ancestors is not None else ()
+        for item in reversed(path):
+            item.ancestors = ancestors
+            ancestors = (item,) + ancestors
+
+    @classmethod
+    def _on_location_change(cls, sender, **kwargs):
+        cls.invalidate()
@@ -0,0 +1,83 @@
+import logging
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+
+from api_fhir_r4.configurations import GeneralConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class ModelVersions(object):
+    """
+    Version counters of IMIS models stored in the `shared_cache_backend` django cache. The version of a model is
+    bumped on every post_save/post_delete of a tracked model, so cache keys containing the version become obsolete
+    as soon as the underlying table changes. Changes made by other workers are seen only if that cache is shared
+    between processes (e.g. redis or memcached), with the process local `LocMemCache` they are not.
+    """
+    _KEY_PREFIX = 'fhir-model-version:'
+    _tracked_models = {}  # {db_table: model}
+
+    @classmethod
+    def track(cls, *model_labels):
+        for model_label in model_labels:
+            try:
+                model = apps.get_model(model_label)
+            except (LookupError, ValueError):
+                logger.debug(f'Model {model_label} not available, version not tracked')
+                continue
+            if model._meta.db_table in cls._tracked_models:
+                continue
+            cls._tracked_models[model._meta.db_table] = model
+            post_save.connect(cls._on_model_change, sender=model, dispatch_uid=f'fhir_version_save_{model_label}')
+            post_delete.connect(cls._on_model_change, sender=model, dispatch_uid=f'fhir_version_delete_{model_label}')
+
+    @classmethod
+    def is_tracked(cls, model):
+        return model._meta.db_table in cls._tracked_models
+
+    @classmethod
+    def get_model_for_table(cls, db_table):
+        return cls._tracked_models.get(db_table)
+
+    @classmethod
+    def get_versions(cls, models):
+        """
+        Return {model label: version} for given tracked models. Missing versions (e.g. evicted from the cache) are
+        initialised with a time based value, so they never collide with versions used before the eviction.
+        """
+        keys = {cls._get_key(model): model._meta.label for model in models if cls.is_tracked(model)}
+        cache = cls.get_cache()
+        versions = cache.get_many(list(keys))
+        for key in keys:
+            if key not in versions:
+                cache.add(key, cls._initial_version(), None)
+                versions[key] = cache.get(key)
+        return {keys[key]: versions[key] for key in sorted(keys)}
+
+    @classmethod
+    def bump(cls, model):
+        cache = cls.get_cache()
+        key = cls._get_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, cls._initial_version(), None)
+
+    @classmethod
+    def get_cache(cls):
+        return caches[GeneralConfiguration.get_shared_cache_backend()]
+
+    @classmethod
+    def _on_model_change(cls, sender, **kwargs):
+        cls.bump(sender)
+
+    @classmethod
+    def _get_key(cls, model):
+        return cls._KEY_PREFIX + model._meta.label_lower
+
+    @classmethod
+    def _initial_version(cls):
+        return time.time_ns()
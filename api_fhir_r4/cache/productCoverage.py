@@ -0,0 +1,105 @@
+import logging
+import time
+
+from django.db.models.signals import post_save, post_delete
+
+from api_fhir_r4.configurations import GeneralConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class ProductCoverage(object):
+    """
+    Items and services covered by a product, by code. `item_codes` and `service_codes` list the codes of all the
+    product rows (historical ones included) in id order, as rendered by the Coverage product plan.
+    """
+    __slots__ = ('product_id', 'items', 'services', 'item_codes', 'service_codes')
+
+    def __init__(self, product_id, items, services, item_codes, service_codes):
+        self.product_id = product_id
+        self.items = items
+        self.services = services
+        self.item_codes = item_codes
+        self.service_codes = service_codes
+
+
+class ProductCoverageCache(object):
+    """
+    Process wide cache of the items and services covered by products. Coverage of a product is loaded with one query
+    for items and one for services, kept for `reference_data_cache_ttl` seconds (no expiration if None) and dropped
+    on post_save/post_delete of Product, ProductItem or ProductService. Changes of the covered Item or Service
+    (name, price...) drop the coverages of all products.
+    """
+    _registered = False
+    _coverages = {}  # {product id: (expiration time, ProductCoverage)}
+
+    @classmethod
+    def register(cls):
+        if cls._registered:
+            return
+        from medical.models import Item, Service
+        from product.models import Product, ProductItem, ProductService
+        post_save.connect(cls._on_product_change, sender=Product, dispatch_uid='fhir_product_coverage_save')
+        post_delete.connect(cls._on_product_change, sender=Product, dispatch_uid='fhir_product_coverage_delete')
+        for model in (ProductItem, ProductService):
+            post_save.connect(cls._on_product_detail_change, sender=model,
+                              dispatch_uid=f'fhir_product_coverage_save_{model.__name__}')
+            post_delete.connect(cls._on_product_detail_change, sender=model,
+                                dispatch_uid=f'fhir_product_coverage_delete_{model.__name__}')
+        for model in (Item, Service):
+            post_save.connect(cls._on_medical_change, sender=model,
+                              dispatch_uid=f'fhir_product_coverage_save_{model.__name__}')
+            post_delete.connect(cls._on_medical_change, sender=model,
+                                dispatch_uid=f'fhir_product_coverage_delete_{model.__name__}')
+        cls._registered = True
+
+    @classmethod
+    def get(cls, product_id) -> ProductCoverage:
+        entry = cls._coverages.get(product_id)
+        if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+            return entry[1]
+        cls.register()
+        coverage = cls._load_coverage(product_id)
+        ttl = GeneralConfiguration.get_reference_data_cache_ttl()
+        cls._coverages[product_id] = (time.monotonic() + ttl if ttl is not None else None, coverage)
+        return coverage
+
+    @classmethod
+    def invalidate(cls, product_id=None):
+        if product_id is None:
+            cls._coverages = {}
+        else:
+            cls._coverages.pop(product_id, None)
+
+    @classmethod
+    def _load_coverage(cls, product_id):
+        from product.models import ProductItem, ProductService
+        product_items = list(ProductItem.objects
+                             .filter(product_id=product_id)
+                             .select_related('item')
+                             .order_by('id'))
+        product_services = list(ProductService.objects
+                                .filter(product_id=product_id)
+                                .select_related('service')
+                                .order_by('id'))
+        return ProductCoverage(
+            product_id,
+            {product_item.item.code: product_item.item
+             for product_item in product_items if product_item.validity_to is None},
+            {product_service.service.code: product_service.service
+             for product_service in product_services if product_service.validity_to is None},
+            [product_item.item.code for product_item in product_items],
+            [product_service.service.code for product_service in product_services],
+        )
+
+    @classmethod
+    def _on_product_change(cls, sender, instance, **kwargs):
+        cls.invalidate(instance.id)
+
+    @classmethod
+    def _on_product_detail_change(cls, sender, instance, **kwargs):
+        cls.invalidate(instance.product_id)
+
+    @classmethod
+    def _on_medical_change(cls, sender, instance, **kwargs):
+        cls.invalidate()
@@ -0,0 +1,151 @@
+import logging
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+
+from api_fhir_r4.cache.modelVersions import ModelVersions
+from api_fhir_r4.configurations import GeneralConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceTable(object):
+    """
+    Rows of a reference data table with lookups by field, lookups are built once per loaded table.
+    """
+
+    def __init__(self, rows):
+        self.rows = tuple(rows)
+        self._lookups = {}
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, key_field, value_field=None):
+        """
+        Return {str(row.<key_field>): row} or {str(row.<key_field>): row.<value_field>} if value_field is given.
+        """
+        lookup_key = (key_field, value_field)
+        lookup = self._lookups.get(lookup_key)
+        if lookup is None:
+            lookup = {
+                str(getattr(row, key_field)): getattr(row, value_field) if value_field else row
+                for row in self.rows
+            }
+            self._lookups[lookup_key] = lookup
+        return lookup
+
+    def get(self, key_field, key, default=None):
+        return self.lookup(key_field).get(str(key), default)
+
+
+class ReferenceDataCache(object):
+    """
+    Cache of IMIS reference data tables (relations, education levels, professions...) used by converters.
+    Loaded tables are kept in the process memory for `reference_data_cache_ttl` seconds (no expiration if None)
+    and dropped on post_save/post_delete of the model. Changes made by other workers are detected through the
+    ModelVersions versions of the models, checked on access at most once per `model_version_check_interval` seconds.
+    If `reference_data_cache_backend` is set, loaded tables are also shared with other workers through this django
+    cache, so expired table doesn't have to be reloaded from the database by every worker.
+    """
+    _KEY_PREFIX = 'fhir-reference-data:'
+    _models = {}  # {model label: model}
+    _tables = {}  # {model label: (expiration time, model version, ReferenceTable)}
+    _versions = {}  # {model label: version} read at the last version check
+    _next_version_check = 0
+
+    @classmethod
+    def register(cls, *model_labels):
+        for model_label in model_labels:
+            if model_label in cls._models:
+                continue
+            try:
+                model = apps.get_model(model_label)
+            except (LookupError, ValueError):
+                logger.debug(f'Model {model_label} not available, reference data not cached')
+                continue
+            cls._models[model_label] = model
+            post_save.connect(cls._on_model_change, sender=model, dispatch_uid=f'fhir_reference_save_{model_label}')
+            post_delete.connect(cls._on_model_change, sender=model,
+                                dispatch_uid=f'fhir_reference_delete_{model_label}')
+
+    @classmethod
+    def warm_up(cls):
+        for model_label in list(cls._models):
+            try:
+                cls.get_table(model_label)
+            except Exception as e:
+                # warm up is optional, the table is loaded again on first use
+                logger.warning(f'Reference data {model_label} not loaded: {e}')
+
+    @classmethod
+    def get_table(cls, model_label) -> ReferenceTable:
+        entry = cls._tables.get(model_label)
+        if entry is not None and (entry[0] is None or entry[0] > time.monotonic()) \
+                and entry[1] == cls._get_version(model_label):
+            return entry[2]
+        if model_label not in cls._models:
+            cls.register(model_label)
+            if model_label not in cls._models:
+                raise LookupError(f'Reference data model {model_label} not available')
+        version = cls._get_version(model_label)
+        table = cls._load_table(model_label)
+        ttl = GeneralConfiguration.get_reference_data_cache_ttl()
+        cls._tables[model_label] = (time.monotonic() + ttl if ttl is not None else None, version, table)
+        return table
+
+    @classmethod
+    def get(cls, model_label, key_field, key, default=None):
+        return cls.get_table(model_label).get(key_field, key, default)
+
+    @classmethod
+    def invalidate(cls, model_label):
+        cls._tables.pop(model_label, None)
+        shared_cache = cls._get_shared_cache()
+        if shared_cache is not None:
+            shared_cache.delete(cls._get_key(model_label))
+
+    @classmethod
+    def clear(cls):
+        for model_label in list(cls._tables):
+            cls.invalidate(model_label)
+
+    @classmethod
+    def _load_table(cls, model_label):
+        shared_cache = cls._get_shared_cache()
+        rows = shared_cache.get(cls._get_key(model_label)) if shared_cache is not None else None
+        if rows is None:
+            rows = list(cls._models[model_label].objects.all())
+            if shared_cache is not None:
+                shared_cache.set(cls._get_key(model_label), rows, GeneralConfiguration.get_reference_data_cache_ttl())
+        return ReferenceTable(rows)
+
+    @classmethod
+    def _get_version(cls, model_label):
+        # versions of all the registered models are read at once, None if the model version is not tracked
+        now = time.monotonic()
+        if now >= cls._next_version_check:
+            cls._versions = ModelVersions.get_versions(list(cls._models.values()))
+            cls._next_version_check = now + GeneralConfiguration.get_model_version_check_interval()
+        model = cls._models.get(model_label)
+        return cls._versions.get(model._meta.label) if model is not None else None
+
+    @classmethod
+    def _on_model_change(cls, sender, **kwargs):
+        cls.invalidate(sender._meta.label)
+        # version bumped by this change is read again by the next load
+        cls._next_version_check = 0
+
+    @classmethod
+    def _get_shared_cache(cls):
+        cache_name = GeneralConfiguration.get_reference_data_cache_backend()
+        return caches[cache_name] if cache_name else None
+
+    @classmethod
+    def _get_key(cls, model_label):
+        return cls._KEY_PREFIX + model_label.lower()
@@ -0,0 +1,53 @@
+import logging
+
+from django.core.cache import caches
+from django.utils import translation
+
+from api_fhir_r4.cache.modelVersions import ModelVersions
+from api_fhir_r4.configurations import GeneralConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class RenderedResourceCache(object):
+    """
+    FHIR resources rendered as dicts, stored in the `shared_cache_backend` django cache for
+    `rendered_resource_cache_ttl` seconds. The key contains the id and the version (`validity_from`) of the IMIS
+    object, the rendering variant (e.g. reference type), the active language and the ModelVersions of the models
+    the resource is built from, so cached resource is re-rendered as soon as any of these models changes. Changes
+    made in other workers are only seen through a cache shared between processes, with the process local
+    `LocMemCache` they keep the old rendering until the TTL expires.
+    """
+    _KEY_PREFIX = 'fhir-rendered:'
+
+    @classmethod
+    def get_or_render(cls, resource_type, imis_obj, variant, models, render):
+        return cls.get_or_render_for_key(cls.get_object_key(resource_type, imis_obj, variant), models, render)
+
+    @classmethod
+    def get_or_render_for_key(cls, object_key, models, render):
+        """
+        Return cached result of `render()` for the `object_key` (and current versions of `models`),
+        `render` is called only on cache miss.
+        """
+        ttl = GeneralConfiguration.get_rendered_resource_cache_ttl()
+        if ttl == 0:
+            return render()
+        key = cls.get_key(object_key, models)
+        cache = caches[GeneralConfiguration.get_shared_cache_backend()]
+        rendered = cache.get(key)
+        if rendered is None:
+            rendered = render()
+            cache.set(key, rendered, ttl)
+        return rendered
+
+    @classmethod
+    def get_object_key(cls, resource_type, imis_obj, variant):
+        validity_from = imis_obj.validity_from.isoformat() if imis_obj.validity_from else ''
+        return f'{resource_type}:{imis_obj.id}:{validity_from}:{variant}'
+
+    @classmethod
+    def get_key(cls, object_key, models):
+        versions = ModelVersions.get_versions(models)
+        versions_key = '-'.join(str(version) for version in versions.values())
+        return f'{cls._KEY_PREFIX}{object_key}:{translation.get_language()}:{versions_key}'
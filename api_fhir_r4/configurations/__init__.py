@@ -25,6 +25,10 @@ class BaseConfiguration(object):  # pragma: no cover
             cls.build_configuration(cfg)
             return conf.__getattribute__(attribute)
 
+    @classmethod
+    def get_configuration_generation(cls):
+        return getattr(cls.get_config(), 'configuration_generation', 0)
+
 
 class IdentifierConfiguration(BaseConfiguration):  # pragma: no cover
 
@@ -18,6 +18,14 @@ class GeneralConfiguration(BaseConfiguration):
         config.default_response_page_size = cfg['default_response_page_size']
         config.claim_rule_engine_validation = cfg['claim_rule_engine_validation']
         config.subscribe_insuree_signal = cfg['subscribe_insuree_signal']
+        config.fast_emit = cfg.get('fast_emit', False)
+        config.reference_data_cache_ttl = cfg.get('reference_data_cache_ttl', 600)
+        config.reference_data_cache_backend = cfg.get('reference_data_cache_backend', None)
+        config.shared_cache_backend = cfg.get('shared_cache_backend', 'default')
+        config.model_version_check_interval = cfg.get('model_version_check_interval', 5)
+        config.rendered_resource_cache_ttl = cfg.get('rendered_resource_cache_ttl', 600)
+        config.async_job_root_path = cfg.get('async_job_root_path', None)
+        config.async_job_workers = cfg.get('async_job_workers', 2)
 
     @classmethod
     def get_default_audit_user_id(cls):
@@ -89,3 +97,35 @@ class GeneralConfiguration(BaseConfiguration):
     @classmethod
     def get_subscribe_insuree_signal(cls):
         return cls.get_config_attribute("subscribe_insuree_signal")
+
+    @classmethod
+    def get_fast_emit(cls):
+        return cls.get_config_attribute("fast_emit")
+
+    @classmethod
+    def get_reference_data_cache_ttl(cls):
+        return cls.get_config_attribute("reference_data_cache_ttl")
+
+    @classmethod
+    def get_reference_data_cache_backend(cls):
+        return cls.get_config_attribute("reference_data_cache_backend")
+
+    @classmethod
+    def get_shared_cache_backend(cls):
+        return cls.get_config_attribute("shared_cache_backend")
+
+    @classmethod
+    def get_model_version_check_interval(cls):
+        return cls.get_config_attribute("model_version_check_interval")
+
+    @classmethod
+    def get_rendered_resource_cache_ttl(cls):
+        return cls.get_config_attribute("rendered_resource_cache_ttl")
+
+    @classmethod
+    def get_async_job_root_path(cls):
+        return cls.get_config_attribute("async_job_root_path")
+
+    @classmethod
+    def get_async_job_workers(cls):
+        return cls.get_config_attribute("async_job_workers")
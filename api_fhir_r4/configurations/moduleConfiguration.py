@@ -6,6 +6,9 @@ class ModuleConfiguration(BaseConfiguration):
     def build_configuration(cls, cfg):
         GeneralConfiguration.build_configuration(cfg)
         cls.get_r4().build_configuration(cfg)
+        # values derived from the configuration (e.g. FhirFragments) are rebuilt by the next conversion
+        config = cls.get_config()
+        config.configuration_generation = getattr(config, 'configuration_generation', 0) + 1
 
     @classmethod
     def get_r4(cls):
@@ -5,6 +5,7 @@ from api_fhir_r4.containedResources.containedResources import AbstractContainedR
 from api_fhir_r4.serializers import BaseFHIRSerializer, PatientSerializer, GroupSerializer, \
     HealthFacilityOrganisationSerializer, ClaimAdminPractitionerSerializer, MedicationSerializer, \
     ActivityDefinitionSerializer, ClaimAdminPractitionerRoleSerializer
+from api_fhir_r4.utils import DbManagerUtils
 
 
 class ClaimContainedResources(AbstractContainedResourceCollection):
@@ -22,13 +23,13 @@ class ClaimContainedResources(AbstractContainedResourceCollection):
             MedicationSerializer: ContainedResourceDefinition(
                 'items', 'Medication',
                 lambda model, field: [
-                    item.item for item in model.__getattribute__(field).filter(validity_to=None).all()
+                    item.item for item in DbManagerUtils.get_related_objects(model, field)
                 ]
             ),
             ActivityDefinitionSerializer: ContainedResourceDefinition(
                 'services', 'ActivityDefinition',
                 lambda model, field: [
-                    service.service for service in model.__getattribute__(field).filter(validity_to=None).all()
+                    service.service for service in DbManagerUtils.get_related_objects(model, field)
                 ]
             ),
         }
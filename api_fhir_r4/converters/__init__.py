@@ -1,4 +1,5 @@
 from abc import ABC
+from contextlib import contextmanager
 from typing import Union
 
 from django.db.models import Model
@@ -8,6 +9,9 @@ from fhir.resources.R4B.quantity import Quantity
 
 import core
 from api_fhir_r4.configurations import R4IdentifierConfig
+from api_fhir_r4.converters.batchContext import ConverterBatchContext
+from api_fhir_r4.converters.fhirDictEmitter import FhirDictEmitter
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from api_fhir_r4.exceptions import FHIRRequestProcessException
 from fhir.resources.R4B.codeableconcept import CodeableConcept
 from fhir.resources.R4B.contactpoint import ContactPoint
@@ -19,11 +23,73 @@ from api_fhir_r4.configurations import GeneralConfiguration
 
 
 class BaseFHIRConverter(ABC):
+    # converters accepting `projection` argument in to_fhir_obj (see ElementsProjection)
+    supports_projection = False
+    # top level elements returned for `_summary=true`, None means all elements
+    summary_elements = None
 
     @classmethod
     def to_fhir_obj(cls, obj, reference_type):
         raise NotImplementedError('`toFhirObj()` must be implemented.')  # pragma: no cover
 
+    @classmethod
+    def to_fhir_dict(cls, obj, reference_type, **kwargs):
+        """
+        JSON ready representation of `to_fhir_obj` result used in the fast emit mode. Converters on hot read paths
+        override it to build the dict directly, without creating fhir.resources models.
+        """
+        return FhirDictEmitter.emit(cls.to_fhir_obj(obj, reference_type, **kwargs))
+
+    @classmethod
+    def to_fhir_objs(cls, imis_objs, reference_type, **kwargs):
+        imis_objs = list(imis_objs)
+        with cls.batch(imis_objs):
+            return [cls.to_fhir_obj(imis_obj, reference_type, **kwargs) for imis_obj in imis_objs]
+
+    @classmethod
+    @contextmanager
+    def batch(cls, imis_objs):
+        """
+        Make a batch context with data preloaded by `prepare_batch` available (through `get_batch_context`)
+        for conversions of all `imis_objs`.
+        """
+        FhirFragments.refresh()
+        batch_context = ConverterBatchContext(imis_objs)
+        cls.prepare_batch(imis_objs, batch_context)
+        token = batch_context.activate(cls)
+        try:
+            yield batch_context
+        finally:
+            ConverterBatchContext.deactivate(token)
+
+    @classmethod
+    def prepare_batch(cls, imis_objs, batch_context):
+        """
+        Override to bulk load related data once for all converted objects, e.g.
+        batch_context.set('premiums', {premium.policy_id: premium for premium in Premium.objects.filter(...)})
+        """
+        pass
+
+    @classmethod
+    def prepare_import_batch(cls, fhir_dicts, batch_context):
+        """
+        Override to bulk load data referenced by incoming resources (`to_imis_obj` input) converted together,
+        e.g. in one chunk of a bulk import.
+        """
+        pass
+
+    @classmethod
+    def get_batch_context(cls):
+        return ConverterBatchContext.get_active(cls)
+
+    @classmethod
+    def get_batch_lookup(cls, name):
+        """
+        Return the lookup preloaded for current batch or None if conversion is not part of a batch.
+        """
+        batch_context = cls.get_batch_context()
+        return batch_context.get(name) if batch_context is not None else None
+
     @classmethod
     def to_imis_obj(cls, data, audit_user_id):
         raise NotImplementedError('`toImisObj()` must be implemented.')  # pragma: no cover
@@ -42,13 +108,24 @@ class BaseFHIRConverter(ABC):
     def build_fhir_pk(cls, fhir_obj, resource: Union[str, Model], reference_type: str = None):
         if not reference_type:
             cls._build_simple_pk(fhir_obj, resource)
+        resource_id = cls.build_fhir_pk_value(resource, reference_type)
+        if resource_id is not None:
+            fhir_obj.id = resource_id
+
+    @classmethod
+    def build_fhir_pk_value(cls, resource: Model, reference_type: str):
         if reference_type == ReferenceConverterMixin.UUID_REFERENCE_TYPE:
             # OE0-18 - change into string type uuid
-            fhir_obj.id = str(resource.uuid)
+            return str(resource.uuid)
         elif reference_type == ReferenceConverterMixin.DB_ID_REFERENCE_TYPE:
-            fhir_obj.id = str(resource.id)
+            return str(resource.id)
         elif reference_type == ReferenceConverterMixin.CODE_REFERENCE_TYPE:
-            fhir_obj.id = resource.code
+            return resource.code
+        return None
+
+    @classmethod
+    def is_element_requested(cls, projection, element):
+        return projection is None or projection.includes(element, cls.summary_elements)
 
     @classmethod
     def valid_condition(cls, condition, error_message, errors=None):
@@ -88,6 +165,22 @@ class BaseFHIRConverter(ABC):
             codeable_concept.text = text
         return codeable_concept
 
+    @classmethod
+    def build_codeable_concept_dict(cls, code, system=None, text=None, display=None):
+        codeable_concept = {}
+        if code or system:
+            coding = {}
+            if GeneralConfiguration.show_system() and system is not None:
+                coding['system'] = system
+            coding['code'] = str(code)
+            if display:
+                coding['display'] = str(display)
+            codeable_concept['coding'] = [coding]
+
+        if text:
+            codeable_concept['text'] = text
+        return codeable_concept
+
     @classmethod
     def build_codeable_concept_from_coding(cls, coding, text=None):
         codeable_concept = CodeableConcept.construct()
@@ -153,12 +246,21 @@ class BaseFHIRConverter(ABC):
     @classmethod
     def build_fhir_identifier(cls, value, type_system, type_code):
         identifier = Identifier.construct()
-        type = cls.build_codeable_concept(type_code, type_system)
-        identifier.type = type
+        # identifier types are constant, the coding is shared between all identifiers of given type
+        identifier.type = FhirFragments.codeable_concept(type_code, type_system) if type_code or type_system \
+            else cls.build_codeable_concept(type_code, type_system)
         # OE0-18 - change into string type always
         identifier.value = str(value)
         return identifier
 
+    @classmethod
+    def build_fhir_identifier_dict(cls, value, type_system, type_code):
+        return {
+            'type': FhirFragments.codeable_concept_dict(type_code, type_system) if type_code or type_system
+            else cls.build_codeable_concept_dict(type_code, type_system),
+            'value': str(value)
+        }
+
     @classmethod
     def get_fhir_identifier_by_code(cls, identifiers, lookup_code):
         value = None
@@ -193,6 +295,17 @@ class BaseFHIRConverter(ABC):
         contact_point.value = value
         return contact_point
 
+    @classmethod
+    def build_fhir_contact_point_dict(cls, value, system=None, use=None):
+        contact_point = {}
+        if system and GeneralConfiguration.show_system():
+            contact_point['system'] = system.value
+        if value is not None:
+            contact_point['value'] = value
+        if use:
+            contact_point['use'] = use.value
+        return contact_point
+
     @classmethod
     def get_contract_points_by_system_code(cls, telecom, system=None):
         return [contact.value for contact in telecom if contact.system == system]
@@ -217,13 +330,15 @@ class BaseFHIRConverter(ABC):
 
     @classmethod
     def build_fhir_mapped_coding(cls, mapping) -> Coding:
-        coding = Coding.construct()
+        return Coding.construct(**cls.build_fhir_mapped_coding_dict(mapping))
 
+    @classmethod
+    def build_fhir_mapped_coding_dict(cls, mapping):
+        coding = {}
         if GeneralConfiguration.show_system():
-            coding.system = mapping["system"]
-        coding.code = mapping["code"]
-        coding.display = mapping["display"]
-
+            coding['system'] = mapping["system"]
+        coding['code'] = mapping["code"]
+        coding['display'] = mapping["display"]
         return coding
 
     @classmethod
@@ -233,6 +348,10 @@ class BaseFHIRConverter(ABC):
         extension.valueReference = reference
         return extension
 
+    @classmethod
+    def build_fhir_reference_extension_dict(cls, reference, url):
+        return {'url': url, 'valueReference': reference}
+
     @classmethod
     def build_fhir_codeable_concept_extension(cls, codeable_concept: CodeableConcept, url):
         extension = Extension.construct()
@@ -242,19 +361,26 @@ class BaseFHIRConverter(ABC):
 
     @classmethod
     def build_fhir_money(cls, value, currency=None):
-        money = Money.construct()
-        money.value = value
+        return Money.construct(**cls.build_fhir_money_dict(value, currency))
+
+    @classmethod
+    def build_fhir_money_dict(cls, value, currency=None):
+        money = {}
+        if value is not None:
+            money['value'] = value
         if currency:
-            money.currency = currency
+            money['currency'] = currency
         elif hasattr(core, 'currency'):
-            money.currency = core.currency
+            money['currency'] = core.currency
         return money
 
     @classmethod
     def build_fhir_quantity(cls, value):
-        quantity = Quantity.construct()
-        quantity.value = value
-        return quantity
+        return Quantity.construct(**cls.build_fhir_quantity_dict(value))
+
+    @classmethod
+    def build_fhir_quantity_dict(cls, value):
+        return {'value': value} if value is not None else {}
 
     @classmethod
     def get_id_from_reference(cls, reference):
@@ -263,6 +389,7 @@ class BaseFHIRConverter(ABC):
         return id_from_reference
 
 
+from api_fhir_r4.converters.elementsProjection import ElementsProjection
 from api_fhir_r4.converters.personConverterMixin import PersonConverterMixin
 from api_fhir_r4.converters.referenceConverterMixin import ReferenceConverterMixin
 from api_fhir_r4.converters.medicationConverter import MedicationConverter
@@ -8,6 +8,7 @@ from fhir.resources.R4B.codeableconcept import CodeableConcept
 
 from api_fhir_r4.configurations import GeneralConfiguration
 from api_fhir_r4.converters import R4IdentifierConfig, BaseFHIRConverter, ReferenceConverterMixin
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from django.utils.translation import gettext
 
 from api_fhir_r4.mapping.activityDefinitionMapping import ServiceTypeMapping, UseContextMapping, VenueMapping, \
@@ -92,7 +93,7 @@ class ActivityDefinitionConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
     @classmethod
     def build_imis_price(cls, imis_activity_definition, fhir_activity_definition, errors):
-        extension_base_url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/unit-price"
+        extension_base_url = FhirFragments.structure_definition_url("unit-price")
         extension = cls.get_fhir_extension_by_url(fhir_activity_definition.extension,
                                                   extension_base_url)
 
@@ -239,7 +240,7 @@ class ActivityDefinitionConverter(BaseFHIRConverter, ReferenceConverterMixin):
     def build_fhir_unit_price_extension(cls, value):
         extension = Extension.construct()
         money = Money.construct()
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/unit-price"
+        extension.url = FhirFragments.structure_definition_url("unit-price")
         extension.valueMoney = money
         extension.valueMoney.value = value
         if hasattr(core, 'currency'):
@@ -399,7 +400,7 @@ class ActivityDefinitionConverter(BaseFHIRConverter, ReferenceConverterMixin):
         if coding_data:
             coding = cls.build_fhir_mapped_coding(coding_data)
             extension = Extension(
-                url=f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/activity-definition-level",
+                url=FhirFragments.structure_definition_url("activity-definition-level"),
                 valueCodeableConcept=CodeableConcept(
                     coding=[coding],
                     text=coding.display
@@ -0,0 +1,45 @@
+from contextvars import ContextVar
+
+# {converter class: active ConverterBatchContext}, replaced (never mutated) on activation
+_active_batches = ContextVar('fhir_converter_batches', default={})
+
+
+class ConverterBatchContext(object):
+    """
+    Lookups shared by all objects converted in one batch (e.g. one page of a searchset). Converters load related
+    data for the whole batch in `BaseFHIRConverter.prepare_batch` and read it while converting single objects,
+    instead of querying the database once per object. A context is active only for the converters it was activated
+    for, conversions nested in a batch (e.g. contained resources) don't see lookups of the outer converter.
+    """
+
+    def __init__(self, imis_objs):
+        self.imis_objs = imis_objs
+        self._lookups = {}
+
+    def __contains__(self, name):
+        return name in self._lookups
+
+    def set(self, name, value):
+        self._lookups[name] = value
+
+    def get(self, name, default=None):
+        return self._lookups.get(name, default)
+
+    def get_or_load(self, name, loader):
+        if name not in self._lookups:
+            self._lookups[name] = loader(self.imis_objs)
+        return self._lookups[name]
+
+    @classmethod
+    def get_active(cls, converter):
+        return _active_batches.get().get(converter)
+
+    def activate(self, *converters):
+        """
+        Make the context active for conversions done by `converters`, returns the token for `deactivate`.
+        """
+        return _active_batches.set({**_active_batches.get(), **{converter: self for converter in converters}})
+
+    @classmethod
+    def deactivate(cls, token):
+        _active_batches.reset(token)
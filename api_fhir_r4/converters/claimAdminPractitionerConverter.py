@@ -3,6 +3,7 @@ from django.utils.translation import gettext as _
 
 from api_fhir_r4.configurations import GeneralConfiguration, R4IdentifierConfig
 from api_fhir_r4.converters import BaseFHIRConverter, PersonConverterMixin, ReferenceConverterMixin
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from fhir.resources.R4B.extension import Extension
 from fhir.resources.R4B.practitioner import Practitioner, PractitionerQualification
 from api_fhir_r4.utils import TimeUtils, DbManagerUtils
@@ -108,7 +109,7 @@ class ClaimAdminPractitionerConverter(BaseFHIRConverter, PersonConverterMixin, R
                                                                 display=imis_claim_admin.health_facility.code,
                                                                 reference_type=ReferenceConverterMixin.CODE_REFERENCE_TYPE)
             extension_organization = Extension.construct()
-            extension_organization.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/reference"
+            extension_organization.url = FhirFragments.structure_definition_url("reference")
             extension_organization.valueReference = organization
             fhir_practitioner.extension = [extension_organization]
             
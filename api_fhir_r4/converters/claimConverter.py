@@ -1,5 +1,4 @@
 import base64
-import hashlib
 import re
 from urllib.parse import urljoin
 
@@ -7,7 +6,7 @@ from typing import Type
 
 from claim.services import ClaimElementSubmit
 from claim.apps import ClaimConfig
-from claim.models import Claim, ClaimItem, ClaimService, ClaimAttachment
+from claim.models import Claim, ClaimItem, ClaimService
 
 from api_fhir_r4.containedResources.converterUtils import get_from_contained_or_by_reference
 from api_fhir_r4.mapping.claimMapping import ClaimPriorityMapping, ClaimVisitTypeMapping
@@ -15,17 +14,16 @@ from medical.models import Diagnosis
 from django.utils.translation import gettext as _
 
 from api_fhir_r4.configurations import R4IdentifierConfig, R4ClaimConfig, GeneralConfiguration
-from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin, MedicationConverter, \
+from api_fhir_r4.converters import BaseFHIRConverter, FhirDictEmitter, ReferenceConverterMixin, MedicationConverter, \
     ActivityDefinitionConverter
 from api_fhir_r4.converters.patientConverter import PatientConverter
 from api_fhir_r4.converters.healthFacilityOrganisationConverter import HealthFacilityOrganisationConverter
 from api_fhir_r4.converters.claimAdminPractitionerConverter import ClaimAdminPractitionerConverter
-from api_fhir_r4.models import ClaimV2 as FHIRClaim, ClaimInsuranceV2 as ClaimInsurance
+from api_fhir_r4.models import ClaimV2 as FHIRClaim
 from fhir.resources.R4B.attachment import Attachment
-from fhir.resources.R4B.period import Period
 from fhir.resources.R4B.claim import ClaimDiagnosis, ClaimSupportingInfo, ClaimItem as FHIRClaimItem
 
-from api_fhir_r4.utils import TimeUtils, FhirUtils, DbManagerUtils
+from api_fhir_r4.utils import TimeUtils, FhirUtils, DbManagerUtils, AttachmentUtils
 
 import logging
 logger = logging.getLogger('openimis.' + __name__)
@@ -33,23 +31,38 @@ logger = logging.getLogger('openimis.' + __name__)
 class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
     @classmethod
-    def to_fhir_obj(cls, imis_claim, reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE):
-        fhir_claim = cls.build_fhir_obj_with_required_fields(imis_claim)
-        cls.build_fhir_identifiers(fhir_claim, imis_claim)
-        cls.build_fhir_pk(fhir_claim, imis_claim, reference_type)
-        cls.build_fhir_provider(fhir_claim, imis_claim, reference_type)
-        cls.build_fhir_patient(fhir_claim, imis_claim, reference_type)
-        cls.build_fhir_enterer(fhir_claim, imis_claim, reference_type)
-        cls.build_fhir_type(fhir_claim, imis_claim)
-        cls.build_fhir_priority(fhir_claim)
-        cls.build_fhir_insurance(fhir_claim, imis_claim, reference_type)
-        cls.build_fhir_billable_period(fhir_claim, imis_claim)
-        cls.build_fhir_diagnoses(fhir_claim, imis_claim)
-        cls.build_fhir_total(fhir_claim, imis_claim)
-        cls.build_fhir_items(fhir_claim, imis_claim, reference_type)
-        cls.build_fhir_supporting_info(fhir_claim, imis_claim)
-        cls.build_fhir_attachments(fhir_claim, imis_claim)
-        return fhir_claim
+    def to_fhir_obj(cls, imis_claim, reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE,
+                    inline_attachments=False):
+        return FhirDictEmitter.construct(FHIRClaim, cls.to_fhir_dict(imis_claim, reference_type, inline_attachments))
+
+    @classmethod
+    def to_fhir_dict(cls, imis_claim, reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE,
+                     inline_attachments=False):
+        # single description of the Claim read representation, to_fhir_obj builds the models from it
+        fhir_claim = {
+            'resourceType': 'Claim',
+            'id': cls.build_fhir_pk_value(imis_claim, reference_type),
+            'identifier': FhirDictEmitter.emit_value(cls.build_all_identifiers([], imis_claim)),
+            'status': 'active',
+            'type': cls.build_fhir_type_dict(imis_claim),
+            'use': 'claim',
+            'patient': cls.build_fhir_resource_reference_dict(
+                imis_claim.insuree, type='Patient', display=imis_claim.insuree.chf_id, reference_type=reference_type),
+            'billablePeriod': cls.build_fhir_billable_period_dict(imis_claim),
+            'created': imis_claim.date_claimed.isoformat(),
+            'enterer': cls.build_fhir_resource_reference_dict(
+                imis_claim.admin, type='Practitioner', display=imis_claim.admin.code, reference_type=reference_type),
+            'provider': cls.build_fhir_resource_reference_dict(
+                imis_claim.health_facility, type='Organization', display=imis_claim.health_facility.code,
+                reference_type=reference_type),
+            'priority': cls.build_fhir_priority_dict(),
+            'supportingInfo': cls.build_fhir_supporting_info_dicts(imis_claim, inline_attachments),
+            'diagnosis': cls.build_fhir_diagnosis_dicts(imis_claim),
+            'insurance': cls.build_fhir_insurance_dicts(imis_claim, reference_type),
+            'item': cls.build_fhir_item_dicts(imis_claim, reference_type),
+            'total': cls.build_fhir_money_dict(imis_claim.claimed),
+        }
+        return {element: value for element, value in fhir_claim.items() if value}
 
     @classmethod
     def to_imis_obj(cls, fhir_claim, audit_user_id):
@@ -66,9 +79,13 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         cls.build_imis_total_claimed(imis_claim, fhir_claim, errors)
         cls.build_imis_claim_admin(imis_claim, fhir_claim, errors, audit_user_id=audit_user_id)
         cls.build_imis_visit_type(imis_claim, fhir_claim, errors)
-        cls.build_imis_supporting_info(imis_claim, fhir_claim, errors)
-        cls.build_imis_submit_items_and_services(imis_claim, fhir_claim, errors, audit_user_id)
-        cls.check_errors(errors)
+        try:
+            cls.build_imis_supporting_info(imis_claim, fhir_claim, errors)
+            cls.build_imis_submit_items_and_services(imis_claim, fhir_claim, errors, audit_user_id)
+            cls.check_errors(errors)
+        except Exception:
+            cls.discard_spooled_attachments(getattr(imis_claim, 'claim_attachments', []))
+            raise
         return imis_claim
 
     @classmethod
@@ -117,14 +134,6 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
             imis_claim.code = value
         cls.valid_condition(not imis_claim.code, _('Missing or invalid `identifier` attribute'), errors)
 
-    @classmethod
-    def build_fhir_obj_with_required_fields(cls, imis_claim):
-        fhir_claim_dict = {}
-        cls.build_fhir_status(fhir_claim_dict)
-        cls.build_fhir_use(fhir_claim_dict)
-        cls.build_fhir_created(fhir_claim_dict, imis_claim)
-        return FHIRClaim(**fhir_claim_dict)
-
     @classmethod
     def build_imis_patient(cls, imis_claim, fhir_claim, errors, audit_user_id):
         insuree = get_from_contained_or_by_reference(
@@ -145,14 +154,9 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         cls.valid_condition(not imis_claim.health_facility, _('Missing or invalid `provider` reference'), errors)
 
     @classmethod
-    def build_fhir_billable_period(cls, fhir_claim, imis_claim):
-        billable_period = Period.construct()
-        billable_period.start = imis_claim.date_from.isoformat()
-        if imis_claim.date_to:
-            billable_period.end = imis_claim.date_to.isoformat()
-        else:
-            billable_period.end = billable_period.start
-        fhir_claim.billablePeriod = billable_period
+    def build_fhir_billable_period_dict(cls, imis_claim):
+        start = imis_claim.date_from.isoformat()
+        return {'start': start, 'end': imis_claim.date_to.isoformat() if imis_claim.date_to else start}
 
     @classmethod
     def build_imis_date_range(cls, imis_claim, fhir_claim, errors):
@@ -165,22 +169,24 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         cls.valid_condition(not imis_claim.date_from, _("Missing or invalid 'billable_period' attribute"), errors)
 
     @classmethod
-    def build_fhir_diagnoses(cls, fhir_claim, imis_claim):
+    def build_fhir_diagnosis_dicts(cls, imis_claim):
         fhir_diagnoses = []
         imis_diagnoses = [imis_claim.icd, imis_claim.icd_1, imis_claim.icd_2, imis_claim.icd_3, imis_claim.icd_4]
         for icd in imis_diagnoses:
             if icd:
-                cls.build_fhir_diagnosis(fhir_diagnoses, icd)
-        fhir_claim.diagnosis = fhir_diagnoses
+                fhir_diagnoses.append(cls.build_fhir_diagnosis_dict(fhir_diagnoses, icd))
+        return fhir_diagnoses
 
     @classmethod
     def build_fhir_diagnosis(cls, diagnoses, icd):
+        diagnoses.append(FhirDictEmitter.construct(ClaimDiagnosis, cls.build_fhir_diagnosis_dict(diagnoses, icd)))
+
+    @classmethod
+    def build_fhir_diagnosis_dict(cls, diagnoses, icd):
         base = GeneralConfiguration.get_system_base_url()
         system = urljoin(base, R4ClaimConfig.get_fhir_claim_diagnosis_system())
-        diagnosis_codeable_concept = cls.build_codeable_concept(icd.code, system=system, display=icd.name)
-        claim_diagnosis_data = {'sequence': FhirUtils.get_next_array_sequential_id(diagnoses),
-                                'diagnosisCodeableConcept': diagnosis_codeable_concept.dict()}
-        diagnoses.append(ClaimDiagnosis(**claim_diagnosis_data))
+        return {'sequence': FhirUtils.get_next_array_sequential_id(diagnoses),
+                'diagnosisCodeableConcept': cls.build_codeable_concept_dict(icd.code, system=system, display=icd.name)}
 
     @classmethod
     def build_imis_diagnoses(cls, imis_claim, fhir_claim, errors):
@@ -203,10 +209,6 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         coding = cls.get_first_coding_from_codeable_concept(diagnosis.diagnosisCodeableConcept)
         return coding.code
 
-    @classmethod
-    def build_fhir_total(cls, fhir_claim, imis_claim):
-        fhir_claim.total = cls.build_fhir_money(imis_claim.claimed)
-
     @classmethod
     def build_imis_total_claimed(cls, imis_claim, fhir_claim, errors):
         total_money = fhir_claim.total
@@ -225,9 +227,9 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         cls.valid_condition(imis_claim.admin is None, _('Missing or invalid `enterer` reference'), errors)
 
     @classmethod
-    def build_fhir_type(cls, fhir_claim, imis_claim):
+    def build_fhir_type_dict(cls, imis_claim):
         mapping = ClaimVisitTypeMapping.fhir_claim_visit_type_coding[imis_claim.visit_type]
-        fhir_claim.type = cls.build_codeable_concept_from_coding(cls.build_fhir_mapped_coding(mapping))
+        return {'coding': [cls.build_fhir_mapped_coding_dict(mapping)]}
 
     @classmethod
     def build_imis_visit_type(cls, imis_claim, fhir_claim, errors):
@@ -238,13 +240,19 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         cls.valid_condition(not imis_claim.visit_type, _('Missing or invalid `type` attribute'), errors)
 
     @classmethod
-    def build_fhir_supporting_info(cls, fhir_claim, imis_claim):
+    def build_fhir_supporting_info_dicts(cls, imis_claim, inline_attachments=False):
         supporting_info = []
-        guarantee_id_code = R4ClaimConfig.get_fhir_claim_information_guarantee_id_code()
-        cls.build_fhir_string_information(supporting_info, guarantee_id_code, imis_claim.guarantee_id)
-        explanation_code = R4ClaimConfig.get_fhir_claim_information_explanation_code()
-        cls.build_fhir_string_information(supporting_info, explanation_code, imis_claim.explanation)
-        fhir_claim.supportingInfo = supporting_info
+        string_information = (
+            (R4ClaimConfig.get_fhir_claim_information_guarantee_id_code(), imis_claim.guarantee_id),
+            (R4ClaimConfig.get_fhir_claim_information_explanation_code(), imis_claim.explanation),
+        )
+        for code, value_string in string_information:
+            if value_string:
+                supporting_info.append(cls.build_fhir_string_information_dict(supporting_info, code, value_string))
+        for attachment in DbManagerUtils.get_related_objects(imis_claim, 'attachments', valid_only=False):
+            supporting_info.append(
+                cls.build_attachment_supporting_info_dict(supporting_info, attachment, inline_attachments))
+        return supporting_info
 
     @classmethod
     def build_imis_supporting_info(cls, imis_claim, fhir_claim, errors):
@@ -267,27 +275,31 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
     @classmethod
     def build_fhir_string_information(cls, supporting_info, code, value_string):
         if value_string:
-            supporting_info_entry = ClaimSupportingInfo.construct()
-            supporting_info_entry.sequence = FhirUtils.get_next_array_sequential_id(supporting_info)
-            base = GeneralConfiguration.get_system_base_url()
-            system = urljoin(base, R4ClaimConfig.get_fhir_claim_supporting_info_system())
-            category = cls.build_codeable_concept(code, system)
-            supporting_info_entry.category = category
-            supporting_info_entry.valueString = value_string
-            supporting_info.append(supporting_info_entry)
+            supporting_info_entry = cls.build_fhir_string_information_dict(supporting_info, code, value_string)
+            supporting_info.append(FhirDictEmitter.construct(ClaimSupportingInfo, supporting_info_entry))
 
     @classmethod
-    def build_fhir_items(cls, fhir_claim, imis_claim, reference_type):
-        fhir_claim.item = []
-        cls.build_fhir_items_for_imis_items(fhir_claim, imis_claim, reference_type)
-        cls.build_fhir_items_for_imis_services(fhir_claim, imis_claim, reference_type)
+    def build_fhir_string_information_dict(cls, supporting_info, code, value_string):
+        base = GeneralConfiguration.get_system_base_url()
+        system = urljoin(base, R4ClaimConfig.get_fhir_claim_supporting_info_system())
+        return {'sequence': FhirUtils.get_next_array_sequential_id(supporting_info),
+                'category': cls.build_codeable_concept_dict(code, system),
+                'valueString': value_string}
 
     @classmethod
-    def build_fhir_items_for_imis_items(cls, fhir_claim, imis_claim, reference_type):
-        for claim_item in imis_claim.items.filter(validity_to=None).all():
+    def build_fhir_item_dicts(cls, imis_claim, reference_type):
+        fhir_items = []
+        item_type = R4ClaimConfig.get_fhir_claim_item_code()
+        for claim_item in DbManagerUtils.get_related_objects(imis_claim, 'items'):
             if claim_item:
-                item_type = R4ClaimConfig.get_fhir_claim_item_code()
-                cls.build_fhir_item(fhir_claim, claim_item.item.code, item_type, claim_item, reference_type)
+                fhir_items.append(cls.build_fhir_item_dict(
+                    fhir_items, claim_item.item.code, item_type, claim_item, reference_type))
+        service_type = R4ClaimConfig.get_fhir_claim_service_code()
+        for claim_service in DbManagerUtils.get_related_objects(imis_claim, 'services'):
+            if claim_service:
+                fhir_items.append(cls.build_fhir_item_dict(
+                    fhir_items, claim_service.service.code, service_type, claim_service, reference_type))
+        return fhir_items
 
     @classmethod
     def get_imis_items_for_claim(cls, imis_claim):
@@ -298,30 +310,26 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
     @classmethod
     def build_fhir_item(cls, fhir_claim, code, item_type, claim_item, reference_type):
-        fhir_item = FHIRClaimItem.construct()
-        fhir_item.sequence = FhirUtils.get_next_array_sequential_id(fhir_claim.item)
-        fhir_item.unitPrice = cls.build_fhir_money(claim_item.price_asked)
-        fhir_item.quantity = cls.build_fhir_quantity(claim_item.qty_provided)
-        fhir_item.productOrService = cls.build_simple_codeable_concept(code)
-        fhir_item.category = cls.build_simple_codeable_concept(item_type)
-        fhir_item.extension = []
+        fhir_item = cls.build_fhir_item_dict(fhir_claim.item, code, item_type, claim_item, reference_type)
+        fhir_claim.item.append(FhirDictEmitter.construct(FHIRClaimItem, fhir_item))
 
+    @classmethod
+    def build_fhir_item_dict(cls, fhir_items, code, item_type, claim_item, reference_type):
+        extension = []
         if item_type == R4ClaimConfig.get_fhir_claim_item_code():
-            medication = cls.build_medication_extension(claim_item, reference_type)
-            fhir_item.extension.append(medication)
-
+            extension.append(cls.build_medication_extension_dict(claim_item, reference_type))
         elif item_type == R4ClaimConfig.get_fhir_claim_service_code():
-            activity_definition = cls.build_activity_definition_extension(claim_item, reference_type)
-            fhir_item.extension.append(activity_definition)
-
-        fhir_claim.item.append(fhir_item)
-
-    @classmethod
-    def build_fhir_items_for_imis_services(cls, fhir_claim, imis_claim, reference_type):
-        for claim_service in imis_claim.services.filter(validity_to=None).all():
-            if claim_service:
-                item_type = R4ClaimConfig.get_fhir_claim_service_code()
-                cls.build_fhir_item(fhir_claim, claim_service.service.code, item_type, claim_service, reference_type)
+            extension.append(cls.build_activity_definition_extension_dict(claim_item, reference_type))
+
+        fhir_item = {
+            'extension': extension,
+            'sequence': FhirUtils.get_next_array_sequential_id(fhir_items),
+            'category': cls.build_codeable_concept_dict(None, None, item_type),
+            'productOrService': cls.build_codeable_concept_dict(None, None, code),
+            'quantity': cls.build_fhir_quantity_dict(claim_item.qty_provided),
+            'unitPrice': cls.build_fhir_money_dict(claim_item.price_asked),
+        }
+        return {element: value for element, value in fhir_item.items() if value}
 
     @classmethod
     def get_imis_services_for_claim(cls, imis_claim):
@@ -331,19 +339,19 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         return services
 
     @classmethod
-    def build_medication_extension(cls, item, reference_type):
+    def build_medication_extension_dict(cls, item, reference_type):
         base = GeneralConfiguration.get_system_base_url()
         url = urljoin(base, R4ClaimConfig.get_fhir_item_reference_extension_system())
-        reference = cls.build_fhir_resource_reference(item.item, type='Medication', reference_type=reference_type)
-        return cls.build_fhir_reference_extension(reference, url)
+        reference = cls.build_fhir_resource_reference_dict(item.item, type='Medication', reference_type=reference_type)
+        return cls.build_fhir_reference_extension_dict(reference, url)
 
     @classmethod
-    def build_activity_definition_extension(cls, service, reference_type):
+    def build_activity_definition_extension_dict(cls, service, reference_type):
         base = GeneralConfiguration.get_system_base_url()
         url = urljoin(base, R4ClaimConfig.get_fhir_item_reference_extension_system())
-        reference = cls.build_fhir_resource_reference(service.service, type='ActivityDefinition',
-                                                      reference_type=reference_type)
-        return cls.build_fhir_reference_extension(reference, url)
+        reference = cls.build_fhir_resource_reference_dict(service.service, type='ActivityDefinition',
+                                                           reference_type=reference_type)
+        return cls.build_fhir_reference_extension_dict(reference, url)
 
     @classmethod
     def build_imis_submit_items_and_services(cls, imis_claim, fhir_claim, errors, audit_user_id):
@@ -426,79 +434,61 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         return price_asked
 
     @classmethod
-    def build_fhir_use(cls, fhir_claim_dict):
-        fhir_claim_dict['use'] = "claim"
-
-    @classmethod
-    def build_fhir_priority(cls, fhir_claim):
+    def build_fhir_priority_dict(cls):
         mapping = ClaimPriorityMapping.fhir_priority_coding['normal']
-        fhir_claim.priority = cls.build_codeable_concept_from_coding(cls.build_fhir_mapped_coding(mapping))
-
-    @classmethod
-    def build_fhir_status(cls, fhir_claim_dict):
-        fhir_claim_dict['status'] = "active"
+        return {'coding': [cls.build_fhir_mapped_coding_dict(mapping)]}
 
     @classmethod
-    def build_fhir_created(cls, fhir_claim_dict, imis_claim):
-        fhir_claim_dict['created'] = imis_claim.date_claimed.isoformat()
-
-    @classmethod
-    def build_fhir_insurance(cls, fhir_claim, imis_claim, reference_type):
+    def build_fhir_insurance_dicts(cls, imis_claim, reference_type):
         policies = list(imis_claim.insuree.insuree_policies.all())
-        if policies:
-            sorted_by_enrol = sorted(list(policies), key=lambda x: x.enrollment_date, reverse=True)
-            latest = sorted_by_enrol[0]
-            claim_insurance_data = {'focal': True, 'sequence': 1}
-            insurance = ClaimInsurance(**claim_insurance_data)
-            insurance.coverage = cls.build_fhir_resource_reference(latest.policy, type="Coverage",
-                                                                   reference_type=reference_type)
-            fhir_claim.insurance = [insurance]
+        if not policies:
+            return []
+        latest = max(policies, key=lambda x: x.enrollment_date)
+        coverage = cls.build_fhir_resource_reference_dict(latest.policy, type="Coverage", reference_type=reference_type)
+        return [{'sequence': 1, 'focal': True, 'coverage': coverage}]
+
+    @classmethod
+    def build_attachment_supporting_info_dict(cls, supporting_info, imis_attachment, inline_data=False):
+        return {
+            'sequence': FhirUtils.get_next_array_sequential_id(supporting_info),
+            'category': cls.build_attachment_supporting_info_category_dict(),
+            'valueAttachment': cls.build_fhir_value_attachment_dict(imis_attachment, inline_data)
+        }
 
     @classmethod
-    def build_fhir_attachments(cls, fhir_claim, imis_claim):
-        attachments = ClaimAttachment.objects.filter(claim=imis_claim)
-
-        if not fhir_claim.supportingInfo:
-            fhir_claim.supportingInfo = []
-
-        for attachment in attachments:
-            supporting_info_element = cls.build_attachment_supporting_info_element(attachment)
-            if fhir_claim.supportingInfo is not list:
-                fhir_claim.supportingInfo = [supporting_info_element]
-            else:
-                fhir_claim.supportingInfo.append(supporting_info_element)
+    def build_attachment_supporting_info_category_dict(cls):
+        category_code = R4ClaimConfig.get_fhir_claim_attachment_code()
+        system = R4ClaimConfig.get_fhir_claim_attachment_system()
+        return cls.build_codeable_concept_dict(category_code, system, category_code, display=category_code.capitalize())
 
     @classmethod
-    def build_attachment_supporting_info_element(cls, imis_attachment):
-        supporting_info_element = ClaimSupportingInfo.construct()
-
-        supporting_info_element.category = cls.build_attachment_supporting_info_category()
-        supporting_info_element.valueAttachment = cls.build_fhir_value_attachment(imis_attachment)
-        return supporting_info_element
+    def build_fhir_value_attachment_dict(cls, imis_attachment, inline_data=False):
+        # content is served by the Binary endpoint, it's read and inlined only when explicitly requested
+        attachment = {'contentType': imis_attachment.mime}
+        if inline_data:
+            attachment['data'] = cls.get_attachment_content(imis_attachment)
+        attachment['url'] = cls.get_attachment_url(imis_attachment)
+        attachment['title'] = imis_attachment.filename
+        attachment['creation'] = imis_attachment.date.isoformat()
+        return {element: value for element, value in attachment.items() if value is not None}
 
     @classmethod
-    def build_attachment_supporting_info_category(cls):
-        category_code = R4ClaimConfig.get_fhir_claim_attachment_code()
-        system = R4ClaimConfig.get_fhir_claim_attachment_system()
-        category = cls.build_codeable_concept(category_code, system, category_code)
-        category.coding[0].display = category_code.capitalize()
-        return category
+    def get_attachment_url(cls, imis_attachment):
+        return f'{GeneralConfiguration.get_base_url()}Binary/{imis_attachment.id}'
 
     @classmethod
-    def build_fhir_value_attachment(cls, imis_attachment):
-        attachment = Attachment.construct()
-        attachment.creation = imis_attachment.date.isoformat()
-        attachment.data = cls.get_attachment_content(imis_attachment)
-        attachment.contentType = imis_attachment.mime
-        attachment.title = imis_attachment.filename
-        return attachment
+    def get_attachment_file_path(cls, imis_attachment):
+        file_root = ClaimConfig.claim_attachments_root_path
+        if file_root and imis_attachment.url:
+            return '%s/%s' % (file_root, imis_attachment.url)
+        return None
 
     @classmethod
     def get_attachment_content(cls, imis_attachment):
-        file_root = ClaimConfig.claim_attachments_root_path
+        file_path = cls.get_attachment_file_path(imis_attachment)
 
-        if file_root and imis_attachment.url:
-            with open('%s/%s' % (ClaimConfig.claim_attachments_root_path, imis_attachment.url), "rb") as file:
+        if file_path:
+            with open(file_path, "rb") as file:
                 return base64.b64encode(file.read())
         elif not imis_attachment.url and imis_attachment.document:
             return imis_attachment.document
@@ -513,41 +503,37 @@ class ClaimConverter(BaseFHIRConverter, ReferenceConverterMixin):
         if not mime_validation.match(valueAttachment.contentType):
             raise ValueError(F'Mime type {valueAttachment.contentType} not allowed')
 
-        if valueAttachment.hash:
-            cls.validateHash(valueAttachment.hash, valueAttachment.data)
-
         attachment_data = {
             'title': valueAttachment.title,
             'filename': valueAttachment.title,
-            'document': valueAttachment.data,
             'mime': valueAttachment.contentType,
             'date': TimeUtils.str_to_date(valueAttachment.creation)
         }
+        file_root = ClaimConfig.claim_attachments_root_path
+        if file_root and valueAttachment.data:
+            # content is decoded to a spool file, only the file reference is kept in the claim data
+            spool_path, actual_hash = AttachmentUtils.spool_base64(file_root, valueAttachment.data)
+            if valueAttachment.hash and not cls.__is_hash_matching(valueAttachment.hash, actual_hash):
+                AttachmentUtils.discard(file_root, spool_path)
+                raise ValueError('Hash for data file is incorrect')
+            attachment_data['spool_path'] = spool_path
+        else:
+            if valueAttachment.hash:
+                cls.validateHash(valueAttachment.hash, valueAttachment.data)
+            attachment_data['document'] = valueAttachment.data
         return attachment_data
 
     @classmethod
     def validateHash(cls, expected_hash, data):
-        actual_hash = hashlib.sha1(data.encode('utf-8')).hexdigest()
-        if actual_hash.casefold() != expected_hash.casefold():
+        if not cls.__is_hash_matching(expected_hash, AttachmentUtils.sha1_hexdigest(data)):
             raise ValueError('Hash for data file is incorrect')
 
     @classmethod
-    def build_fhir_provider(cls, fhir_claim, imis_claim, reference_type):
-        fhir_claim.provider = cls.build_fhir_resource_reference(imis_claim.health_facility,
-                                                                type='Organization',
-                                                                display=imis_claim.health_facility.code,
-                                                                reference_type=reference_type)
+    def __is_hash_matching(cls, expected_hash, actual_hash):
+        return actual_hash.casefold() == expected_hash.casefold()
 
     @classmethod
-    def build_fhir_patient(cls, fhir_claim, imis_claim, reference_type):
-        fhir_claim.patient = cls.build_fhir_resource_reference(imis_claim.insuree,
-                                                               type='Patient',
-                                                               display=imis_claim.insuree.chf_id,
-                                                               reference_type=reference_type)
-
-    @classmethod
-    def build_fhir_enterer(cls, fhir_claim, imis_claim, reference_type):
-        fhir_claim.enterer = cls.build_fhir_resource_reference(imis_claim.admin,
-                                                               type='Practitioner',
-                                                               display=imis_claim.admin.code,
-                                                               reference_type=reference_type)
+    def discard_spooled_attachments(cls, attachments):
+        for attachment in attachments:
+            if attachment.get('spool_path'):
+                AttachmentUtils.discard(ClaimConfig.claim_attachments_root_path, attachment['spool_path'])
@@ -9,6 +9,7 @@ from api_fhir_r4.converters.claimConverter import ClaimConverter
 from api_fhir_r4.converters.patientConverter import PatientConverter
 from api_fhir_r4.converters.claimAdminPractitionerConverter import ClaimAdminPractitionerConverter
 from api_fhir_r4.converters.medicationConverter import MedicationConverter
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from api_fhir_r4.exceptions import FHIRRequestProcessException
 from api_fhir_r4.mapping.claimMapping import ClaimResponseMapping
 from api_fhir_r4.models import ClaimResponseV2 as ClaimResponse
@@ -17,7 +18,7 @@ from fhir.resources.R4B.claimresponse import ClaimResponseItem, ClaimResponseIte
     ClaimResponseProcessNote, ClaimResponseTotal
 from fhir.resources.R4B.reference import Reference
 from fhir.resources.R4B.extension import Extension
-from api_fhir_r4.utils import TimeUtils, FhirUtils
+from api_fhir_r4.utils import TimeUtils, FhirUtils, DbManagerUtils
 
 
 class ClaimResponseConverter(BaseFHIRConverter):
@@ -234,14 +235,14 @@ class ClaimResponseConverter(BaseFHIRConverter):
 
     @classmethod
     def build_fhir_items_for_imis_services(cls, fhir_claim_response, imis_claim, reference_type):
-        for claim_service in imis_claim.services.filter(validity_to=None).all():
+        for claim_service in DbManagerUtils.get_related_objects(imis_claim, 'services'):
             if claim_service:
                 item_type = R4ClaimConfig.get_fhir_claim_service_code()
                 cls.build_fhir_item(fhir_claim_response, claim_service, item_type, claim_service.rejection_reason, imis_claim, reference_type)
 
     @classmethod
     def build_fhir_items_for_imis_items(cls, fhir_claim_response, imis_claim, reference_type):
-        for claim_item in imis_claim.items.filter(validity_to=None).all():
+        for claim_item in DbManagerUtils.get_related_objects(imis_claim, 'items'):
             if claim_item:
                 item_type = R4ClaimConfig.get_fhir_claim_item_code()
                 cls.build_fhir_item(fhir_claim_response, claim_item, item_type, claim_item.rejection_reason, imis_claim, reference_type)
@@ -341,7 +342,7 @@ class ClaimResponseConverter(BaseFHIRConverter):
         reference = Reference.construct()
         extension = Extension.construct()
         extension.valueReference = reference
-        extension.url = f'{GeneralConfiguration.get_system_base_url()}StructureDefinition/claim-item-reference'
+        extension.url = FhirFragments.structure_definition_url("claim-item-reference")
         extension.valueReference = MedicationConverter\
             .build_fhir_resource_reference(serviced, service_type, reference_type=reference_type, display=serviced.code)
         return extension
@@ -2,6 +2,7 @@ from api_fhir_r4.configurations import GeneralConfiguration, R4CommunicationRequ
 from api_fhir_r4.containedResources.converterUtils import get_from_contained_or_by_reference
 from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin
 from api_fhir_r4.converters.patientConverter import PatientConverter
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from api_fhir_r4.exceptions import FHIRException
 from api_fhir_r4.utils import DbManagerUtils
 from claim.models import Claim, Feedback
@@ -88,7 +89,7 @@ class CommunicationConverter(BaseFHIRConverter, ReferenceConverterMixin):
         payload.extension = []
 
         extension = Extension.construct()
-        url = f'{GeneralConfiguration.get_system_base_url()}StructureDefinition/communication-payload-type'
+        url = FhirFragments.structure_definition_url("communication-payload-type")
         system = f'{GeneralConfiguration.get_system_base_url()}CodeSystem/feedback-payload'
         extension.url = url
         extension.valueCodeableConcept = cls.build_codeable_concept(
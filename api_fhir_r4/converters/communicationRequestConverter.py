@@ -1,6 +1,7 @@
 from api_fhir_r4.configurations import GeneralConfiguration, \
     R4CommunicationRequestConfig as Config
 from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from api_fhir_r4.mapping.feedbackMapping import FeedbackStatus
 from api_fhir_r4.utils import DbManagerUtils
 from claim.models import Claim
@@ -82,7 +83,7 @@ class CommunicationRequestConverter(BaseFHIRConverter, ReferenceConverterMixin):
         payload.extension = []
 
         extension = Extension.construct()
-        url = f'{GeneralConfiguration.get_system_base_url()}StructureDefinition/communication-payload-type'
+        url = FhirFragments.structure_definition_url("communication-payload-type")
         system = f'{GeneralConfiguration.get_system_base_url()}CodeSystem/feedback-payload'
         extension.url = url
         extension.valueCodeableConcept = cls.build_codeable_concept(
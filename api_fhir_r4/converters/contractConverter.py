@@ -3,16 +3,13 @@ import core
 from django.db.models import Q
 from django.utils.translation import gettext as _
 from api_fhir_r4.configurations import GeneralConfiguration, R4CoverageConfig
-from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin
+from api_fhir_r4.converters import BaseFHIRConverter, FhirDictEmitter, ReferenceConverterMixin
 from api_fhir_r4.converters.patientConverter import PatientConverter
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from api_fhir_r4.exceptions import FHIRException
 from api_fhir_r4.mapping.contractMapping import PayTypeMapping, ContractStatus, \
     ContractState
-from fhir.resources.R4B.contract import Contract, ContractTermAssetValuedItem, \
-    ContractTerm, ContractTermAsset, ContractTermOffer, ContractTermOfferParty
-from fhir.resources.R4B.extension import Extension
-from fhir.resources.R4B.money import Money
-from fhir.resources.R4B.period import Period
+from fhir.resources.R4B.contract import Contract
 
 from product.models import Product
 from policy.models import Policy
@@ -26,23 +23,27 @@ from api_fhir_r4.utils import DbManagerUtils, TimeUtils
 class ContractConverter(BaseFHIRConverter, ReferenceConverterMixin):
     @classmethod
     def to_fhir_obj(cls, imis_policy, reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE):
-        fhir_contract = Contract.construct()
-        cls.build_contract_identifier(fhir_contract, imis_policy)
-        cls.build_contract_author(fhir_contract, imis_policy, reference_type)
-        cls.build_contract_subject(fhir_contract, imis_policy, reference_type)
-        cls.build_contract_scope(fhir_contract, imis_policy)
-        contract_term = ContractTerm.construct()
-        cls.build_contract_term_offer(contract_term, imis_policy, reference_type)
-        contract_term_asset = ContractTermAsset.construct()
-        cls.build_contract_asset_extension(contract_term_asset, imis_policy, reference_type)
-        cls.build_contract_asset_type_reference(contract_term_asset, imis_policy, reference_type)
-        cls.build_contract_valued_item_entity(contract_term_asset, imis_policy)
-        cls.build_contract_asset_use_period(contract_term_asset, imis_policy)
-        contract_term.asset = [contract_term_asset]
-        fhir_contract.term = [contract_term]
-        cls.build_contract_status(fhir_contract, imis_policy)
-        cls.build_contract_state(fhir_contract, imis_policy)
-        return fhir_contract
+        return FhirDictEmitter.construct(Contract, cls.to_fhir_dict(imis_policy, reference_type))
+
+    @classmethod
+    def to_fhir_dict(cls, imis_policy, reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE):
+        # single description of the Contract read representation, to_fhir_obj builds the models from it
+        fhir_contract = {
+            'resourceType': 'Contract',
+            'identifier': FhirDictEmitter.emit_value(cls.build_all_identifiers([], imis_policy)),
+            'status': cls.build_contract_status_value(imis_policy),
+            'legalState': cls.build_contract_state_dict(imis_policy),
+            'subject': [cls.build_fhir_resource_reference_dict(
+                imis_policy.family, "Group", imis_policy.family.head_insuree.last_name, reference_type=reference_type)],
+            'author': cls.build_fhir_resource_reference_dict(
+                imis_policy.officer, "Practitioner", imis_policy.officer.code, reference_type=reference_type),
+            'scope': cls.build_contract_scope_dict(),
+            'term': [{
+                'offer': cls.build_contract_term_offer_dict(imis_policy),
+                'asset': [cls.build_contract_term_asset_dict(imis_policy, reference_type)]
+            }],
+        }
+        return {element: value for element, value in fhir_contract.items() if value}
 
     @classmethod
     def to_imis_obj(cls, fhir_contract, audit_user_id):
@@ -83,11 +84,28 @@ class ContractConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
 
     @classmethod
-    def build_contract_identifier(cls, fhir_contract, imis_policy):
-        identifiers = []
-        cls.build_all_identifiers(identifiers, imis_policy)
-        fhir_contract.identifier = identifiers
-        return fhir_contract
+    def prepare_batch(cls, imis_objs, batch_context):
+        policy_ids = {imis_policy.id for imis_policy in imis_objs}
+        if not policy_ids:
+            return
+        premiums = Premium.objects \
+            .filter(policy_id__in=policy_ids, validity_to__isnull=True) \
+            .order_by('id')
+        batch_context.set('contract_premiums', {premium.policy_id: premium for premium in premiums})
+        insuree_policies = {policy_id: [] for policy_id in policy_ids}
+        for insuree_policy in cls.get_current_insuree_policies(policy__id__in=policy_ids).order_by('id'):
+            insuree_policies[insuree_policy.policy_id].append(insuree_policy)
+        batch_context.set('contract_insuree_policies', insuree_policies)
+
+    @classmethod
+    def get_current_insuree_policies(cls, **filters):
+        from core import datetime
+        now = datetime.datetime.now()
+        return InsureePolicy.objects.filter(
+            Q(validity_from__lte=now),
+            Q(validity_to__isnull=True) | Q(validity_to__gte=now),
+            **filters
+        ).select_related('insuree')
 
     @classmethod
     def build_all_identifiers(cls, identifiers, imis_object):
@@ -97,203 +115,150 @@ class ContractConverter(BaseFHIRConverter, ReferenceConverterMixin):
         return identifiers
 
     @classmethod
-    def build_contract_author(cls, fhir_contract, imis_policy, reference_type):
-        author = cls.build_fhir_resource_reference(
-            imis_policy.officer, "Practitioner", imis_policy.officer.code, reference_type=reference_type)
-        fhir_contract.author = author
-
-    @classmethod
-    def build_contract_subject(cls, fhir_contract, imis_policy, reference_type):
-        subject = cls.build_fhir_resource_reference(
-            imis_policy.family, "Group", imis_policy.family.head_insuree.last_name, reference_type=reference_type)
-        fhir_contract.subject = [subject]
-
-    @classmethod
-    def build_contract_scope(cls, fhir_contract, imis_policy):
+    def build_contract_scope_dict(cls):
         system = f"{GeneralConfiguration.get_system_base_url()}CodeSystem/contract-scope"
-        fhir_contract.scope = cls.build_codeable_concept(code="informal", system=system)
-        if len(fhir_contract.scope.coding) == 1:
-            fhir_contract.scope.coding[0].display = _("Informal Sector")
-
-    @classmethod
-    def build_contract_asset_extension(cls, contract_term_asset, imis_policy, reference_type):
-        cls.build_contract_asset_premium(contract_term_asset, imis_policy)
-
-    @classmethod
-    def build_contract_asset_premium(cls, contract_term_asset, imis_policy):
-        asset_extensions = Extension.construct()
-        asset_extensions.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/contract-premium"
-        if Premium.objects.filter(policy=imis_policy, validity_to__isnull=True).count() > 0:
-            imis_premium = Premium.objects.get(policy=imis_policy, validity_to__isnull=True)
-            fhir_premium = cls.build_contract_asset_premium_extension(asset_extensions, imis_premium)
-            if type(contract_term_asset.extension) is not list:
-                contract_term_asset.extension = [fhir_premium]
-            else:
-                contract_term_asset.extension.append(fhir_premium)
-
-    @classmethod
-    def build_contract_asset_premium_extension(cls, asset_extensions, imis_premium):
-        cls.build_premium_payer_ext(asset_extensions)
-        cls.build_premium_category_ext(asset_extensions)
-        cls.build_premium_amount_ext(asset_extensions, imis_premium)
-        cls.build_premium_receipt_ext(asset_extensions, imis_premium)
-        cls.build_premium_date_ext(asset_extensions, imis_premium)
-        cls.build_premium_type_ext(asset_extensions, imis_premium)
-        return asset_extensions
-
-    @classmethod
-    def build_premium_payer_ext(cls, asset_extensions):
-        extension = Extension.construct()
-        extension.url = "payer"
+        return cls.build_codeable_concept_dict(code="informal", system=system, display=_("Informal Sector"))
+
+    @classmethod
+    def build_contract_term_asset_dict(cls, imis_policy, reference_type):
+        imis_premium = cls.__get_policy_premium(imis_policy)
+        period, use_period = cls.build_contract_asset_period_dicts(imis_policy)
+        contract_term_asset = {
+            'extension': [cls.build_contract_asset_premium_dict(imis_premium)] if imis_premium is not None else [],
+            'typeReference': cls.build_contract_asset_type_reference_dicts(imis_policy, reference_type),
+            'period': [period] if period else [],
+            'usePeriod': [use_period] if use_period else [],
+            'valuedItem': [cls.build_contract_valued_item_dict(imis_policy)],
+        }
+        return {element: value for element, value in contract_term_asset.items() if value}
+
+    @classmethod
+    def __get_policy_premium(cls, imis_policy):
+        premiums = cls.get_batch_lookup('contract_premiums')
+        if premiums is not None:
+            return premiums.get(imis_policy.id)
+        return Premium.objects.filter(policy=imis_policy, validity_to__isnull=True).order_by('id').last()
+
+    @classmethod
+    def build_contract_asset_premium_dict(cls, imis_premium):
+        return {
+            'extension': [
+                cls.build_premium_payer_ext_dict(),
+                cls.build_premium_category_ext_dict(),
+                cls.build_premium_amount_ext_dict(imis_premium),
+                cls.build_premium_receipt_ext_dict(imis_premium),
+                cls.build_premium_date_ext_dict(imis_premium),
+                cls.build_premium_type_ext_dict(imis_premium),
+            ],
+            'url': FhirFragments.structure_definition_url("contract-premium")
+        }
+
+    @classmethod
+    def build_premium_payer_ext_dict(cls):
         system = f"{GeneralConfiguration.get_system_base_url()}CodeSystem/contract-premium-payer"
-        extension.valueCodeableConcept = cls.build_codeable_concept(code="beneficiary", system=system)
-        if len(extension.valueCodeableConcept.coding) == 1:
-            extension.valueCodeableConcept.coding[0].display = _("Beneficiary")
-        asset_extensions.extension = [extension]
+        return {
+            'url': "payer",
+            'valueCodeableConcept': cls.build_codeable_concept_dict(
+                code="beneficiary", system=system, display=_("Beneficiary"))
+        }
 
     @classmethod
-    def build_premium_category_ext(cls, asset_extensions):
-        extension = Extension.construct()
-        extension.url = "category"
+    def build_premium_category_ext_dict(cls):
         system = f"{GeneralConfiguration.get_system_base_url()}CodeSystem/contract-premium-category"
-        extension.valueCodeableConcept = cls.build_codeable_concept(code="C", system=system)
-        if len(extension.valueCodeableConcept.coding) == 1:
-            extension.valueCodeableConcept.coding[0].display = _("Contribution and Others")
-        asset_extensions.extension.append(extension)
+        return {
+            'url': "category",
+            'valueCodeableConcept': cls.build_codeable_concept_dict(
+                code="C", system=system, display=_("Contribution and Others"))
+        }
 
     @classmethod
-    def build_premium_amount_ext(cls, asset_extensions, imis_premium):
+    def build_premium_amount_ext_dict(cls, imis_premium):
         # get the currency defined in configs from core module
         if hasattr(core, 'currency'):
             currency = core.currency
         else:
             currency = "EUR"
-
-        extension = Extension.construct()
-        extension.url = "amount"
-        money = Money(**{
-            "value": imis_premium.amount,
-            "currency": currency
-        })
-        extension.valueMoney = money
-        asset_extensions.extension.append(extension)
+        return {'url': "amount", 'valueMoney': cls.build_fhir_money_dict(imis_premium.amount, currency)}
 
     @classmethod
-    def build_premium_receipt_ext(cls, asset_extensions, imis_premium):
-        extension = Extension.construct()
-        extension.url = "receipt"
-        extension.valueString = imis_premium.receipt
-        asset_extensions.extension.append(extension)
+    def build_premium_receipt_ext_dict(cls, imis_premium):
+        extension = {'url': "receipt"}
+        if imis_premium.receipt is not None:
+            extension['valueString'] = imis_premium.receipt
+        return extension
 
     @classmethod
-    def build_premium_date_ext(cls, asset_extensions, imis_premium):
-        extension = Extension.construct()
-        extension.url = "date"
-        extension.valueDate = imis_premium.pay_date
-        asset_extensions.extension.append(extension)
+    def build_premium_date_ext_dict(cls, imis_premium):
+        extension = {'url': "date"}
+        if imis_premium.pay_date is not None:
+            extension['valueDate'] = imis_premium.pay_date
+        return extension
 
     @classmethod
-    def build_premium_type_ext(cls, asset_extensions, imis_premium):
-        extension = Extension.construct()
-        extension.url = "type"
+    def build_premium_type_ext_dict(cls, imis_premium):
         system = f"{GeneralConfiguration.get_system_base_url()}CodeSystem/contract-premium-type"
-        extension.valueCodeableConcept = cls.build_codeable_concept(code=imis_premium.pay_type, system=system)
-        if len(extension.valueCodeableConcept.coding) == 1:
-            extension.valueCodeableConcept.coding[0].display = PayTypeMapping.pay_type[imis_premium.pay_type]
-        asset_extensions.extension.append(extension)
+        return {
+            'url': "type",
+            'valueCodeableConcept': cls.build_codeable_concept_dict(
+                code=imis_premium.pay_type, system=system, display=PayTypeMapping.pay_type[imis_premium.pay_type])
+        }
 
     @classmethod
-    def build_contract_asset_use_period(cls, contract_asset, imis_policy):
-        period_use = Period.construct()
-        period = Period.construct()
+    def build_contract_asset_period_dicts(cls, imis_policy):
+        period = {}
+        period_use = {}
         if imis_policy.start_date is not None:
-            period.start = imis_policy.start_date.strftime("%Y-%m-%d")
-            period_use.start = period.start
+            period['start'] = imis_policy.start_date.strftime("%Y-%m-%d")
+            period_use['start'] = period['start']
         if imis_policy.effective_date is not None:
-            period_use.start = imis_policy.effective_date.strftime("%Y-%m-%d")
-            if period_use.start is None:
-                period.start = period_use.start
+            period_use['start'] = imis_policy.effective_date.strftime("%Y-%m-%d")
         if imis_policy.expiry_date is not None:
-            period_use.end = imis_policy.expiry_date.strftime("%Y-%m-%d")
-            period.end = period_use.end
-
-        if type(contract_asset.usePeriod) is not list:
-            contract_asset.usePeriod = [period_use]
-        else:
-            contract_asset.usePeriod.append(period_use)
-        if type(contract_asset.period) is not list:
-            contract_asset.period = [period]
-        else:
-            contract_asset.period.append(period)
-        return contract_asset
+            period_use['end'] = imis_policy.expiry_date.strftime("%Y-%m-%d")
+            period['end'] = period_use['end']
+        return period, period_use
 
     @classmethod
-    def build_contract_term_offer(cls, contract_term_offer, imis_policy, reference_type):
-        offer = ContractTermOffer.construct()
-
-        offer_party = ContractTermOfferParty.construct()
-        offer_party.reference = [PatientConverter.build_fhir_resource_reference(imis_policy.family.head_insuree, 'Patient')]
+    def build_contract_term_offer_dict(cls, imis_policy):
         system = f"{GeneralConfiguration.get_system_base_url()}CodeSystem/contract-resource-party-role"
-        offer_party.role = cls.build_codeable_concept(code="beneficiary", system=system)
-        if len(offer_party.role.coding) == 1:
-            offer_party.role.coding[0].display = _("Beneficiary")
-
-        offer.party = [offer_party]
-        contract_term_offer.offer = offer
+        offer_party = {
+            'reference': [PatientConverter.build_fhir_resource_reference_dict(imis_policy.family.head_insuree, 'Patient')],
+            'role': cls.build_codeable_concept_dict(code="beneficiary", system=system, display=_("Beneficiary"))
+        }
+        return {'party': [offer_party]}
 
     @classmethod
-    def build_contract_status(cls, contract, imis_policy):
-        if f"{imis_policy.status}" in ContractStatus.contract_status:
-            contract.status = ContractStatus.contract_status[f"{imis_policy.status}"]
-        else:
-            contract.status = imis_policy.status
-        return contract
+    def build_contract_status_value(cls, imis_policy):
+        status = f"{imis_policy.status}"
+        return ContractStatus.contract_status.get(status, status)
 
     @classmethod
-    def build_contract_state(cls, contract, imis_policy):
+    def build_contract_state_dict(cls, imis_policy):
         if f"{imis_policy.stage}" in ContractState.contract_state:
-            contract.legalState = cls.build_simple_codeable_concept(ContractState.contract_state[f"{imis_policy.stage}"])
-        else:
-            contract.legalState = cls.build_simple_codeable_concept(imis_policy.stage)
-        return contract
-
-    @classmethod
-    def build_contract_valued_item_entity(cls, contract_asset, imis_policy):
-        valued_item = ContractTermAssetValuedItem.construct()
-        typeReference = cls.build_fhir_resource_reference(imis_policy.product, "InsurancePlan", imis_policy.product.code)
-        valued_item.entityReference = typeReference
-        policy_value = Money.construct()
-        policy_value.value = imis_policy.value
-        valued_item.net = policy_value
-        if type(contract_asset.valuedItem) is not list:
-            contract_asset.valuedItem = [valued_item]
-        else:
-            contract_asset.valuedItem.append(valued_item)
-        return contract_asset
+            return cls.build_codeable_concept_dict(None, text=ContractState.contract_state[f"{imis_policy.stage}"])
+        return cls.build_codeable_concept_dict(None, text=imis_policy.stage)
 
     @classmethod
-    def build_contract_asset_type_reference(cls, contract_asset, imis_policy, reference_type):
-        # type reference - take insurees covered as a policy patient
-        from core import datetime
-        now = datetime.datetime.now()
-
-        list_insuree_policy = InsureePolicy.objects.filter(
-            Q(policy=imis_policy),
-            Q(validity_from__lte=now),
-            Q(validity_to__isnull=True) | Q(validity_to__gte=now),
-        ).only('insuree')
+    def build_contract_valued_item_dict(cls, imis_policy):
+        valued_item = {
+            'entityReference': cls.build_fhir_resource_reference_dict(
+                imis_policy.product, "InsurancePlan", imis_policy.product.code)
+        }
+        if imis_policy.value is not None:
+            valued_item['net'] = {'value': imis_policy.value}
+        return valued_item
 
-        for insuree_policy in list_insuree_policy:
-            insuree = insuree_policy.insuree
-            type_reference = cls.build_fhir_resource_reference(
-                insuree, "Patient", insuree.chf_id, reference_type=reference_type
-            )
-            if type(contract_asset.typeReference) is not list:
-                contract_asset.typeReference = [type_reference]
-            else:
-                contract_asset.typeReference.append(type_reference)
+    @classmethod
+    def build_contract_asset_type_reference_dicts(cls, imis_policy, reference_type):
+        # type reference - take insurees covered as a policy patient
+        insuree_policies = cls.get_batch_lookup('contract_insuree_policies')
+        if insuree_policies is not None:
+            list_insuree_policy = insuree_policies.get(imis_policy.id, [])
+        else:
+            list_insuree_policy = cls.get_current_insuree_policies(policy=imis_policy)
 
-        return contract_asset
+        return [cls.build_fhir_resource_reference_dict(insuree_policy.insuree, "Patient",
+                                                       insuree_policy.insuree.chf_id, reference_type=reference_type)
+                for insuree_policy in list_insuree_policy]
 
     @classmethod
     def build_imis_period(cls, imis_policy, fhir_contract, errors):
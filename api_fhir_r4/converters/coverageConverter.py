@@ -1,4 +1,5 @@
 from django.utils.translation import gettext as _
+from api_fhir_r4.cache import ProductCoverageCache
 from api_fhir_r4.configurations import GeneralConfiguration, R4CoverageConfig
 from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin
 from api_fhir_r4.mapping.coverageMapping import CoverageStatus
@@ -7,7 +8,6 @@ from fhir.resources.R4B.period import Period
 from fhir.resources.R4B.extension import Extension
 from fhir.resources.R4B.reference import Reference
 from policy.signals import signal_check_formal_sector_for_policy
-from product.models import ProductItem, ProductService
 from policy.models import Policy
 from api_fhir_r4.utils import TimeUtils
 
@@ -171,10 +171,9 @@ class CoverageConverter(BaseFHIRConverter, ReferenceConverterMixin):
         product_coverage = {}
         service_code = R4CoverageConfig.get_service_code()
         item_code = R4CoverageConfig.get_item_code()
-        product_items = ProductItem.objects.filter(product=product).all()
-        product_services = ProductService.objects.filter(product=product).all()
-        product_coverage[item_code] = [item.item.code for item in product_items]
-        product_coverage[service_code] = [service.service.code for service in product_services]
+        coverage = ProductCoverageCache.get(product.id)
+        product_coverage[item_code] = list(coverage.item_codes)
+        product_coverage[service_code] = list(coverage.service_codes)
         class_.value = product.code
         class_.type = cls.build_simple_codeable_concept(product.name)
         class_.name = str(product_coverage)
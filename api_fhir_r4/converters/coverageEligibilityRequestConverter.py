@@ -1,4 +1,7 @@
-from django.db import connection
+import logging
+import time
+
+from django.db import connection, transaction
 from fhir.resources.R4B.coverageeligibilityresponse import (
     CoverageEligibilityResponse as FHIRCoverageEligibilityResponse,
     CoverageEligibilityResponseInsuranceItem,
@@ -8,6 +11,7 @@ from fhir.resources.R4B.coverageeligibilityresponse import (
 from fhir.resources.R4B.money import Money
 from fhir.resources.R4B.period import Period
 
+from api_fhir_r4.cache import ProductCoverageCache
 from api_fhir_r4.configurations import (
     GeneralConfiguration,
     R4CoverageEligibilityConfiguration as Config
@@ -37,7 +41,9 @@ from policy.services import (
     EligibilityRequest,
     EligibilityResponse
 )
-from product.models import Product, ProductService, ProductItem
+from product.models import Product
+
+logger = logging.getLogger(__name__)
 
 
 class CoverageEligibilityRequestConverter(BaseFHIRConverter):
@@ -45,11 +51,25 @@ class CoverageEligibilityRequestConverter(BaseFHIRConverter):
     @classmethod
     def to_fhir_obj(cls, coverage_eligibility_response, coverage_eligibility_request,
                     reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE):
+        started = time.monotonic()
         fhir_response = cls.build_fhir_obligatory_fields(coverage_eligibility_request)
         fhir_response.patient = cls.build_fhir_patient(coverage_eligibility_request.chf_id)
-        for item in coverage_eligibility_response.items:
-            if item.status in Config.get_fhir_active_policy_status():
-                cls.build_fhir_insurance(fhir_response, item, coverage_eligibility_request)
+        active_items = [item for item in coverage_eligibility_response.items
+                        if item.status in Config.get_fhir_active_policy_status()]
+        enquiry_duration = 0
+        if active_items:
+            # the enquiry only depends on the request, its result is shared by all active policies of the insuree
+            enquiry_started = time.monotonic()
+            enquiry = cls.get_service_item_enquiry(coverage_eligibility_request)
+            enquiry_duration = time.monotonic() - enquiry_started
+            policies = cls.get_policies_by_uuid([item.policy_uuid for item in active_items])
+            product = Product.objects.filter(id=enquiry.prod_id, validity_to__isnull=True).first() \
+                if enquiry.prod_id else None
+            for item in active_items:
+                cls.build_fhir_insurance(fhir_response, item, coverage_eligibility_request,
+                                         enquiry=enquiry, policies=policies, product=product)
+        logger.info(f'Coverage eligibility of {coverage_eligibility_request.chf_id}: {len(active_items)} active '
+                    f'policies in {time.monotonic() - started:.3f}s (service item enquiry {enquiry_duration:.3f}s)')
         return fhir_response
 
     @classmethod
@@ -91,13 +111,41 @@ class CoverageEligibilityRequestConverter(BaseFHIRConverter):
             return reference
 
     @classmethod
-    def build_fhir_insurance(cls, fhir_response, item, request):
+    def build_fhir_insurance(cls, fhir_response, item, request, enquiry=None, policies=None, product=None):
         result = CoverageEligibilityResponseInsurance.construct()
-        cls.build_fhir_coverage(result, item.policy_uuid)
+        policy = policies.get(str(item.policy_uuid).lower()) if policies is not None else None
+        cls.build_fhir_coverage(result, item.policy_uuid, policy)
         cls.build_fhir_benefit_period(result, item.start_date, item.expiry_date)
-        # get the data from SP
+        response_eligibility_sp = enquiry if enquiry is not None else cls.get_service_item_enquiry(request)
+        prod_id = response_eligibility_sp.prod_id
+        # build coverag item - product/benefit
+        result.item = []
+        if prod_id:
+            cls.build_fhir_benefit_item_element(result, response_eligibility_sp, product)
+        # check services and items etc
+        coverage = ProductCoverageCache.get(prod_id) if prod_id else None
+        covered_service = coverage.services.get(request.service_code) if coverage else None
+        covered_item = coverage.items.get(request.item_code) if coverage else None
+        # build coverage item - service
+        if covered_service:
+            cls.build_fhir_benefit_item_service_element(result, response_eligibility_sp, covered_service)
+        # build coverage item - item
+        if covered_item:
+            cls.build_fhir_benefit_item_item_element(result, response_eligibility_sp, covered_item)
+        if type(fhir_response.insurance) is not list:
+            fhir_response.insurance = [result]
+        else:
+            fhir_response.insurance.append(result)
+
+    @classmethod
+    def get_service_item_enquiry(cls, request):
+        """
+        Runs `uspServiceItemEnquiry` for the insuree, service and item of the request. If the procedure fails,
+        an empty response without product is returned.
+        """
         try:
-            with connection.cursor() as cur:
+            # savepoint, a failed procedure must not break the transaction of the request
+            with transaction.atomic(), connection.cursor() as cur:
                 sql = """\
                             DECLARE @MinDateService DATE, @MinDateItem DATE,
                                     @ServiceLeft INT, @ItemLeft INT,
@@ -120,7 +168,7 @@ class CoverageEligibilityRequestConverter(BaseFHIRConverter):
                 cur.nextset()
                 (min_date_service, min_date_item, service_left,
                  item_left, is_item_ok, is_service_ok) = cur.fetchone()
-                response_eligibility_sp = EligibilityResponse(
+                return EligibilityResponse(
                     eligibility_request=request,
                     prod_id=prod_id or None,
                     total_admissions_left=total_admissions_left or 0,
@@ -142,7 +190,7 @@ class CoverageEligibilityRequestConverter(BaseFHIRConverter):
                     is_service_ok=is_service_ok is True
                 )
         except Exception:
-            response_eligibility_sp = EligibilityResponse(
+            return EligibilityResponse(
                 eligibility_request=None,
                 prod_id=None,
                 total_admissions_left=0,
@@ -164,30 +212,18 @@ class CoverageEligibilityRequestConverter(BaseFHIRConverter):
                 is_service_ok=False
             )
 
-        # build coverag item - product/benefit
-        result.item = []
-        cls.build_fhir_benefit_item_element(result, response_eligibility_sp)
-        # check services and items etc
-        prod_service = ProductService.objects\
-            .filter(product=prod_id, validity_to=None, service__code=request.service_code).first()
-        prod_item = ProductItem.objects\
-            .filter(product=prod_id, validity_to=None, item__code=request.item_code).first()
-        # build coverage item - service
-        if prod_service:
-            cls.build_fhir_benefit_item_service_element(result, response_eligibility_sp, prod_service.service)
-        # build coverage item - item
-        if prod_item:
-            cls.build_fhir_benefit_item_item_element(result, response_eligibility_sp, prod_item.item)
-        if type(fhir_response.insurance) is not list:
-            fhir_response.insurance = [result]
-        else:
-            fhir_response.insurance.append(result)
+    @classmethod
+    def get_policies_by_uuid(cls, policy_uuids):
+        policies = Policy.objects.filter(uuid__in={str(policy_uuid) for policy_uuid in policy_uuids},
+                                         validity_to__isnull=True)
+        return {str(policy.uuid).lower(): policy for policy in policies}
 
     @classmethod
-    def build_fhir_coverage(cls, insurance, policy_uuid):
+    def build_fhir_coverage(cls, insurance, policy_uuid, policy=None):
         # Due to circular dependency import has to be done inside of method
         from api_fhir_r4.converters import CoverageConverter
-        policy = Policy.objects.filter(uuid__iexact=policy_uuid, validity_to__isnull=True).first()
+        if policy is None:
+            policy = Policy.objects.filter(uuid__iexact=policy_uuid, validity_to__isnull=True).first()
         reference_coverage = CoverageConverter.build_fhir_resource_reference(
             policy,
             type='Coverage',
@@ -203,7 +239,11 @@ class CoverageEligibilityRequestConverter(BaseFHIRConverter):
         insurance.benefitPeriod = benefit_period
 
     @classmethod
-    def build_fhir_benefit_item_element(cls, insurance, response):
+    def build_fhir_benefit_item_element(cls, insurance, response, product=None):
+        if product is None:
+            product = Product.objects.filter(id=response.prod_id, validity_to__isnull=True).first()
+        if product is None:
+            return
         item = CoverageEligibilityResponseInsuranceItem.construct()
         system = F"{GeneralConfiguration.get_system_base_url()}CodeSystem/coverage-item-category"
         item.category = cls.build_codeable_concept(
@@ -211,7 +251,7 @@ class CoverageEligibilityRequestConverter(BaseFHIRConverter):
             code="benefit",
             display="Benefit Package"
         )
-        cls.__build_item_product_name(fhir_item=item, prod_id=response.prod_id)
+        cls.__build_item_product_name(fhir_item=item, product=product)
         item.benefit = []
         if response.total_admissions_left:
             cls.build_fhir_int_item_benefit_element(
@@ -427,8 +467,6 @@ class CoverageEligibilityRequestConverter(BaseFHIRConverter):
         return policy, product
 
     @classmethod
-    def __build_item_product_name(cls, fhir_item, prod_id):
-        product_queryset = Product.objects.all().filter(id=prod_id, validity_to=None)
-        product = product_queryset.first()
+    def __build_item_product_name(cls, fhir_item, product):
         fhir_item.name = product.name
         fhir_item.description = product.code
@@ -0,0 +1,73 @@
+from rest_framework.exceptions import ValidationError
+
+
+class ElementsProjection(object):
+    """
+    Subset of resource elements requested with the `_summary` or `_elements` search parameters. Converters
+    supporting projections skip builders of elements which are not included, so related rows used only by these
+    elements are not fetched at all. The serializer prunes the output of the remaining converters.
+    """
+    SUMMARY_PARAMETER = '_summary'
+    ELEMENTS_PARAMETER = '_elements'
+
+    SUMMARY_TRUE = 'true'
+    SUMMARY_FALSE = 'false'
+    SUMMARY_DATA = 'data'
+    SUMMARY_COUNT = 'count'
+    SUMMARY_VALUES = (SUMMARY_TRUE, SUMMARY_FALSE, SUMMARY_DATA, SUMMARY_COUNT)
+
+    # elements always present in the output
+    MANDATORY_ELEMENTS = ('resourceType', 'id', 'meta')
+
+    SUBSETTED_TAG = {
+        'system': 'http://terminology.hl7.org/CodeSystem/v3-ObservationValue',
+        'code': 'SUBSETTED',
+        'display': 'subsetted'
+    }
+
+    def __init__(self, elements=None, summary=None):
+        self.elements = set(elements) if elements is not None else None
+        self.summary = summary
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Return the projection requested by query parameters or None if the whole resource was requested.
+        """
+        query_params = getattr(request, 'query_params', request.GET)
+        summary = query_params.get(cls.SUMMARY_PARAMETER)
+        elements = query_params.get(cls.ELEMENTS_PARAMETER)
+        if summary and summary not in cls.SUMMARY_VALUES:
+            raise ValidationError({cls.SUMMARY_PARAMETER: f'Invalid value, expected one of {cls.SUMMARY_VALUES}'})
+        if elements:
+            return cls(elements=[element.strip() for element in elements.split(',') if element.strip()])
+        if summary in (cls.SUMMARY_TRUE, cls.SUMMARY_DATA, cls.SUMMARY_COUNT):
+            return cls(summary=summary)
+        return None
+
+    @classmethod
+    def is_count_only(cls, request):
+        query_params = getattr(request, 'query_params', request.GET)
+        return query_params.get(cls.SUMMARY_PARAMETER) == cls.SUMMARY_COUNT
+
+    def includes(self, element, summary_elements=None):
+        if element in self.MANDATORY_ELEMENTS:
+            return True
+        if self.elements is not None:
+            return element in self.elements
+        if self.summary == self.SUMMARY_TRUE:
+            # resources without defined summary elements are returned as a whole
+            return summary_elements is None or element in summary_elements
+        if self.summary == self.SUMMARY_DATA:
+            return element != 'text'
+        if self.summary == self.SUMMARY_COUNT:
+            return False
+        return True
+
+    def apply(self, fhir_dict, summary_elements=None):
+        projected = {key: value for key, value in fhir_dict.items() if self.includes(key, summary_elements)}
+        if len(projected) != len(fhir_dict):
+            meta = dict(projected.get('meta') or {})
+            meta['tag'] = [*meta.get('tag', []), dict(self.SUBSETTED_TAG)]
+            projected['meta'] = meta
+        return projected
@@ -1,6 +1,7 @@
 from api_fhir_r4.configurations import GeneralConfiguration, R4IdentifierConfig
 from api_fhir_r4.converters import BaseFHIRConverter, EnrolmentOfficerPractitionerConverter, ReferenceConverterMixin
 from api_fhir_r4.converters.healthFacilityOrganisationConverter import LocationConverter, PersonConverterMixin
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from api_fhir_r4.utils import DbManagerUtils
 from core.models import Officer
 from django.utils.translation import gettext as _
@@ -83,7 +84,7 @@ class EnrolmentOfficerPractitionerRoleConverter(BaseFHIRConverter, PersonConvert
     def build_fhir_extension(cls, fhir_practitioner_role, imis_officer, reference_type):
         if imis_officer.substitution_officer:
             extension = Extension.construct()
-            extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/practitioner-role-substitution-reference"
+            extension.url = FhirFragments.structure_definition_url("practitioner-role-substitution-reference")
 
             reference = EnrolmentOfficerPractitionerConverter.build_fhir_resource_reference(
                 imis_officer.substitution_officer,
@@ -0,0 +1,113 @@
+from fhir.resources.R4B import FHIRAbstractModel, get_fhir_model_class
+from fhir.resources.core.utils.common import is_primitive_type
+from pydantic import BaseModel
+
+
+class FhirDictEmitter(object):
+    """
+    Replacement of `FHIRAbstractModel.dict()` for the read path. For every model class a plain python function
+    reading the element values straight from the instance `__dict__` is generated (once) from the class element
+    sequence, so exporting a resource doesn't walk the pydantic field metadata for every single object.
+    Output is the same as `dict()` with default arguments (by alias, without None values and empty containers).
+    `construct` goes the other way, converters building their dicts directly get their `to_fhir_obj` models from them.
+    """
+
+    _emitters = {}
+    _plain_types = frozenset((str, int, float, bool))
+
+    @classmethod
+    def emit(cls, fhir_obj):
+        if fhir_obj is None:
+            return None
+        return cls.get_emitter(type(fhir_obj))(fhir_obj)
+
+    @classmethod
+    def get_emitter(cls, model_class):
+        emitter = cls._emitters.get(model_class)
+        if emitter is None:
+            emitter = cls._generate_emitter(model_class)
+            cls._emitters[model_class] = emitter
+        return emitter
+
+    @classmethod
+    def emit_value(cls, value):
+        if isinstance(value, FHIRAbstractModel):
+            value = cls.get_emitter(type(value))(value)
+        elif isinstance(value, BaseModel):
+            value = value.dict(by_alias=True, exclude_none=True)
+            if '__root__' in value:
+                return value['__root__']
+        elif isinstance(value, dict):
+            value = {key: cls.emit_value(item) for key, item in value.items()}
+        elif isinstance(value, (list, tuple, set)):
+            value = value.__class__(cls.emit_value(item) for item in value)
+        else:
+            return value
+        return value if len(value) > 0 else None
+
+    @classmethod
+    def construct(cls, model_class, fhir_dict):
+        """
+        Model of `model_class` built from its JSON representation with `construct()`, nested elements are built as
+        models of their element types and primitive values are converted as on attribute assignment, but the
+        resource as a whole is not validated.
+        """
+        alias_mapping = model_class.get_alias_mapping()
+        values = {}
+        for key, value in fhir_dict.items():
+            field = model_class.__fields__.get(alias_mapping.get(key, key))
+            if field is not None and value is not None:
+                values[field.name] = cls.construct_element(model_class, field, value)
+        return model_class.construct(**values)
+
+    @classmethod
+    def construct_element(cls, model_class, field, value):
+        resource_type = getattr(field.type_, '__resource_type__', None)
+        if resource_type is None:
+            validated, errors = field.validate(value, {}, loc=field.name, cls=model_class)
+            # values equal to their converted form (e.g. int for decimal) are kept as given, like in `construct()`
+            return value if errors or validated == value else validated
+        if isinstance(value, list):
+            return [cls._construct_element_item(resource_type, item) for item in value]
+        return cls._construct_element_item(resource_type, value)
+
+    @classmethod
+    def _construct_element_item(cls, resource_type, value):
+        if not isinstance(value, dict):
+            return value
+        # contained resources are typed by their resourceType
+        return cls.construct(get_fhir_model_class(value.get('resourceType', resource_type)), value)
+
+    @classmethod
+    def _generate_emitter(cls, model_class):
+        alias_mapping = model_class.get_alias_mapping()
+        lines = ['def emit(obj):', '    values = obj.__dict__', '    result = {}']
+        if model_class.has_resource_base():
+            lines.append(f'    result["resourceType"] = {model_class.get_resource_type()!r}')
+        for element in model_class.elements_sequence():
+            field_key = alias_mapping[element]
+            field = model_class.__fields__[field_key]
+            lines.extend(cls._generate_field_lines(field_key, field.alias or field_key))
+            ext_key = f'{field_key}__ext'
+            if is_primitive_type(field) and ext_key in model_class.__fields__:
+                lines.extend(cls._generate_field_lines(ext_key, model_class.__fields__[ext_key].alias or ext_key))
+        lines.extend([
+            '    comments = values.get("fhir_comments")',
+            '    if comments is not None:',
+            '        result["fhir_comments"] = comments',
+            '    return result',
+        ])
+        namespace = {'emit_value': cls.emit_value, 'plain_types': cls._plain_types}
+        exec(compile('\n'.join(lines), f'<fhir emitter {model_class.__name__}>', 'exec'), namespace)
+        return namespace['emit']
+
+    @classmethod
+    def _generate_field_lines(cls, field_key, dict_key):
+        return [
+            f'    value = values.get({field_key!r})',
+            '    if value is not None:',
+            '        if value.__class__ not in plain_types:',
+            '            value = emit_value(value)',
+            '        if value is not None:',
+            f'            result[{dict_key!r}] = value',
+        ]
@@ -0,0 +1,81 @@
+from fhir.resources.R4B.codeableconcept import CodeableConcept
+from fhir.resources.R4B.coding import Coding
+
+from api_fhir_r4.configurations import BaseConfiguration, GeneralConfiguration
+
+
+class FhirFragments(object):
+    """
+    Registry of constant FHIR fragments (identifier type codings, StructureDefinition urls) shared by all converted
+    resources instead of building them for every row. Fragments are built once from the module configuration and
+    dropped by `refresh()` when the configuration has been rebuilt (see ModuleConfiguration.build_configuration),
+    the configuration is checked once per converter batch or serializer conversion, not on every lookup.
+    Only immutable values are shared, CodeableConcepts and dicts are built from them for every call, so converters
+    can modify what they get.
+    """
+
+    _fragments = {}
+    _configuration_generation = None
+
+    @classmethod
+    def get(cls, key, factory):
+        fragments = cls._fragments
+        fragment = fragments.get(key)
+        if fragment is None:
+            fragment = fragments[key] = factory()
+        return fragment
+
+    @classmethod
+    def refresh(cls):
+        generation = BaseConfiguration.get_configuration_generation()
+        if generation != cls._configuration_generation:
+            cls._fragments = {}
+            cls._configuration_generation = generation
+
+    @classmethod
+    def clear(cls):
+        cls._fragments = {}
+        cls._configuration_generation = None
+
+    @classmethod
+    def structure_definition_url(cls, name):
+        return cls.get(('structure_definition_url', name),
+                       lambda: f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/{name}")
+
+    @classmethod
+    def codeable_concept(cls, code, system=None):
+        """
+        CodeableConcept with single coding, same as BaseFHIRConverter.build_codeable_concept(code, system).
+        """
+        coding_system, coding_code = cls.get(('coding', code, system), lambda: cls.__get_coding_values(code, system))
+        coding = Coding.construct()
+        if coding_system is not None:
+            coding.system = coding_system
+        coding.code = coding_code
+        codeable_concept = CodeableConcept.construct()
+        codeable_concept.coding = [coding]
+        return codeable_concept
+
+    @classmethod
+    def codeable_concept_dict(cls, code, system=None, display=None):
+        """
+        JSON representation of single coding CodeableConcept used by the fast emit converters.
+        """
+        coding_items = cls.get(('coding_dict', code, system, display),
+                               lambda: cls.__get_coding_dict_items(code, system, display))
+        return {'coding': [dict(coding_items)]}
+
+    @classmethod
+    def __get_coding_values(cls, code, system):
+        return system if GeneralConfiguration.show_system() else None, str(code)
+
+    @classmethod
+    def __get_coding_dict_items(cls, code, system, display):
+        coding_system, coding_code = cls.__get_coding_values(code, system)
+        coding_items = []
+        if coding_system is not None:
+            coding_items.append(('system', coding_system))
+        coding_items.append(('code', coding_code))
+        if display:
+            coding_items.append(('display', str(display)))
+        return tuple(coding_items)
@@ -1,19 +1,22 @@
+from django.db.models import Count
 from django.db.models.query import Q
 from django.utils.translation import gettext as _
 from fhir.resources.R4B.humanname import HumanName
 
-from insuree.models import Insuree, InsureePolicy, Family, FamilyType, ConfirmationType
+from insuree.models import Insuree, InsureePolicy, Family, ConfirmationType
 from policy.models import Policy
 from location.models import Location
+from api_fhir_r4.cache import ReferenceDataCache, LocationIndex
 from api_fhir_r4.configurations import R4IdentifierConfig, GeneralConfiguration
 from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin
 from api_fhir_r4.converters.locationConverter import LocationConverter
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 
 from api_fhir_r4.mapping.groupMapping import GroupTypeMapping, ConfirmationTypeMapping
 from fhir.resources.R4B.extension import Extension
 from fhir.resources.R4B.group import Group, GroupMember
 from api_fhir_r4.utils import DbManagerUtils
-from api_fhir_r4.exceptions import FHIRException
+from api_fhir_r4.exceptions import FHIRException, FHIRRequestProcessException
 
 
 class GroupConverter(BaseFHIRConverter, ReferenceConverterMixin):
@@ -136,8 +139,63 @@ class GroupConverter(BaseFHIRConverter, ReferenceConverterMixin):
         # according to the IMIS profile - always 'Person' value
         fhir_family['type'] = "Person"
         
+    @classmethod
+    def prepare_import_batch(cls, fhir_dicts, batch_context):
+        from api_fhir_r4.converters import PatientConverter
+        id_values = {'uuid': set(), 'chf_id': set()}
+        for fhir_family in fhir_dicts:
+            for member in fhir_family.get('member') or []:
+                try:
+                    reference = GroupMember(**member).entity
+                    id_parameters = PatientConverter.get_database_query_id_parameteres_from_reference(
+                        reference, 'chf_id')
+                except (FHIRRequestProcessException, ValueError):
+                    continue
+                for field, value in id_parameters.items():
+                    id_values[field].add(value)
+        insurees = {}
+        if id_values['uuid'] or id_values['chf_id']:
+            # members not found here are looked up one by one, with the error reporting of the single conversion
+            for insuree in Insuree.objects \
+                    .filter(Q(uuid__in=id_values['uuid']) | Q(chf_id__in=id_values['chf_id']),
+                            validity_to__isnull=True):
+                insurees[cls._get_import_insuree_key('uuid', insuree.uuid)] = insuree
+                insurees[cls._get_import_insuree_key('chf_id', insuree.chf_id)] = insuree
+        batch_context.set('import_insurees', insurees)
+
+    @classmethod
+    def _get_import_insuree_key(cls, field, value):
+        # references carry uuid.UUID objects, the database strings can be upper case
+        return field, (str(value).lower() if field == 'uuid' else value)
+
+    @classmethod
+    def prepare_batch(cls, imis_objs, batch_context):
+        family_uuids = {imis_family.uuid for imis_family in imis_objs}
+        if not family_uuids:
+            return
+        member_counts = Insuree.objects \
+            .filter(family__uuid__in=family_uuids, validity_to__isnull=True) \
+            .order_by() \
+            .values('family__uuid') \
+            .annotate(count=Count('id'))
+        batch_context.set('group_member_counts', {row['family__uuid']: row['count'] for row in member_counts})
+        active_families = InsureePolicy.objects \
+            .filter(
+                Q(insuree__family__uuid__in=family_uuids),
+                Q(policy__status=Policy.STATUS_ACTIVE),
+                Q(validity_to__isnull=True)
+            ) \
+            .order_by() \
+            .values_list('insuree__family__uuid', flat=True) \
+            .distinct()
+        batch_context.set('group_active_families', set(active_families))
+
     @classmethod
     def build_fhir_active(cls, fhir_family, imis_family):
+        active_families = cls.get_batch_lookup('group_active_families')
+        if active_families is not None:
+            fhir_family.active = imis_family.uuid in active_families
+            return
         number_of_active_policy = InsureePolicy.objects.filter(
             Q(insuree__family__uuid=imis_family.uuid),
             Q(policy__status=Policy.STATUS_ACTIVE),
@@ -151,7 +209,11 @@ class GroupConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
     @classmethod
     def build_fhir_quantity(cls,fhir_family, imis_family):
-        quantity = Insuree.objects.filter(family__uuid=imis_family.uuid, validity_to__isnull=True).count()
+        member_counts = cls.get_batch_lookup('group_member_counts')
+        if member_counts is not None:
+            quantity = member_counts.get(imis_family.uuid, 0)
+        else:
+            quantity = Insuree.objects.filter(family__uuid=imis_family.uuid, validity_to__isnull=True).count()
         fhir_family.quantity = quantity
 
     @classmethod
@@ -164,11 +226,11 @@ class GroupConverter(BaseFHIRConverter, ReferenceConverterMixin):
                 cls._build_extension_address(extension, fhir_family, imis_family, reference_type=reference_type)
 
             elif value == "group-poverty-status":
-                extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/group-poverty-status"
+                extension.url = FhirFragments.structure_definition_url("group-poverty-status")
                 extension.valueBoolean = imis_family.poverty
 
             elif value == "group-type":
-                extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/group-type"
+                extension.url = FhirFragments.structure_definition_url("group-type")
                 if hasattr(imis_family, "family_type") and imis_family.family_type is not None:
                     GroupTypeMapping.load()
                     display = GroupTypeMapping.group_type[str(imis_family.family_type.code)]
@@ -200,32 +262,37 @@ class GroupConverter(BaseFHIRConverter, ReferenceConverterMixin):
     def build_imis_extentions(cls, imis_family, fhir_family):
         cls._validate_fhir_extension_is_exist(fhir_family)
         for extension in fhir_family.extension:
-            if extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/group-address":
+            if extension.url == FhirFragments.structure_definition_url("group-address"):
                 address = extension.valueAddress
                 # insuree use temp address
                 if address and address.use == "home" and address.type == "physical":
                     imis_family.address = address.text
                     for ext in address.extension:
                         if "StructureDefinition/address-location-reference" in ext.url:
-                                imis_family.location= Location.objects.filter(validity_to__isnull=True,**LocationConverter.get_database_query_id_parameteres_from_reference(ext.valueReference)).first()
+                                id_parameters = LocationConverter.get_database_query_id_parameteres_from_reference(ext.valueReference)
+                                imis_family.location = LocationIndex.get_location(**id_parameters) \
+                                    or Location.objects.filter(validity_to__isnull=True, **id_parameters).first()
 
-            elif extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/group-poverty-status":
+            elif extension.url == FhirFragments.structure_definition_url("group-poverty-status"):
                 imis_family.poverty = extension.valueBoolean
 
-            elif extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/group-type":
+            elif extension.url == FhirFragments.structure_definition_url("group-type"):
                 try:
-                    imis_family.family_type = FamilyType.objects.get(code=extension.valueCodeableConcept.coding[0].code)
+                    imis_family.family_type = ReferenceDataCache.get(
+                        'insuree.FamilyType', 'code', extension.valueCodeableConcept.coding[0].code)
                 except:
                     imis_family.family_type = None
 
-            elif extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/group-confirmation":
+            elif extension.url == FhirFragments.structure_definition_url("group-confirmation"):
                 try:
                     for ext in extension.extension:
                         if ext.url == "number":
                             fhir_family.confirmation_no = ext.valueString
                         if ext.url == "type":
-                            fhir_family.confirmation_type = ConfirmationType.objects.get(
-                                code=ext.valueCodeableConcept.coding[0].code)
+                            fhir_family.confirmation_type = ReferenceDataCache.get(
+                                'insuree.ConfirmationType', 'code', ext.valueCodeableConcept.coding[0].code)
+                            if fhir_family.confirmation_type is None:
+                                raise ConfirmationType.DoesNotExist()
                 except:
                     imis_family.confirmation_no = None
                     imis_family.confirmation_type = None
@@ -237,20 +304,21 @@ class GroupConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
     @classmethod
     def _build_extension_address(cls, extension, fhir_family, imis_family, reference_type):
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/group-address"
+        extension.url = FhirFragments.structure_definition_url("group-address")
         family_address = cls.build_fhir_address(imis_family.address, "home", "physical")
         if imis_family.location:
-            family_address.state = imis_family.location.parent.parent.parent.name
-            family_address.district = imis_family.location.parent.parent.name
+            municipality, district, state = LocationConverter.get_location_ancestor_names(imis_family.location, 3)
+            family_address.state = state
+            family_address.district = district
             # municipality extension
             extension_address = Extension.construct()
-            extension_address.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/address-municipality"
-            extension_address.valueString = imis_family.location.parent.name
+            extension_address.url = FhirFragments.structure_definition_url("address-municipality")
+            extension_address.valueString = municipality
             family_address.extension = [extension_address]
 
             # address location reference extension
             extension_address = Extension.construct()
-            extension_address.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/address-location-reference"
+            extension_address.url = FhirFragments.structure_definition_url("address-location-reference")
             extension_address.valueReference = LocationConverter\
                 .build_fhir_resource_reference(imis_family.location, 'Location', reference_type=reference_type)
             family_address.extension.append(extension_address)
@@ -260,7 +328,7 @@ class GroupConverter(BaseFHIRConverter, ReferenceConverterMixin):
     @classmethod
     def _build_extension_group_confirmation(cls, extension, fhir_family, imis_family):
         nested_extension = Extension.construct()
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/group-confirmation"
+        extension.url = FhirFragments.structure_definition_url("group-confirmation")
         if hasattr(imis_family, "confirmation_type") and imis_family.confirmation_type:
             if hasattr(imis_family, "confirmation_no") and imis_family.confirmation_no:
                 # add number extension
@@ -361,7 +429,13 @@ class GroupConverter(BaseFHIRConverter, ReferenceConverterMixin):
     @classmethod
     def _insuree_from_reference(cls, reference):
         from api_fhir_r4.converters import PatientConverter
-        insuree = PatientConverter.get_imis_obj_by_fhir_reference(reference)
+        insuree = None
+        insurees = cls.get_batch_lookup('import_insurees')
+        if insurees is not None:
+            id_parameters = PatientConverter.get_database_query_id_parameteres_from_reference(reference, 'chf_id')
+            insuree = insurees.get(cls._get_import_insuree_key(*next(iter(id_parameters.items()))))
+        if insuree is None:
+            insuree = PatientConverter.get_imis_obj_by_fhir_reference(reference)
         if insuree is None:
             raise FHIRException(f"Invalid Family member reference. "
                                 f"Insuree with identifier `{reference}` does not exist")
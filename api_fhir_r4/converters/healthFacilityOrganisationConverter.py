@@ -8,6 +8,7 @@ from api_fhir_r4.exceptions import FHIRException
 
 from api_fhir_r4.configurations import GeneralConfiguration, R4IdentifierConfig
 from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin, LocationConverter, PersonConverterMixin
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from fhir.resources.R4B.organization import Organization
 from fhir.resources.R4B.organization import OrganizationContact
 from fhir.resources.R4B.extension import Extension
@@ -145,11 +146,25 @@ class HealthFacilityOrganisationConverter(BaseFHIRConverter, PersonConverterMixi
         address_ext.valueReference = address_ref
         return address_ext
 
+    @classmethod
+    def prepare_batch(cls, imis_objs, batch_context):
+        hf_ids = {imis_organisation.id for imis_organisation in imis_objs}
+        if not hf_ids:
+            return
+        claim_admins = {hf_id: [] for hf_id in hf_ids}
+        for admin in ClaimAdmin.objects.filter(health_facility_id__in=hf_ids, validity_to__isnull=True).order_by('id'):
+            claim_admins[admin.health_facility_id].append(admin)
+        batch_context.set('hf_claim_admins', claim_admins)
+
     @classmethod
     def build_contacts(cls, fhir_organisation, imis_organisation):
         contracts = []
-        relevant_claim_admins = ClaimAdmin.objects\
-            .filter(health_facility=imis_organisation, validity_to__isnull=True).distinct()
+        claim_admins = cls.get_batch_lookup('hf_claim_admins')
+        if claim_admins is not None:
+            relevant_claim_admins = claim_admins.get(imis_organisation.id, [])
+        else:
+            relevant_claim_admins = ClaimAdmin.objects\
+                .filter(health_facility=imis_organisation, validity_to__isnull=True).distinct()
 
         for admin in relevant_claim_admins:
             contracts.append(
@@ -187,7 +202,7 @@ class HealthFacilityOrganisationConverter(BaseFHIRConverter, PersonConverterMixi
         if imis_organisation.legal_form:
             legal_form = imis_organisation.legal_form.code
             extension = Extension.construct()
-            extension.url = f'{GeneralConfiguration.get_system_base_url()}StructureDefinition/organization-legal-form'
+            extension.url = FhirFragments.structure_definition_url("organization-legal-form")
             extension.valueCodeableConcept = cls.build_codeable_concept(
                 code=legal_form,
                 system=HealthFacilityOrganizationTypeMapping.LEGAL_FORM_SYSTEM,
@@ -222,7 +237,7 @@ class HealthFacilityOrganisationConverter(BaseFHIRConverter, PersonConverterMixi
             care_type_display = HealthFacilityOrganizationTypeMapping.TYPE_DISPLAY_MAPPING.get(care_type, None)
 
             extension = Extension.construct()
-            extension.url = f'{GeneralConfiguration.get_system_base_url()}StructureDefinition/organization-hf-care-type'
+            extension.url = FhirFragments.structure_definition_url("organization-hf-care-type")
             extension.valueCodeableConcept = cls.build_codeable_concept(
                 code=care_type,
                 system=HealthFacilityOrganizationTypeMapping.TYPE_SYSTEM,
@@ -8,6 +8,7 @@ from fhir.resources.R4B.organization import Organization
 from api_fhir_r4.models.imisModelEnums import ContactPointSystem
 from api_fhir_r4.configurations import R4IdentifierConfig, R4OrganisationConfig, GeneralConfiguration
 from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 
 
 class InsuranceOrganisationConverter(BaseFHIRConverter):
@@ -105,7 +106,7 @@ class InsuranceOrganisationConverter(BaseFHIRConverter):
 
         # municipality extension
         extension = Extension.construct()
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/address-municipality"
+        extension.url = FhirFragments.structure_definition_url("address-municipality")
         extension.valueString = imis_organisation["municipality"]
         address.extension = [extension]
 
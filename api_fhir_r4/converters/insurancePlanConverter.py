@@ -111,6 +111,10 @@ class InsurancePlanConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
     @classmethod
     def build_fhir_status(cls, fhir_insurance_plan, imis_product):
+        fhir_insurance_plan.status = cls.get_fhir_status(imis_product)
+
+    @classmethod
+    def get_fhir_status(cls, imis_product):
         from core import datetime
         now = datetime.datetime.now()
         status = "unknown"
@@ -120,7 +124,7 @@ class InsurancePlanConverter(BaseFHIRConverter, ReferenceConverterMixin):
             status = "active"
         elif now > imis_product.date_to:
             status = "retired"
-        fhir_insurance_plan.status = status
+        return status
 
     @classmethod
     def build_fhir_period(cls, fhir_insurance_plan, imis_product):
@@ -2,6 +2,7 @@ from django.utils.translation import gettext as _
 from django.utils.translation import gettext
 from location.models import Location
 
+from api_fhir_r4.cache import LocationIndex
 from api_fhir_r4.configurations import R4IdentifierConfig, R4LocationConfig
 from api_fhir_r4.converters import BaseFHIRConverter, ReferenceConverterMixin
 from fhir.resources.R4B.location import Location as FHIRLocation
@@ -60,7 +61,26 @@ class LocationConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
     @classmethod
     def get_imis_obj_by_fhir_reference(cls, reference, errors=None):
-        return DbManagerUtils.get_object_or_none(Location, **cls.get_database_query_id_parameteres_from_reference(reference))
+        id_parameters = cls.get_database_query_id_parameteres_from_reference(reference)
+        return LocationIndex.get_location(**id_parameters) \
+            or DbManagerUtils.get_object_or_none(Location, **id_parameters)
+
+    @classmethod
+    def get_location_ancestor_names(cls, imis_location, levels):
+        """
+        Names of the location parents from the nearest one, padded with None up to `levels` items.
+        Parents of active locations are taken from the LocationIndex, without loading them from the database.
+        """
+        node = LocationIndex.get_node(id=imis_location.id) if imis_location.id is not None else None
+        if node is not None:
+            names = [ancestor.name for ancestor in node.ancestors[:levels]]
+        else:
+            names = []
+            parent = imis_location.parent
+            while parent is not None and len(names) < levels:
+                names.append(parent.name)
+                parent = parent.parent
+        return names + [None] * (levels - len(names))
 
     @classmethod
     def build_fhir_location_identifier(cls, fhir_location, imis_location):
@@ -128,45 +148,46 @@ class LocationConverter(BaseFHIRConverter, ReferenceConverterMixin):
     @classmethod
     def build_fhir_part_of(cls, fhir_location, imis_location, reference_type):
         if not cls.__is_highers_level_location(imis_location):
+            parent = LocationIndex.get_node(id=imis_location.parent_id) or imis_location.parent
             fhir_location.partOf = LocationConverter.build_fhir_resource_reference(
-                imis_location.parent,
+                parent,
                 'Location',
-                imis_location.parent.code,
+                parent.code,
                 reference_type=reference_type
             )
 
     def get_location_from_address(cls, fhir_patient_address):
         location_reference_ext = next((
-            ext for ext in fhir_patient_address.extension if 'address-location-reference' in ext.url
-        ))
-        location =  cls.get_imis_obj_by_fhir_reference(location_reference_ext.valueReference)
-        if location is None and location_reference_ext:
-            raise FHIRException(f"Invalid location reference, {location_reference_ext.valueReference} doesn't match any location.")
+            ext for ext in fhir_patient_address.extension or [] if 'address-location-reference' in ext.url
+        ), None)
+        location = None
+        if location_reference_ext:
+            location = cls.get_imis_obj_by_fhir_reference(location_reference_ext.valueReference)
+            if location is None:
+                raise FHIRException(f"Invalid location reference, {location_reference_ext.valueReference} doesn't match any location.")
         if location is None:
-            matching_locations = Location.objects \
-                .filter(
-                    validity_to__isnull=True,
-                    name=address.district,
-                    parent__name=address.state,
-                    type="D"  # HF is expected to be at district level
-                ).distinct()\
-                .all()
+            address = fhir_patient_address
+            matching_locations = LocationIndex.find_nodes(
+                address.district,
+                parent_name=address.state,
+                type="D"  # HF is expected to be at district level
+            )
         
-            if matching_locations.count() != 1:
+            if len(matching_locations) != 1:
                 raise FHIRException(cls.__get_invalid_location_msg(address, matching_locations))
             else:
-                location = matching_locations.first()
+                location = LocationIndex.to_imis_location(matching_locations[0])
         return location
     
     
     @classmethod
     def __get_invalid_location_msg(cls, address, matching_locations):
-        count = matching_locations.count()
+        count = len(matching_locations)
         if count == 0:
             return _(F"No matching location for district {address.district}, state {address.state}.")
         elif count > 1:
             return _(F"More than one matching location district {address.district}, state {address.state}:\n"
-                     F"{matching_locations}.")
+                     F"{[location.code for location in matching_locations]}.")
 
     @classmethod
     def build_imis_parent_location_id(cls, imis_location, fhir_location, errors):
@@ -222,7 +243,7 @@ class LocationConverter(BaseFHIRConverter, ReferenceConverterMixin):
 
     @classmethod
     def __is_highers_level_location(cls, imis_location):
-        return imis_location.parent is None
+        return imis_location.parent_id is None
 
     @classmethod
     def _is_code_reference(cls, location_part_of):
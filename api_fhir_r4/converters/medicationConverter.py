@@ -1,6 +1,7 @@
 from django.utils.translation import gettext as _
 from medical.models import Item
 from api_fhir_r4.converters import R4IdentifierConfig, BaseFHIRConverter, ReferenceConverterMixin
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from api_fhir_r4.models import UsageContextV2 as UsageContext
 from api_fhir_r4.mapping.medicationMapping import ItemTypeMapping, ItemVenueTypeMapping, ItemContextlevel
 from api_fhir_r4.mapping.patientMapping import PatientCategoryMapping
@@ -158,7 +159,7 @@ class MedicationConverter(BaseFHIRConverter, ReferenceConverterMixin):
         display = ItemTypeMapping.item_type[value]
         system = f"{GeneralConfiguration.get_system_base_url()}CodeSystem/medication-item-type"
         coding = cls.build_codeable_concept(code=value, system=system, display=_(display))
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/medication-type"
+        extension.url = FhirFragments.structure_definition_url("medication-type")
         extension.valueCodeableConcept = coding
         return extension
 
@@ -181,7 +182,7 @@ class MedicationConverter(BaseFHIRConverter, ReferenceConverterMixin):
         timing_repeat.period = str(value)
         timing_repeat.periodUnit = 'd'
         timing.repeat = timing_repeat
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/medication-frequency"
+        extension.url = FhirFragments.structure_definition_url("medication-frequency")
         extension.valueTiming = timing
         return extension
 
@@ -233,7 +234,7 @@ class MedicationConverter(BaseFHIRConverter, ReferenceConverterMixin):
     @classmethod
     def build_fhir_use_context(cls, fhir_medication, imis_medication):
         extension = Extension.construct()
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/medication-usage-context"
+        extension.url = FhirFragments.structure_definition_url("medication-usage-context")
         gender = cls.build_fhir_gender(imis_medication)
         # check only the first to be sure if we have list, the
         # next ones for sure will be a part of list of extensions
@@ -405,7 +406,7 @@ class MedicationConverter(BaseFHIRConverter, ReferenceConverterMixin):
     def build_fhir_level(cls, fhir_medication: FHIRMedication, imis_medication: Item):
         coding = cls.build_fhir_mapped_coding(ItemContextlevel.item_context_level_coding)
         extension = Extension(
-            url=f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/medication-level",
+            url=FhirFragments.structure_definition_url("medication-level"),
             valueCodeableConcept=CodeableConcept(
                 coding=[coding],
                 text=coding.display
@@ -5,40 +5,245 @@ from urllib.parse import urlparse
 from django.utils.translation import gettext as _
 from fhir.resources.R4B.address import Address
 
-from insuree.models import Insuree, Gender, Education, Profession, Family, \
-    InsureePhoto, Relation, IdentificationType
+from insuree.models import Insuree, Gender, Family, InsureePhoto, IdentificationType
 from location.models import Location, HealthFacility
+from api_fhir_r4.cache import ReferenceDataCache, LocationIndex
 from api_fhir_r4.configurations import R4IdentifierConfig, GeneralConfiguration, R4MaritalConfig
-from api_fhir_r4.converters import BaseFHIRConverter, PersonConverterMixin, ReferenceConverterMixin
+from api_fhir_r4.converters import BaseFHIRConverter, FhirDictEmitter, PersonConverterMixin, ReferenceConverterMixin
 from api_fhir_r4.converters.groupConverter import GroupConverter
 from api_fhir_r4.converters.locationConverter import LocationConverter
+from api_fhir_r4.converters.fhirFragments import FhirFragments
 from api_fhir_r4.mapping.patientMapping import RelationshipMapping, EducationLevelMapping, \
     PatientProfessionMapping, MaritalStatusMapping, PatientCategoryMapping
 from api_fhir_r4.models.imisModelEnums import ImisMaritalStatus
-from fhir.resources.R4B.patient import Patient, PatientContact
-from fhir.resources.R4B.extension import Extension
-from fhir.resources.R4B.attachment import Attachment
+from fhir.resources.R4B.patient import Patient
 from api_fhir_r4.exceptions import FHIRException
 from api_fhir_r4.utils import TimeUtils, DbManagerUtils
 
 class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConverterMixin):
+    supports_projection = True
+    summary_elements = ('identifier', 'active', 'name', 'telecom', 'gender', 'birthDate', 'deceasedBoolean',
+                        'deceasedDateTime', 'address', 'managingOrganization', 'link')
+
+    @classmethod
+    def to_fhir_obj(cls, imis_insuree, reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE, projection=None):
+        return FhirDictEmitter.construct(Patient, cls.to_fhir_dict(imis_insuree, reference_type, projection))
+
+    @classmethod
+    def to_fhir_dict(cls, imis_insuree, reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE, projection=None):
+        # single description of the Patient read representation, to_fhir_obj builds the models from it
+        fhir_patient = {'resourceType': 'Patient'}
+        resource_id = cls.build_fhir_pk_value(imis_insuree, reference_type)
+        if resource_id is not None:
+            fhir_patient['id'] = resource_id
+        elements = (
+            ('extension', lambda: cls.build_fhir_extension_dicts(imis_insuree, reference_type)),
+            ('identifier', lambda: cls.build_fhir_identifier_dicts(imis_insuree)),
+            ('name', lambda: [cls.build_fhir_names_for_person_dict(imis_insuree)]),
+            ('telecom', lambda: cls.build_fhir_telecom_for_person_dict(phone=imis_insuree.phone,
+                                                                      email=imis_insuree.email)),
+            ('gender', lambda: cls.build_fhir_gender_value(imis_insuree)),
+            ('birthDate', lambda: cls.build_fhir_birth_date_value(imis_insuree)),
+            ('address', lambda: cls.build_fhir_address_dicts(imis_insuree, reference_type)),
+            ('maritalStatus', lambda: cls.build_fhir_marital_status_dict(imis_insuree)),
+            ('photo', lambda: cls.build_fhir_photo_dicts(imis_insuree)),
+            ('contact', lambda: cls.build_fhir_contact_dicts(imis_insuree)),
+            ('generalPractitioner', lambda: cls.build_fhir_general_practitioner_dicts(imis_insuree, reference_type)),
+        )
+        for element, build_value in elements:
+            if cls.is_element_requested(projection, element):
+                value = build_value()
+                if value:
+                    fhir_patient[element] = value
+        return fhir_patient
 
     @classmethod
-    def to_fhir_obj(cls, imis_insuree, reference_type=ReferenceConverterMixin.UUID_REFERENCE_TYPE):
-        fhir_patient = Patient.construct()
-        cls.build_fhir_pk(fhir_patient, imis_insuree, reference_type)
-        cls.build_human_names(fhir_patient, imis_insuree)
-        cls.build_fhir_identifiers(fhir_patient, imis_insuree)
-        cls.build_fhir_birth_date(fhir_patient, imis_insuree)
-        cls.build_fhir_gender(fhir_patient, imis_insuree)
-        cls.build_fhir_marital_status(fhir_patient, imis_insuree)
-        cls.build_fhir_telecom(fhir_patient, imis_insuree)
-        cls.build_fhir_addresses(fhir_patient, imis_insuree, reference_type)
-        cls.build_fhir_extentions(fhir_patient, imis_insuree, reference_type)
-        cls.build_fhir_contact(fhir_patient, imis_insuree)
-        cls.build_fhir_photo(fhir_patient, imis_insuree)
-        cls.build_fhir_general_practitioner(fhir_patient, imis_insuree, reference_type)
-        return fhir_patient
+    def build_fhir_pk_value(cls, imis_insuree, reference_type):
+        if reference_type == ReferenceConverterMixin.UUID_REFERENCE_TYPE:
+            return str(imis_insuree.uuid)
+        elif reference_type == ReferenceConverterMixin.DB_ID_REFERENCE_TYPE:
+            return str(imis_insuree.id)
+        elif reference_type == ReferenceConverterMixin.CODE_REFERENCE_TYPE:
+            return imis_insuree.chf_id
+        return None
+
+    @classmethod
+    def build_fhir_identifier_dicts(cls, imis_insuree):
+        cls._validate_imis_identifier_code(imis_insuree)
+        identifier_type_system = R4IdentifierConfig.get_fhir_identifier_type_system()
+        identifiers = [
+            cls.build_fhir_identifier_dict(
+                imis_insuree.uuid, identifier_type_system, R4IdentifierConfig.get_fhir_uuid_type_code()),
+            cls.build_fhir_identifier_dict(
+                imis_insuree.chf_id, identifier_type_system, R4IdentifierConfig.get_fhir_generic_type_code())
+        ]
+        if getattr(imis_insuree, "type_of_id", None) is None and imis_insuree.passport:
+            identifiers.append(cls.build_fhir_identifier_dict(
+                imis_insuree.passport, identifier_type_system, R4IdentifierConfig.get_fhir_passport_type_code()))
+        return identifiers
+
+    @classmethod
+    def build_fhir_birth_date_value(cls, imis_insuree):
+        from core import datetime
+        if isinstance(imis_insuree.dob, datetime.datetime):
+            return imis_insuree.dob.date().isoformat()
+        return imis_insuree.dob.isoformat()
+
+    @classmethod
+    def build_fhir_gender_value(cls, imis_insuree):
+        if not imis_insuree.gender:
+            return "unknown"
+        code = imis_insuree.gender.code
+        if code == GeneralConfiguration.get_male_gender_code():
+            return "male"
+        elif code == GeneralConfiguration.get_female_gender_code():
+            return "female"
+        elif code == GeneralConfiguration.get_other_gender_code():
+            return "other"
+        return None
+
+    @classmethod
+    def build_fhir_marital_status_dict(cls, imis_insuree):
+        if not imis_insuree.marital:
+            return None
+        return FhirFragments.codeable_concept_dict(
+            code=imis_insuree.marital,
+            system=R4MaritalConfig.get_fhir_marital_status_system(),
+            display=MaritalStatusMapping.marital_status[imis_insuree.marital]
+        )
+
+    @classmethod
+    def build_fhir_address_dicts(cls, imis_insuree, reference_type):
+        if imis_insuree.current_village:
+            address = cls.__build_address_dict(
+                imis_insuree.current_village, 'temp', imis_insuree.current_address, reference_type)
+        elif imis_insuree.family and imis_insuree.family.location:
+            address = cls.__build_address_dict(
+                imis_insuree.family.location, 'home', imis_insuree.family.address, reference_type)
+        else:
+            return []
+
+        missing = [name for name in ('city', 'district', 'state') if not address.get(name)]
+        if missing:
+            raise FHIRException(json.dumps({0: [f"Address '{name}' field required" for name in missing]}))
+        return [address]
+
+    @classmethod
+    def __build_address_dict(cls, location, use, location_text, reference_type):
+        municipality, district, state = LocationConverter.get_location_ancestor_names(location, 3)
+        municipality_extension = {'url': FhirFragments.structure_definition_url("address-municipality")}
+        if municipality is not None:
+            municipality_extension['valueString'] = municipality
+        address = {
+            'extension': [
+                municipality_extension,
+                {
+                    'url': FhirFragments.structure_definition_url("address-location-reference"),
+                    'valueReference': LocationConverter.build_fhir_resource_reference_dict(
+                        location, 'Location', reference_type=reference_type)
+                }
+            ],
+            'use': use,
+            'type': 'physical',
+            'text': location_text or None,
+            'city': location.name,
+            'district': district,
+            'state': state,
+        }
+        return {key: value for key, value in address.items() if value is not None}
+
+    @classmethod
+    def build_fhir_extension_dicts(cls, imis_insuree, reference_type):
+        extensions = []
+        if imis_insuree.head is not None:
+            extensions.append({
+                'url': FhirFragments.structure_definition_url("patient-is-head"),
+                'valueBoolean': imis_insuree.head
+            })
+        if imis_insuree.education is not None:
+            EducationLevelMapping.load()
+            extensions.append({
+                'url': FhirFragments.structure_definition_url("patient-education-level"),
+                'valueCodeableConcept': FhirFragments.codeable_concept_dict(
+                    code=str(imis_insuree.education.id),
+                    system="CodeSystem/patient-education-level",
+                    display=EducationLevelMapping.education_level[str(imis_insuree.education.id)]
+                )
+            })
+        if imis_insuree.profession is not None:
+            PatientProfessionMapping.load()
+            extensions.append({
+                'url': FhirFragments.structure_definition_url("patient-profession"),
+                'valueCodeableConcept': FhirFragments.codeable_concept_dict(
+                    code=str(imis_insuree.profession.id),
+                    system="CodeSystem/patient-profession",
+                    display=PatientProfessionMapping.patient_profession[str(imis_insuree.profession.id)]
+                )
+            })
+        if imis_insuree.card_issued is not None:
+            extensions.append({
+                'url': FhirFragments.structure_definition_url("patient-card-issued"),
+                'valueBoolean': imis_insuree.card_issued
+            })
+        if imis_insuree.family is not None:
+            extensions.append({
+                'url': FhirFragments.structure_definition_url("patient-group-reference"),
+                'valueReference': GroupConverter.build_fhir_resource_reference_dict(
+                    imis_insuree.family, 'Group', reference_type=reference_type)
+            })
+        if imis_insuree.type_of_id is not None and imis_insuree.passport is not None:
+            extension = {'url': FhirFragments.structure_definition_url("patient-identification")}
+            if imis_insuree.type_of_id and imis_insuree.passport:
+                nested_type_extension = {
+                    'url': "type",
+                    'valueCodeableConcept': FhirFragments.codeable_concept_dict(
+                        code=imis_insuree.type_of_id.code, system="CodeSystem/patient-identification-type")
+                }
+                extension = {
+                    'extension': [{'url': "number", 'valueString': imis_insuree.passport}, nested_type_extension],
+                    **extension
+                }
+            extensions.append(extension)
+        return extensions
+
+    @classmethod
+    def build_fhir_contact_dicts(cls, imis_insuree):
+        if imis_insuree.relationship is None or imis_insuree.family is None \
+                or imis_insuree.family.head_insuree is None:
+            return []
+        RelationshipMapping.load()
+        relationship = FhirFragments.codeable_concept_dict(
+            code=imis_insuree.relationship.id,
+            system="CodeSystem/patient-contact-relationship",
+            display=RelationshipMapping.relationship[str(imis_insuree.relationship.id)]
+        )
+        return [{
+            'relationship': [relationship],
+            'name': cls.build_fhir_names_for_person_dict(imis_insuree)
+        }]
+
+    @classmethod
+    def build_fhir_photo_dicts(cls, imis_insuree):
+        if not (imis_insuree.photo and imis_insuree.photo.folder and imis_insuree.photo.filename):
+            return []
+        # HOST is taken from global variable used in the docker initialization
+        # If URL root is not explicitly given in the settings 'localhost' is used
+        domain = GeneralConfiguration.get_host_domain().split('http://')[1] or 'localhost'
+        filename = imis_insuree.photo.filename
+        return [{
+            'contentType': filename[filename.rfind('.') + 1:],
+            'url': urllib.parse.urlunparse(('http', domain, cls.__build_photo_uri(imis_insuree), None, None, None)),
+            'title': filename,
+            'creation': imis_insuree.photo.date.isoformat()
+        }]
+
+    @classmethod
+    def build_fhir_general_practitioner_dicts(cls, imis_insuree, reference_type):
+        from api_fhir_r4.converters import HealthFacilityOrganisationConverter
+        if not imis_insuree.health_facility:
+            return []
+        return [HealthFacilityOrganisationConverter.build_fhir_resource_reference_dict(
+            imis_insuree.health_facility, 'Organization', reference_type=reference_type)]
 
     @classmethod
     def to_imis_obj(cls, fhir_patient, audit_user_id):
@@ -60,11 +265,28 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
         return imis_insuree
 
     @classmethod
-    def build_fhir_pk(cls, fhir_patient, resource, reference_type: str = None):
-        if reference_type == ReferenceConverterMixin.CODE_REFERENCE_TYPE:
-            fhir_patient.id = resource.chf_id
-        else:
-            super().build_fhir_pk(fhir_patient, resource, reference_type)
+    def prepare_import_batch(cls, fhir_dicts, batch_context):
+        family_uuids = set()
+        hf_uuids = set()
+        for fhir_patient in fhir_dicts:
+            for extension in fhir_patient.get('extension') or []:
+                if "/StructureDefinition/patient-group-reference" in (extension.get('url') or ''):
+                    family_uuids.add(GroupConverter.get_resource_id_from_reference_dict(
+                        extension.get('valueReference')))
+            for general_practitioner in fhir_patient.get('generalPractitioner') or []:
+                hf_uuids.add(cls.get_resource_id_from_reference_dict(general_practitioner))
+        family_uuids.discard(None)
+        hf_uuids.discard(None)
+        # objects not found here are looked up one by one, with the error reporting of the single conversion
+        batch_context.set('import_families', {
+            family.uuid: family for family in Family.objects
+            .filter(uuid__in=family_uuids, validity_to__isnull=True)
+            .select_related('location')
+        } if family_uuids else {})
+        batch_context.set('import_health_facilities', {
+            health_facility.uuid: health_facility for health_facility in HealthFacility.objects
+            .filter(uuid__in=hf_uuids, validity_to__isnull=True)
+        } if hf_uuids else {})
 
     @classmethod
     def get_fhir_code_identifier_type(cls):
@@ -86,34 +308,39 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
     def build_imis_extentions(cls, imis_insuree, fhir_patient, errors):
         cls._validate_fhir_extension_is_exist(fhir_patient)
         for extension in fhir_patient.extension:
-            if extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-is-head":
+            if extension.url == FhirFragments.structure_definition_url("patient-is-head"):
                 imis_insuree.head = extension.valueBoolean
 
-            elif extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-education-level":
+            elif extension.url == FhirFragments.structure_definition_url("patient-education-level"):
                 try:
-                    imis_insuree.education = Education.objects.get(id=extension.valueCodeableConcept.coding[0].code)
+                    imis_insuree.education = ReferenceDataCache.get(
+                        'insuree.Education', 'id', extension.valueCodeableConcept.coding[0].code)
                 except Exception:
                     imis_insuree.education = None
 
-            elif extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-profession":
+            elif extension.url == FhirFragments.structure_definition_url("patient-profession"):
                 try:
-                    imis_insuree.profession = Profession.objects.get(id=extension.valueCodeableConcept.coding[0].code)
+                    imis_insuree.profession = ReferenceDataCache.get(
+                        'insuree.Profession', 'id', extension.valueCodeableConcept.coding[0].code)
                 except Exception:
                     imis_insuree.profession = None
 
-            elif extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-card-issued":
+            elif extension.url == FhirFragments.structure_definition_url("patient-card-issued"):
                 try:
                     imis_insuree.card_issued = extension.valueBoolean
                 except Exception:
                     imis_insuree.card_issued = False
 
-            elif extension.url == f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-identification":
+            elif extension.url == FhirFragments.structure_definition_url("patient-identification"):
                 try:
                     for ext in extension.extension:
                         if ext.url == "number":
                             imis_insuree.passport = ext.valueString
                         if ext.url == "type":
-                            imis_insuree.type_of_id = IdentificationType.objects.get(code=ext.valueCodeableConcept.coding[0].code)
+                            imis_insuree.type_of_id = ReferenceDataCache.get(
+                                'insuree.IdentificationType', 'code', ext.valueCodeableConcept.coding[0].code)
+                            if imis_insuree.type_of_id is None:
+                                raise IdentificationType.DoesNotExist()
                 except Exception:
                     imis_insuree.passport = None
                     imis_insuree.type_of_id = None
@@ -146,14 +373,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
         imis_insuree.audit_user_id = audit_user_id
         return imis_insuree
 
-    @classmethod
-    def build_human_names(cls, fhir_patient, imis_insuree):
-        name = cls.build_fhir_names_for_person(imis_insuree)
-        if type(fhir_patient.name) is not list:
-            fhir_patient.name = [name]
-        else:
-            fhir_patient.name.append(name)
-
     @classmethod
     def build_imis_names(cls, imis_insuree, fhir_patient, errors):
         cls._validate_fhir_patient_human_name(fhir_patient)
@@ -161,15 +380,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
         imis_insuree.last_name, imis_insuree.other_names = cls.build_imis_last_and_other_name(names)
         cls._validate_imis_insuree_human_name(imis_insuree)
 
-    @classmethod
-    def build_fhir_identifiers(cls, fhir_patient, imis_insuree):
-        identifiers = []
-        cls._validate_imis_identifier_code(imis_insuree)
-        cls.build_all_identifiers(identifiers, imis_insuree)
-        cls.build_fhir_passport_identifier(identifiers, imis_insuree)
-        fhir_patient.identifier = identifiers
-        cls._validate_fhir_identifier_is_exist(fhir_patient)
-
     @classmethod
     def build_fhir_code_identifier(cls, identifiers, imis_object: Insuree):
         # Patient don't have code so chfid is used instead as code identifier
@@ -194,35 +404,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
         if passport := cls.get_fhir_identifier_by_code(insuree_ids, R4IdentifierConfig.get_fhir_passport_type_code()):
             imis_insuree.passport = passport
 
-    @classmethod
-    def build_fhir_chfid_identifier(cls, identifiers, imis_insuree):
-        cls._validate_imis_identifier_code(imis_insuree)
-        identifier = cls.build_fhir_identifier(
-            imis_insuree.chf_id,
-            R4IdentifierConfig.get_fhir_identifier_type_system(),
-            R4IdentifierConfig.get_fhir_generic_type_code()
-        )
-        identifiers.append(identifier)
-
-    @classmethod
-    def build_fhir_passport_identifier(cls, identifiers, imis_insuree):
-        if hasattr(imis_insuree, "type_of_id") and imis_insuree.type_of_id is not None:
-            pass  # TODO typeofid isn't provided, this section should contain logic used to create passport field based on typeofid
-        elif imis_insuree.passport:
-            identifier = cls.build_fhir_identifier(imis_insuree.passport,
-                                                   R4IdentifierConfig.get_fhir_identifier_type_system(),
-                                                   R4IdentifierConfig.get_fhir_passport_type_code())
-            identifiers.append(identifier)
-
-    @classmethod
-    def build_fhir_birth_date(cls, fhir_patient, imis_insuree):
-        from core import datetime
-        # check if datetime object
-        if isinstance(imis_insuree.dob, datetime.datetime):
-            fhir_patient.birthDate = str(imis_insuree.dob.date().isoformat())
-        else:
-            fhir_patient.birthDate = str(imis_insuree.dob.isoformat())
-        
     @classmethod
     def build_imis_family(cls, imis_insuree, fhir_patient, errors):
         # Get UUID from patient group reference related extension
@@ -249,11 +430,10 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
                         for coding in relationship.coding:
                             if "CodeSystem/patient-contact-relationship" in coding.system:
                                 relationship_name = coding.display
-                    try:
-                        relation = Relation.objects.get(relation=relationship_name)
+                    relation = ReferenceDataCache.get('insuree.Relation', 'relation', relationship_name) \
+                        if relationship_name else None
+                    if relation is not None:
                         imis_insuree.relationship = relation
-                    except:
-                        pass
     
     @classmethod
     def build_imis_birth_date(cls, imis_insuree, fhir_patient, errors):
@@ -261,19 +441,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
         if not cls.valid_condition(birth_date is None, _('Missing patient `birthDate` attribute'), errors):
             imis_insuree.dob = TimeUtils.str_to_date(birth_date)
 
-    @classmethod
-    def build_fhir_gender(cls, fhir_patient, imis_insuree):
-        if imis_insuree.gender:
-            code = imis_insuree.gender.code
-            if code == GeneralConfiguration.get_male_gender_code():
-                fhir_patient.gender = "male"
-            elif code == GeneralConfiguration.get_female_gender_code():
-                fhir_patient.gender = "female"
-            elif code == GeneralConfiguration.get_other_gender_code():
-                fhir_patient.gender = "other"
-        else:
-            fhir_patient.gender = "unknown"
-
     @classmethod
     def build_imis_gender(cls, imis_insuree, fhir_patient):
         gender = fhir_patient.gender
@@ -282,16 +449,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
             imis_gender = PatientCategoryMapping.imis_gender_mapping.get(gender)
             imis_insuree.gender = imis_gender
 
-    @classmethod
-    def build_fhir_marital_status(cls, fhir_patient, imis_insuree):
-        if imis_insuree.marital:
-            display = MaritalStatusMapping.marital_status[imis_insuree.marital]
-            fhir_patient.maritalStatus = \
-                cls.build_codeable_concept(code=imis_insuree.marital,
-                                           system=R4MaritalConfig.get_fhir_marital_status_system())
-            if len(fhir_patient.maritalStatus.coding) == 1:
-                fhir_patient.maritalStatus.coding[0].display = display
-
     @classmethod
     def build_imis_marital(cls, imis_insuree, fhir_patient):
         marital_status = fhir_patient.maritalStatus
@@ -310,29 +467,10 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
                     elif code == R4MaritalConfig.get_fhir_unknown_marital_status_code():
                         imis_insuree.marital = ImisMaritalStatus.NOT_SPECIFIED.value
 
-    @classmethod
-    def build_fhir_telecom(cls, fhir_patient, imis_insuree):
-        fhir_patient.telecom = cls.build_fhir_telecom_for_person(phone=imis_insuree.phone, email=imis_insuree.email)
-
     @classmethod
     def build_imis_contacts(cls, imis_insuree, fhir_patient):
         imis_insuree.phone, imis_insuree.email = cls.build_imis_phone_num_and_email(fhir_patient.telecom)
 
-    @classmethod
-    def build_fhir_addresses(cls, fhir_patient, imis_insuree, reference_type):
-        addresses = []
-
-        # If family doesn't have location assigned then use family location
-        if imis_insuree.current_village:
-            insuree_address = cls._build_insuree_address(imis_insuree, reference_type)
-            addresses.append(insuree_address)
-        elif imis_insuree.family and imis_insuree.family.location:
-            family_address = cls._build_insuree_family_address(imis_insuree.family, reference_type)
-            addresses.append(family_address)
-
-        fhir_patient.address = addresses
-        cls._validate_fhir_address_details(fhir_patient.address)
-
     @classmethod
     def build_imis_addresses(cls, imis_insuree, fhir_patient):
         cls._validate_fhir_address_details(fhir_patient.address)
@@ -371,118 +509,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
         if fhir_address.text:
             imis_insuree.family_address = fhir_address.text
 
-    @classmethod
-    def build_fhir_extentions(cls, fhir_patient, imis_insuree, reference_type):
-        fhir_patient.extension = []
-
-        def build_extension(fhir_patient, imis_insuree, value):
-            extension = Extension.construct()
-            if value == "head":
-                extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-is-head"
-                extension.valueBoolean = imis_insuree.head
-
-            elif value == "education.education":
-                extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-education-level"
-                if hasattr(imis_insuree, "education") and imis_insuree.education is not None:
-                    EducationLevelMapping.load()
-                    display = EducationLevelMapping.education_level[str(imis_insuree.education.id)]
-                    system = "CodeSystem/patient-education-level"
-                    extension.valueCodeableConcept = cls.build_codeable_concept(code=str(imis_insuree.education.id), system=system)
-                    if len(extension.valueCodeableConcept.coding) == 1:
-                        extension.valueCodeableConcept.coding[0].display = display
-
-            elif value == "patient.card.issue":
-                extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-card-issued"
-                extension.valueBoolean = imis_insuree.card_issued
-
-            elif value == "patient.group.reference":
-                extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-group-reference"
-                extension.valueReference = GroupConverter\
-                    .build_fhir_resource_reference(imis_insuree.family, 'Group', reference_type=reference_type)
-
-            elif value == "patient.identification":
-                nested_extension = Extension.construct()
-                extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-identification"
-                if hasattr(imis_insuree, "type_of_id") and imis_insuree.type_of_id:
-                    if hasattr(imis_insuree, "passport") and imis_insuree.passport:
-                        # add number extension
-                        nested_extension.url = "number"
-                        nested_extension.valueString = imis_insuree.passport
-                        extension.extension = [nested_extension]
-                        # add identifier extension
-                        nested_extension = Extension.construct()
-                        nested_extension.url = "type"
-                        system = "CodeSystem/patient-identification-type"
-                        nested_extension.valueCodeableConcept = cls.build_codeable_concept(code=imis_insuree.type_of_id.code, system=system)
-                        extension.extension.append(nested_extension)
-
-            else:
-                extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/patient-profession"
-                if hasattr(imis_insuree, "profession") and imis_insuree.profession is not None:
-                    PatientProfessionMapping.load()
-                    display = PatientProfessionMapping.patient_profession[str(imis_insuree.profession.id)]
-                    system = "CodeSystem/patient-profession"
-                    extension.valueCodeableConcept = cls.build_codeable_concept(code=str(imis_insuree.profession.id), system=system)
-                    if len(extension.valueCodeableConcept.coding) == 1:
-                        extension.valueCodeableConcept.coding[0].display = display
-
-            if type(fhir_patient.extension) is not list:
-                fhir_patient.extension = [extension]
-            else:
-                fhir_patient.extension.append(extension)
-
-
-        if imis_insuree.head is not None:
-            build_extension(fhir_patient, imis_insuree, "head")
-        if imis_insuree.education is not None:
-            build_extension(fhir_patient, imis_insuree, "education.education")
-        if imis_insuree.profession is not None:
-            build_extension(fhir_patient, imis_insuree, "profession.profession")
-        if imis_insuree.card_issued is not None:
-            build_extension(fhir_patient, imis_insuree, "patient.card.issue")
-        if imis_insuree.family is not None:
-            build_extension(fhir_patient, imis_insuree, "patient.group.reference")
-        if imis_insuree.type_of_id is not None and imis_insuree.passport is not None:
-            build_extension(fhir_patient, imis_insuree, "patient.identification")
-
-    @classmethod
-    def build_fhir_contact(cls, fhir_patient, imis_insuree):
-        fhir_contact = PatientContact.construct()
-        if imis_insuree.relationship is not None and imis_insuree.family is not None \
-                and imis_insuree.family.head_insuree is not None:
-            system = "CodeSystem/patient-contact-relationship"
-            # map to the fhir value from imis one
-            RelationshipMapping.load()
-            display = RelationshipMapping.relationship[str(imis_insuree.relationship.id)]
-            fhir_contact.relationship = [cls.build_codeable_concept(code=imis_insuree.relationship.id, system=system)]
-            fhir_contact.relationship[0].coding[0].display = display
-            fhir_contact.name = cls.build_fhir_names_for_person(imis_insuree)
-
-            if type(fhir_patient.contact) is not list:
-                fhir_patient.contact = [fhir_contact]
-            else:
-                fhir_patient.contact.append(fhir_contact)
-
-    @classmethod
-    def build_fhir_photo(cls, fhir_patient, imis_insuree):
-        if imis_insuree.photo and imis_insuree.photo.folder and imis_insuree.photo.filename:
-            # HOST is taken from global variable used in the docker initialization
-            # If URL root is not explicitly given in the settings 'localhost' is used
-            # (if value is empty validation exception is raised).
-            abs_url = GeneralConfiguration.get_host_domain().split('http://')[1] or 'localhost'
-            domain = abs_url
-            photo_uri = cls.__build_photo_uri(imis_insuree)
-            photo = Attachment.construct()
-            parsed = urllib.parse.urlunparse(('http', domain, photo_uri, None, None, None))
-            photo.url = parsed
-            photo.creation = imis_insuree.photo.date.isoformat()
-            photo.contentType = imis_insuree.photo.filename[imis_insuree.photo.filename.rfind('.') + 1:]
-            photo.title = imis_insuree.photo.filename
-            if type(fhir_patient.photo) is not list:
-                fhir_patient.photo = [photo]
-            else:
-                fhir_patient.photo.append(photo)
-
     @classmethod
     def build_imis_photo(cls, imis_insuree, fhir_patient, errors):
         if fhir_patient.photo and len(fhir_patient.photo) > 0:
@@ -502,17 +528,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
                     )
                 imis_insuree.photo_id = obj.id
 
-    @classmethod
-    def build_fhir_general_practitioner(cls, fhir_patient, imis_insuree, reference_type):
-        from api_fhir_r4.converters import HealthFacilityOrganisationConverter
-        if imis_insuree.health_facility:
-            hf = HealthFacilityOrganisationConverter.build_fhir_resource_reference(
-                imis_insuree.health_facility,
-                'Organization',
-                reference_type=reference_type
-            )
-            fhir_patient.generalPractitioner = [hf]
-
     @classmethod
     def build_imis_general_practitioner(cls, imis_insuree, fhir_patient):
         if not fhir_patient.generalPractitioner:
@@ -522,6 +537,10 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
             raise FHIRException(_("Patient can provide at most one general practitioner."))
 
         hf_uuid = cls.get_resource_id_from_reference(fhir_patient.generalPractitioner[0])
+        health_facilities = cls.get_batch_lookup('import_health_facilities')
+        if health_facilities is not None and hf_uuid in health_facilities:
+            imis_insuree.health_facility = health_facilities[hf_uuid]
+            return
         try:
             health_facility = HealthFacility.objects.get(uuid=hf_uuid)
             imis_insuree.health_facility = health_facility
@@ -557,13 +576,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
         path = f'/photo/{photo_full_path}'
         return path
 
-    @classmethod
-    def _validate_fhir_identifier_is_exist(cls, fhir_patient):
-        if not fhir_patient.identifier or len(fhir_patient.identifier) == 0:
-            raise FHIRException(
-                _('FHIR Patient entity without identifier')
-            )
-
     # fhir validations
     @classmethod
     def _validate_fhir_extension_is_exist(cls, fhir_patient):
@@ -680,7 +692,7 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
             if "StructureDefinition/address-location-reference" in ext.url:
                 location_uuid = LocationConverter.get_resource_id_from_reference(ext.valueReference)
                 try:
-                    location = Location.objects.get(uuid=location_uuid)
+                    location = LocationIndex.get_location(uuid=location_uuid) or Location.objects.get(uuid=location_uuid)
                     imis_insuree.current_village = location
                 except Location.DoesNotExist as e:
                     raise FHIRException(f"Invalid location reference, {location_uuid} doesn't match any location.")
@@ -689,76 +701,6 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
     def __add_insuree_geolocation(cls, imis_insuree, address):
         imis_insuree.geolocation = address.text
 
-    @classmethod
-    def _build_insuree_family_address(cls, imis_insuree_family: Family, reference_type):
-        return cls.__build_address_of_use(
-            address_location=imis_insuree_family.location,
-            use='home',
-            location_text=imis_insuree_family.address,
-            reference_type=reference_type
-        )
-
-    @classmethod
-    def _build_insuree_address(cls, imis_insuree, reference_type):
-        return cls.__build_address_of_use(
-            address_location=imis_insuree.current_village,
-            use='temp',
-            location_text=imis_insuree.current_address,
-            reference_type=reference_type
-        )
-
-    @classmethod
-    def __build_address_of_use(cls, address_location: Location, use: str, location_text: str, reference_type):
-        base_address = cls.__build_base_physical_address(address_location, reference_type)
-        base_address.use = use
-        if location_text:
-            base_address.text = location_text
-        return base_address
-
-    @classmethod
-    def __build_base_physical_address(cls, imis_village_location, reference_type) -> Address:
-        return Address(**{
-            "type": "physical",
-            "state": cls.__state_name_from_physical_location(imis_village_location),
-            "district": cls.__district_name_from_physical_location(imis_village_location),
-            "city": cls.__village_name_from_physical_location(imis_village_location),
-            "extension": [
-                cls.__build_municipality_extension(imis_village_location),
-                cls.__build_location_reference_extension(imis_village_location, reference_type)
-            ]
-        })
-
-    @classmethod
-    def __build_municipality_extension(cls, insuree_family_location):
-        extension = Extension.construct()
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/address-municipality"
-        extension.valueString = cls.__municipality_from_family_location(insuree_family_location)
-        return extension
-
-    @classmethod
-    def __state_name_from_physical_location(cls, insuree_family_location):
-        return insuree_family_location.parent.parent.parent.name
-
-    @classmethod
-    def __district_name_from_physical_location(cls, insuree_family_location):
-        return insuree_family_location.parent.parent.name
-
-    @classmethod
-    def __municipality_from_family_location(cls, insuree_family_location):
-        return insuree_family_location.parent.name
-
-    @classmethod
-    def __village_name_from_physical_location(cls, insuree_family_location):
-        return insuree_family_location.name
-
-    @classmethod
-    def __build_location_reference_extension(cls, insuree_family_location, reference_type):
-        extension = Extension.construct()
-        extension.url = f"{GeneralConfiguration.get_system_base_url()}StructureDefinition/address-location-reference"
-        extension.valueReference = LocationConverter \
-            .build_fhir_resource_reference(insuree_family_location, 'Location', reference_type=reference_type)
-        return extension
-
     @classmethod
     def __build_imis_family_address(cls, fhir_patient):
         family_address = cls.__get_family_address_from_fhir_patient(fhir_patient)
@@ -796,6 +738,9 @@ class PatientConverter(BaseFHIRConverter, PersonConverterMixin, ReferenceConvert
     def __get_family_from_fhir_patient_extension(cls, fhir_patient):
         if not (family_uuid := cls.__get_family_uuid_from_fhir_patient(fhir_patient)):
             return None
+        families = cls.get_batch_lookup('import_families')
+        if families is not None and family_uuid in families:
+            return families[family_uuid]
 
         try:
             return Family.objects.select_related('location').get(uuid=family_uuid)
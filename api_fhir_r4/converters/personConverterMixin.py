@@ -19,6 +19,16 @@ class PersonConverterMixin(object):
         name.given = [person_obj.other_names]
         return name
 
+    @classmethod
+    def build_fhir_names_for_person_dict(cls, person_obj):
+        if not hasattr(person_obj, 'last_name') and not hasattr(person_obj, 'other_names'):
+            raise FHIRRequestProcessException([gettext('Missing `last_name` and `other_names` for IMIS object')])
+        name = {'use': 'usual'}
+        if person_obj.last_name is not None:
+            name['family'] = person_obj.last_name
+        name['given'] = [person_obj.other_names]
+        return name
+
     @classmethod
     def build_imis_last_and_other_name(cls, names):
         last_name = None
@@ -44,6 +54,17 @@ class PersonConverterMixin(object):
             telecom.append(email)
         return telecom
 
+    @classmethod
+    def build_fhir_telecom_for_person_dict(cls, phone=None, email=None):
+        telecom = []
+        if phone:
+            telecom.append(
+                BaseFHIRConverter.build_fhir_contact_point_dict(phone, ContactPointSystem.PHONE, ContactPointUse.HOME))
+        if email:
+            telecom.append(
+                BaseFHIRConverter.build_fhir_contact_point_dict(email, ContactPointSystem.EMAIL, ContactPointUse.HOME))
+        return telecom
+
     @classmethod
     def build_imis_phone_num_and_email(cls, telecom):
         phone = None
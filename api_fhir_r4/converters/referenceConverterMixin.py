@@ -3,6 +3,7 @@ import logging
 
 from typing import Tuple
 import uuid
+from api_fhir_r4.converters.fhirDictEmitter import FhirDictEmitter
 from api_fhir_r4.exceptions import FHIRRequestProcessException
 from fhir.resources.R4B.reference import Reference
 
@@ -52,11 +53,26 @@ class ReferenceConverterMixin(object):
 
             return reference
 
+    @classmethod
+    def build_fhir_resource_reference_dict(cls, obj, type=None, display=None, reference_type=UUID_REFERENCE_TYPE):
+        return FhirDictEmitter.emit(
+            cls.build_fhir_resource_reference(obj, type=type, display=display, reference_type=reference_type))
+
     @classmethod
     def get_resource_id_from_reference(cls, reference):
         _, resource_id, _ = cls._get_type_and_id_from_reference(reference)
         return resource_id
 
+    @classmethod
+    def get_resource_id_from_reference_dict(cls, reference):
+        """
+        Resource id of a reference given as dict (part of a resource not parsed yet), None if it's not valid.
+        """
+        try:
+            return cls.get_resource_id_from_reference(Reference(**reference)) if reference else None
+        except (FHIRRequestProcessException, ValueError):
+            return None
+
     @classmethod
     def get_resource_type_from_reference(cls, reference):
         path, _, _ = cls._get_type_and_id_from_reference(reference)
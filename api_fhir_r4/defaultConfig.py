@@ -13,6 +13,14 @@ DEFAULT_CFG = {
     "default_response_page_size": 10,
     "claim_rule_engine_validation": True,
     "subscribe_insuree_signal": False,
+    "fast_emit": False,
+    "reference_data_cache_ttl": 600,
+    "reference_data_cache_backend": None,
+    "shared_cache_backend": "default",
+    "model_version_check_interval": 5,
+    "rendered_resource_cache_ttl": 600,
+    "async_job_root_path": None,
+    "async_job_workers": 2,
     "R4_fhir_identifier_type_config": {
         "system": "https://openimis.github.io/openimis_fhir_r4_ig/CodeSystem/openimis-identifiers",
         "fhir_code_for_imis_db_uuid_type": "UUID",
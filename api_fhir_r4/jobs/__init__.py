@@ -0,0 +1,4 @@
+from api_fhir_r4.jobs.asyncJob import AsyncJob, AsyncJobRunner, AsyncJobCancelled
+from api_fhir_r4.jobs.bulkExport import BulkExportService
+from api_fhir_r4.jobs.bulkImport import BulkImportService
+from api_fhir_r4.jobs.claimSubmit import ClaimSubmitJob
@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import pathlib
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from django.db import connections
+from django.utils import timezone
+
+from api_fhir_r4.configurations import GeneralConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncJobCancelled(Exception):
+    pass
+
+
+class AsyncJob(object):
+    """
+    State of a long running request processed in the background. The state is kept in `job.json` in the job
+    directory (under `async_job_root_path`), next to the files produced by the job, so it can be polled from any
+    worker sharing the storage.
+    """
+    IN_PROGRESS = 'in-progress'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    STATE_FILE = 'job.json'
+    __JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+    def __init__(self, job_id, kind, user_id, request_url, status=IN_PROGRESS, transaction_time=None,
+                 progress=None, result=None, error=None):
+        self.id = job_id
+        self.kind = kind
+        self.user_id = user_id
+        self.request_url = request_url
+        self.status = status
+        self.transaction_time = transaction_time
+        self.progress = progress
+        self.result = result or {}
+        self.error = error
+
+    @classmethod
+    def new(cls, kind, user_id, request_url):
+        """
+        Job with its id allocated but nothing stored yet, `start()` has to be called before it can be polled.
+        """
+        return cls(uuid4().hex, kind, user_id, request_url, transaction_time=timezone.now().isoformat())
+
+    @classmethod
+    def create(cls, kind, user_id, request_url):
+        job = cls.new(kind, user_id, request_url)
+        job.start()
+        return job
+
+    def start(self):
+        pathlib.Path(self.directory).mkdir(parents=True)
+        self.save()
+
+    @classmethod
+    def load(cls, job_id):
+        if not cls.__JOB_ID.match(str(job_id)):
+            return None
+        try:
+            with open(os.path.join(cls.get_root_path(), job_id, cls.STATE_FILE)) as file:
+                return cls(**json.load(file))
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def get_root_path(cls):
+        return GeneralConfiguration.get_async_job_root_path() \
+            or os.path.join(tempfile.gettempdir(), 'openimis-fhir-jobs')
+
+    @property
+    def directory(self):
+        return os.path.join(self.get_root_path(), self.id)
+
+    def get_file_path(self, file_name):
+        return os.path.join(self.directory, os.path.basename(file_name))
+
+    def is_cancelled(self):
+        return not os.path.isdir(self.directory)
+
+    def save(self):
+        if self.is_cancelled():
+            return
+        # written to a temporary file first, pollers never read a partially written state
+        temp_path = self.get_file_path(f'{self.STATE_FILE}.{uuid4().hex}')
+        with open(temp_path, 'w') as file:
+            json.dump(self.to_dict(), file)
+        os.replace(temp_path, self.get_file_path(self.STATE_FILE))
+
+    def set_progress(self, progress):
+        """
+        Store the progress and raise AsyncJobCancelled if the job has been deleted in the meantime.
+        """
+        if self.is_cancelled():
+            raise AsyncJobCancelled(self.id)
+        self.progress = progress
+        self.save()
+
+    def delete(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'user_id': self.user_id,
+            'request_url': self.request_url,
+            'status': self.status,
+            'transaction_time': self.transaction_time,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class AsyncJobRunner(object):
+    """
+    Runs AsyncJobs in a process wide pool of `async_job_workers` threads. With 0 workers jobs are run right away
+    in the calling thread.
+    """
+    _executor = None
+
+    @classmethod
+    def submit(cls, job, work, *args, **kwargs):
+        workers = GeneralConfiguration.get_async_job_workers()
+        if not workers:
+            cls._run(job, work, *args, **kwargs)
+            return
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fhir-async-job')
+        cls._executor.submit(cls._run_in_worker, job, work, *args, **kwargs)
+
+    @classmethod
+    def _run_in_worker(cls, job, work, *args, **kwargs):
+        try:
+            cls._run(job, work, *args, **kwargs)
+        finally:
+            # worker threads are reused, their connections are not closed by the request cycle
+            connections.close_all()
+
+    @classmethod
+    def _run(cls, job, work, *args, **kwargs):
+        try:
+            job.result = work(job, *args, **kwargs) or job.result
+            job.status = AsyncJob.COMPLETED
+        except AsyncJobCancelled:
+            logger.info(f'Async job {job.id} has been cancelled')
+            return
+        except Exception as exc:
+            logger.exception(f'Async job {job.id} ({job.kind}) failed')
+            job.status = AsyncJob.FAILED
+            job.error = str(exc)
+        job.progress = None
+        job.save()
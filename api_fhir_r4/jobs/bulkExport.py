@@ -0,0 +1,112 @@
+import gzip
+import json
+import logging
+
+from django.db.models import Prefetch
+from rest_framework.utils.encoders import JSONEncoder
+
+from api_fhir_r4.permissions import FHIRApiClaimPermissions, FHIRApiGroupPermissions, FHIRApiInsureePermissions
+from api_fhir_r4.serializers import ClaimSerializer, GroupSerializer, PatientSerializer
+from claim.models import Claim, ClaimAttachment, ClaimItem, ClaimService
+from core.models import User
+from insuree.models import Family, Insuree, InsureePolicy
+
+logger = logging.getLogger(__name__)
+
+
+class BulkExportService(object):
+    """
+    FHIR Bulk Data export, resources of each exported type are written to a gzip compressed NDJSON file in the
+    AsyncJob directory. Objects are read in chunks ordered by id, every chunk is converted in one converter batch.
+    """
+    JOB_KIND = 'export'
+    RESOURCE_TYPES = ('Patient', 'Group', 'Claim')
+    PERMISSIONS = {
+        'Patient': FHIRApiInsureePermissions.permissions_get,
+        'Group': FHIRApiGroupPermissions.permissions_get,
+        'Claim': FHIRApiClaimPermissions.permissions_get,
+    }
+    SERIALIZERS = {
+        'Patient': PatientSerializer,
+        'Group': GroupSerializer,
+        'Claim': ClaimSerializer,
+    }
+    chunk_size = 200
+
+    def __init__(self, user):
+        self.user = user
+
+    @classmethod
+    def run_job(cls, job, resource_types, since=None, group_id=None):
+        """
+        AsyncJobRunner work function, returns the export manifest content.
+        """
+        service = cls(User.objects.get(id=job.user_id))
+        return {'output': service.export(job, resource_types, since, group_id)}
+
+    def export(self, job, resource_types, since=None, group_id=None):
+        output = []
+        for resource_type in resource_types:
+            job.set_progress(f'exporting {resource_type}')
+            queryset = self.get_queryset(resource_type, since, group_id)
+            file_name = f'{resource_type}.ndjson.gz'
+            count = self._write_ndjson(job, job.get_file_path(file_name), queryset, resource_type)
+            output.append({'type': resource_type, 'file_name': file_name, 'count': count})
+        return output
+
+    def get_queryset(self, resource_type, since=None, group_id=None):
+        if resource_type == 'Patient':
+            queryset = self._get_patient_queryset(group_id)
+        elif resource_type == 'Group':
+            queryset = self._get_group_queryset(group_id)
+        elif resource_type == 'Claim':
+            queryset = self._get_claim_queryset(group_id)
+        else:
+            raise ValueError(f'Bulk export of {resource_type} is not supported')
+        queryset = queryset.filter(validity_to__isnull=True)
+        if since is not None:
+            queryset = queryset.filter(validity_from__gte=since)
+        return queryset.order_by('id')
+
+    def _get_patient_queryset(self, group_id):
+        queryset = Insuree.get_queryset(None, self.user) \
+            .select_related('gender', 'photo', 'family__location', 'current_village')
+        return queryset.filter(family_id=group_id) if group_id is not None else queryset
+
+    def _get_group_queryset(self, group_id):
+        queryset = Family.get_queryset(None, self.user) \
+            .select_related('head_insuree', 'location', 'family_type', 'confirmation_type') \
+            .prefetch_related('members')
+        return queryset.filter(id=group_id) if group_id is not None else queryset
+
+    def _get_claim_queryset(self, group_id):
+        queryset = Claim.get_queryset(None, self.user) \
+            .select_related('insuree', 'health_facility', 'icd', 'icd_1', 'icd_2', 'icd_3', 'icd_4', 'admin') \
+            .prefetch_related(Prefetch('items', queryset=ClaimItem.objects.filter(validity_to__isnull=True)
+                                       .select_related('item'))) \
+            .prefetch_related(Prefetch('services', queryset=ClaimService.objects.filter(validity_to__isnull=True)
+                                       .select_related('service'))) \
+            .prefetch_related(Prefetch('attachments', queryset=ClaimAttachment.objects.defer('document'))) \
+            .prefetch_related(Prefetch('insuree__insuree_policies',
+                                       queryset=InsureePolicy.objects.filter(validity_to__isnull=True)
+                                       .select_related('policy')))
+        return queryset.filter(insuree__family_id=group_id) if group_id is not None else queryset
+
+    def _write_ndjson(self, job, path, queryset, resource_type):
+        # chunks are read by id ranges (keyset) instead of a cursor held open during the whole export, each chunk
+        # is loaded with its prefetched relations (not applied by .iterator())
+        serializer = self.SERIALIZERS[resource_type](many=True, context={'elements_projection': None}).child
+        count = 0
+        last_id = None
+        with gzip.open(path, 'wt', encoding='utf-8') as file:
+            while True:
+                chunk_queryset = queryset.filter(id__gt=last_id) if last_id is not None else queryset
+                objs = list(chunk_queryset[:self.chunk_size])
+                if not objs:
+                    break
+                for resource in serializer.to_representation_many(objs):
+                    file.write(json.dumps(resource, cls=JSONEncoder) + '\n')
+                count += len(objs)
+                last_id = objs[-1].id
+                job.set_progress(f'exporting {resource_type}: {count}')
+        return count
@@ -0,0 +1,123 @@
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from api_fhir_r4.converters import OperationOutcomeConverter
+from api_fhir_r4.converters.batchContext import ConverterBatchContext
+from api_fhir_r4.permissions import FHIRApiGroupPermissions, FHIRApiInsureePermissions
+from api_fhir_r4.serializers import GroupSerializer, PatientSerializer
+from core.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class BulkImportService(object):
+    """
+    Import of Patient and Group resources from an NDJSON file. Lines are processed in chunks, references of all
+    resources of a chunk are loaded at once (`prepare_import_batch` of the converters) and every resource is then
+    created by its serializer in its own savepoint. Invalid lines are reported in an OperationOutcome NDJSON file.
+    """
+    JOB_KIND = 'import'
+    INPUT_FILE = 'input.ndjson'
+    OUTCOME_FILE = 'OperationOutcome.ndjson'
+    PERMISSIONS = {
+        'Patient': FHIRApiInsureePermissions.permissions_post,
+        'Group': FHIRApiGroupPermissions.permissions_post,
+    }
+    SERIALIZERS = {
+        'Patient': PatientSerializer,
+        'Group': GroupSerializer,
+    }
+    chunk_size = 200
+
+    def __init__(self, user):
+        self.user = user
+        # serializers take the user (and audit user) from the request in their context
+        self.serializer_context = {'request': SimpleNamespace(user=user), 'elements_projection': None}
+
+    @classmethod
+    def run_job(cls, job):
+        """
+        AsyncJobRunner work function, imports the job input file and returns the import summary.
+        """
+        service = cls(User.objects.get(id=job.user_id))
+        with open(job.get_file_path(cls.INPUT_FILE), encoding='utf-8') as input_file, \
+                open(job.get_file_path(cls.OUTCOME_FILE), 'w', encoding='utf-8') as outcome_file:
+            return service.import_ndjson(job, input_file, outcome_file)
+
+    def import_ndjson(self, job, input_file, outcome_file):
+        started = time.monotonic()
+        counts = {resource_type: 0 for resource_type in self.SERIALIZERS}
+        failed = 0
+        processed = 0
+        chunk = []
+        for line_number, line in enumerate(input_file, start=1):
+            if line.strip():
+                chunk.append((line_number, line))
+            if len(chunk) >= self.chunk_size:
+                failed += self._import_chunk(chunk, counts, outcome_file)
+                processed += len(chunk)
+                chunk = []
+                job.set_progress(f'imported {processed} lines, {failed} failed')
+        if chunk:
+            failed += self._import_chunk(chunk, counts, outcome_file)
+            processed += len(chunk)
+
+        duration = time.monotonic() - started
+        records_per_second = round(processed / duration, 2) if duration else processed
+        logger.info(f'Bulk import {job.id}: {processed} records in {duration:.2f}s ({records_per_second} records/s)')
+        return {
+            'output': [{'type': resource_type, 'count': count} for resource_type, count in counts.items() if count],
+            'error': [{'type': 'OperationOutcome', 'file_name': self.OUTCOME_FILE, 'count': failed}] if failed else [],
+            'processed': processed,
+            'duration': round(duration, 3),
+            'records_per_second': records_per_second,
+        }
+
+    def _import_chunk(self, chunk, counts, outcome_file):
+        failed = 0
+        resources = []
+        for line_number, line in chunk:
+            try:
+                resource = json.loads(line)
+                if not isinstance(resource, dict) or resource.get('resourceType') not in self.SERIALIZERS:
+                    raise ValueError(f'Only {", ".join(self.SERIALIZERS)} resources can be imported')
+                resources.append((line_number, resource))
+            except ValueError as exc:
+                self._write_outcome(outcome_file, line_number, exc)
+                failed += 1
+
+        batch_context = ConverterBatchContext([resource for _, resource in resources])
+        for resource_type, serializer_class in self.SERIALIZERS.items():
+            serializer_class.fhirConverter.prepare_import_batch(
+                [resource for _, resource in resources if resource['resourceType'] == resource_type], batch_context)
+        token = batch_context.activate(*(type(serializer_class.fhirConverter)
+                                         for serializer_class in self.SERIALIZERS.values()))
+        try:
+            for line_number, resource in resources:
+                try:
+                    self._import_resource(resource)
+                    counts[resource['resourceType']] += 1
+                except Exception as exc:
+                    logger.debug(f'Import of line {line_number} failed', exc_info=True)
+                    self._write_outcome(outcome_file, line_number, exc)
+                    failed += 1
+        finally:
+            ConverterBatchContext.deactivate(token)
+        return failed
+
+    def _import_resource(self, resource):
+        serializer = self.SERIALIZERS[resource['resourceType']](data=resource, context=self.serializer_context)
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+    def _write_outcome(self, outcome_file, line_number, exc):
+        outcome = OperationOutcomeConverter.to_fhir_obj(exc).dict()
+        for issue in outcome.get('issue', []):
+            issue['diagnostics'] = f'line {line_number}'
+        outcome_file.write(json.dumps(outcome, cls=JSONEncoder) + '\n')
@@ -0,0 +1,39 @@
+import logging
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
+from api_fhir_r4.configurations import GeneralConfiguration
+from api_fhir_r4.converters import ClaimResponseConverter
+from claim.models import Claim
+from claim.services import ClaimSubmitService
+from core.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimSubmitJob(object):
+    """
+    Asynchronous submission (validation and rule engine) of a claim entered by the request, the job result
+    refers to the claim the ClaimResponse is built from.
+    """
+    JOB_KIND = 'claim-submit'
+
+    @classmethod
+    def run_job(cls, job, claim_code):
+        """
+        AsyncJobRunner work function, submits the entered claim.
+        """
+        user = User.objects.get(id=job.user_id)
+        rule_engine_validation = GeneralConfiguration.get_claim_rule_engine_validation()
+        with transaction.atomic():
+            claim = Claim.objects.get(code=claim_code, validity_to__isnull=True)
+            claim, errors = ClaimSubmitService(user).submit_claim(claim, rule_engine_validation=rule_engine_validation)
+        if errors:
+            logger.debug(f'Claim {claim_code} rejected: {errors}')
+        return {'claim_code': claim.code}
+
+    @classmethod
+    def get_claim_response(cls, job):
+        claim = get_object_or_404(Claim, code=job.result['claim_code'], validity_to=None)
+        return ClaimResponseConverter.to_fhir_obj(claim).dict()
@@ -1,4 +1,4 @@
-from insuree.models import FamilyType, ConfirmationType
+from api_fhir_r4.cache import ReferenceDataCache
 
 
 class GroupTypeMapping(object):
@@ -6,9 +6,7 @@ class GroupTypeMapping(object):
     group_type = {}
     @classmethod
     def load(cls):
-        cls.group_type = {
-            str(family_type.code): family_type.type for family_type in FamilyType.objects.all()
-        }
+        cls.group_type = ReferenceDataCache.get_table('insuree.FamilyType').lookup('code', 'type')
 
 
 class ConfirmationTypeMapping(object):
@@ -16,6 +14,5 @@ class ConfirmationTypeMapping(object):
     confirmation_type = {}
     @classmethod
     def load(cls):
-        cls.confirmation_type = {
-            str(confirmation_type.code): confirmation_type.confirmationtype for confirmation_type in ConfirmationType.objects.all()
-        }
+        cls.confirmation_type = ReferenceDataCache.get_table('insuree.ConfirmationType') \
+            .lookup('code', 'confirmationtype')
@@ -1,5 +1,4 @@
-from insuree.models import Profession, Education, IdentificationType, Relation, Gender
-
+from api_fhir_r4.cache import ReferenceDataCache
 from api_fhir_r4.configurations import GeneralConfiguration
 
 
@@ -7,10 +6,7 @@ class RelationshipMapping(object):
     relationship = {}
     @classmethod
     def load(cls):
-        if cls.relationship == {}:
-            cls.relationship = {
-                str(relation.id): relation.relation for relation in Relation.objects.all()
-            }
+        cls.relationship = ReferenceDataCache.get_table('insuree.Relation').lookup('id', 'relation')
 
 
 class EducationLevelMapping(object):
@@ -18,30 +14,22 @@ class EducationLevelMapping(object):
     
     @classmethod
     def load(cls):
-        if cls.education_level ==  {}:
-            cls.education_level = {
-                str(education.id): education.education for education in Education.objects.all()
-                }
+        cls.education_level = ReferenceDataCache.get_table('insuree.Education').lookup('id', 'education')
 
 
 class PatientProfessionMapping(object):
     patient_profession = {}
     @classmethod
     def load(cls):
-        if cls.patient_profession ==  {}:
-            cls.patient_profession = {
-                str(profession.id): profession.profession for profession in Profession.objects.all()
-            }
+        cls.patient_profession = ReferenceDataCache.get_table('insuree.Profession').lookup('id', 'profession')
 
 
 class IdentificationTypeMapping(object):
     identification_type = {}
     @classmethod
     def load(cls):
-        if cls.identification_type == {}:
-            cls.identification_type = {
-                identification.code: identification.identification_type for identification in IdentificationType.objects.all()
-            }
+        cls.identification_type = ReferenceDataCache.get_table('insuree.IdentificationType') \
+            .lookup('code', 'identification_type')
 
 
 class MaritalStatusMapping(object):
@@ -82,20 +70,20 @@ class PatientCategoryMapping(object):
     }
     @classmethod
     def get_genders(cls):
+        genders = ReferenceDataCache.get_table('insuree.Gender')
         imis_gender_mapping = {
             # FHIR Gender code to IMIS object
-            'male': Gender.objects.get(pk='M'),
-            'female': Gender.objects.get(pk='F'),
+            'male': genders.get('code', 'M'),
+            'female': genders.get('code', 'F'),
         }
 
-        o = Gender.objects.filter(pk='O').first()
+        o = genders.get('code', 'O')
         if o:
             imis_gender_mapping['other'] = o
         return imis_gender_mapping
     @classmethod
     def load(cls):
-        if cls.imis_gender_mapping ==  {}:
-            cls.imis_gender_mapping = cls.get_genders()
+        cls.imis_gender_mapping = cls.get_genders()
 
     imis_patient_category_flags = {
         "male": 1,
@@ -1,14 +1,16 @@
+import json
 import logging
 from abc import abstractmethod, ABC
 from typing import List
 
 from django.core.exceptions import ObjectDoesNotExist, FieldError
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 
 from rest_framework import mixins
 
 from api_fhir_r4.model_retrievers import GenericModelRetriever
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from api_fhir_r4.multiserializer.mixins import MultiSerializerUpdateModelMixin, MultiSerializerRetrieveModelMixin
 
@@ -126,3 +128,60 @@ class MultiIdentifierRetrieveManySerializersMixin(MultiSerializerRetrieveModelMi
             raise Http404(f"Resource for identifier {kwargs['identifier']} not found")
 
         return Response(retrieved[0])
+
+
+class StreamingListModelMixin(object):
+    """
+    Allows list endpoints to be served as NDJSON (`_format=ndjson`). Resources are streamed ordered by primary key,
+    the queryset is read in chunks of keys (keyset) with its prefetched relations and every chunk is converted in
+    one converter batch, so memory usage doesn't depend on the number of returned resources. `_count` limits the
+    number of streamed resources.
+    """
+    streaming_format_query_param = '_format'
+    streaming_formats = ('ndjson', 'application/ndjson', 'application/fhir+ndjson')
+    streaming_content_type = 'application/fhir+ndjson'
+    streaming_chunk_size = 200
+
+    def is_streaming_request(self, request):
+        return request.GET.get(self.streaming_format_query_param) in self.streaming_formats
+
+    def get_streaming_response(self, queryset, serializer_class, **serializer_kwargs):
+        limit = self.paginator.get_page_size(self.request) \
+            if self.paginator.page_size_query_param in self.request.GET else None
+        serializer_kwargs['context'] = {**self.get_serializer_context(), **serializer_kwargs.get('context', {})}
+        # many=True to make the serializer behave the same way as for the paginated lists
+        serializer = serializer_class(many=True, **serializer_kwargs).child
+        return StreamingHttpResponse(self._stream_ndjson(queryset.order_by('pk'), serializer, limit or None),
+                                     content_type=self.streaming_content_type)
+
+    def _stream_ndjson(self, queryset, serializer, limit=None):
+        # .iterator() would ignore prefetch_related and convert resources one by one
+        streamed = 0
+        last_pk = None
+        while limit is None or streamed < limit:
+            chunk_size = self.streaming_chunk_size if limit is None else min(self.streaming_chunk_size, limit - streamed)
+            chunk_queryset = queryset.filter(pk__gt=last_pk) if last_pk is not None else queryset
+            objs = list(chunk_queryset[:chunk_size])
+            if not objs:
+                break
+            for resource in serializer.to_representation_many(objs):
+                yield json.dumps(resource, cls=JSONEncoder) + '\n'
+            streamed += len(objs)
+            last_pk = objs[-1].pk
+
+
+class CodeSystemResponseMixin(object):
+    """
+    Responds with the CodeSystem built by the serializer and its `ETag`. Requests with matching `If-None-Match`
+    get `304 Not Modified` without the content.
+    """
+
+    def get_code_system_response(self, request, serializer):
+        data, etag = serializer.to_representation_with_etag()
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(',')):
+            response = Response(status=304)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        return response
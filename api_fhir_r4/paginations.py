@@ -1,10 +1,19 @@
+import base64
 import hashlib
+import json
 import urllib
+from types import SimpleNamespace
+from api_fhir_r4.cache import ModelVersions
 from api_fhir_r4.configurations import GeneralConfiguration
+from api_fhir_r4.converters import ElementsProjection
+from api_fhir_r4.utils import DbManagerUtils
 from fhir.resources.R4B.bundle import Bundle, BundleEntry, BundleLink
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from django.core.cache import caches
+from django.db.models import Q
 from django.db.models.query import QuerySet
 
 
@@ -13,26 +22,69 @@ class FhirBundleResultsSetPagination(PageNumberPagination):
     page_size = GeneralConfiguration.get_default_response_page_size()
     page_query_param = 'page-offset'
     page_size_query_param = '_count'
+    cursor_query_param = '_cursor'
+    total_query_param = '_total'
+    TOTAL_NONE = 'none'
+    TOTAL_ESTIMATE = 'estimate'
+    TOTAL_ACCURATE = 'accurate'
+    total_modes = (TOTAL_NONE, TOTAL_ESTIMATE, TOTAL_ACCURATE)
+    cursor_default_ordering = 'validity_from'
+    cursor_tie_breaker = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # When False the searchset is assembled from plain dicts (see `build_bundle_set_dict`), entries are
+    # trusted output of `BaseFHIRSerializer.to_representation` and are not validated again.
+    validate_bundle = False
 
     def get_paginated_response(self, data):
-        return Response(self.build_bundle_set(data).dict())
+        if self.validate_bundle:
+            return Response(self.build_bundle_set(data).dict())
+        return Response(self.build_bundle_set_dict(data))
 
     def build_bundle_set(self, data):
         bundle = Bundle.construct()
         bundle.type = "searchset"
-        bundle.total = self.page.paginator.count
+        total = self.get_bundle_total()
+        if total is not None:
+            bundle.total = total
         self.build_bundle_links(bundle)
         self.build_bundle_entry(bundle, data)
         return bundle
 
-    def build_bundle_links(self, bundle):
-        self.build_bundle_link(bundle, "self", self.request.build_absolute_uri())
+    def build_bundle_set_dict(self, data):
+        bundle = {'resourceType': 'Bundle', 'type': 'searchset'}
+        total = self.get_bundle_total()
+        if total is not None:
+            bundle['total'] = total
+        bundle['link'] = [{'relation': relation, 'url': urllib.parse.quote_plus(url)}
+                          for relation, url in self.get_bundle_link_urls()]
+        base_url = self.exclude_query_parameter_from_url(self.request.build_absolute_uri())
+        entries = [self.build_bundle_entry_dict(obj, base_url) for obj in data]
+        if entries:
+            bundle['entry'] = entries
+        return bundle
+
+    def build_bundle_entry_dict(self, obj, base_url):
+        entry = {}
+        resource_pk = self.get_object_pk(obj)
+        if resource_pk:
+            entry['fullUrl'] = base_url + resource_pk
+        entry['resource'] = obj
+        return entry
+
+    def get_bundle_link_urls(self):
+        links = [("self", self.request.build_absolute_uri())]
         next_link = self.get_next_link()
         if next_link:
-            self.build_bundle_link(bundle, "next", next_link)
+            links.append(("next", next_link))
         previous_link = self.get_previous_link()
         if previous_link:
-            self.build_bundle_link(bundle, "previous", previous_link)
+            links.append(("previous", previous_link))
+        return links
+
+    def build_bundle_links(self, bundle):
+        for relation, url in self.get_bundle_link_urls():
+            self.build_bundle_link(bundle, relation, url)
 
     def build_bundle_link(self, bundle, relation, url):
         self_link = {}
@@ -76,25 +128,240 @@ class FhirBundleResultsSetPagination(PageNumberPagination):
         o = urlparse(url)
         return o._replace(query=None).geturl()
 
-    def paginate_queryset(self, queryset, *args, **kwargs):
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_paginated = self.cursor_query_param in request.query_params and isinstance(queryset, QuerySet)
+        if self.cursor_paginated:
+            return self.paginate_queryset_by_cursor(queryset, request)
+        if ElementsProjection.is_count_only(request):
+            return self.paginate_count_only(queryset, request)
+        total_mode = self.get_total_mode(request)
+        if total_mode != self.TOTAL_ACCURATE and isinstance(queryset, QuerySet):
+            return self.paginate_queryset_without_count(queryset, request, total_mode)
         if isinstance(queryset, QuerySet) and hasattr(queryset, 'count'):
-            queryset = CachedCountQueryset(queryset)
-        return super().paginate_queryset(queryset, *args, **kwargs)
+            queryset = CachedCountQueryset(queryset, scope=self.get_count_cache_scope(request))
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_count_cache_scope(self, request):
+        """
+        Requests for the same path, user and filter parameters share the cached count (pages don't matter).
+        """
+        ignored_params = (self.page_query_param, self.page_size_query_param, self.cursor_query_param,
+                          self.total_query_param, ElementsProjection.SUMMARY_PARAMETER,
+                          ElementsProjection.ELEMENTS_PARAMETER, '_format')
+        params = sorted((key, value) for key, values in request.query_params.lists()
+                        if key not in ignored_params for value in values)
+        return f'{request.path}|{getattr(request.user, "id", None)}|{urllib.parse.urlencode(params)}'
+
+    def is_cursor_mode(self):
+        return getattr(self, 'cursor_paginated', False)
+
+    def get_bundle_total(self):
+        if self.is_cursor_mode():
+            return None
+        return self.page.paginator.count
+
+    def get_total_mode(self, request):
+        total_mode = request.query_params.get(self.total_query_param, self.TOTAL_ACCURATE)
+        if total_mode not in self.total_modes:
+            raise ValidationError({self.total_query_param: f'Invalid value, expected one of {self.total_modes}'})
+        return total_mode
+
+    def paginate_count_only(self, queryset, request):
+        """
+        `_summary=count`: the Bundle contains only the total, no resources are fetched.
+        """
+        if isinstance(queryset, QuerySet):
+            count = CachedCountQueryset(queryset, scope=self.get_count_cache_scope(request)).count()
+        else:
+            count = len(queryset)
+        self.page = UncountedPage([], 1, has_next_page=False, count=count)
+        return []
+
+    def paginate_queryset_without_count(self, queryset, request, total_mode):
+        """
+        Page number pagination without COUNT(*) (`_total=none|estimate`): one extra row is fetched to know
+        whether the next page exists, the total is either skipped or estimated by the database.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            page_number = int(page_number)
+            if page_number < 1:
+                raise ValueError(page_number)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message='Invalid page.'))
+
+        offset = (page_number - 1) * page_size
+        results = list(queryset[offset:offset + page_size + 1])
+        total = DbManagerUtils.get_estimated_count(queryset) if total_mode == self.TOTAL_ESTIMATE else None
+        self.page = UncountedPage(results[:page_size], page_number, len(results) > page_size, total)
+        return list(self.page)
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        """
+        Keyset pagination: instead of an OFFSET scan, the next page starts right after the last
+        (ordering field, id) pair of the previous one. The pair is sent to the client as an opaque
+        `_cursor` value in the `next` link, the total count is not computed.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        ordering = self.get_cursor_ordering(queryset)
+        queryset = queryset.order_by(ordering, self.cursor_tie_breaker)
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        if position:
+            queryset = queryset.filter(self.build_cursor_condition(ordering, position))
+
+        results = list(queryset[:page_size + 1])
+        self.has_next_cursor_page = len(results) > page_size
+        results = results[:page_size]
+        self.next_cursor = self.encode_cursor(ordering, results[-1]) \
+            if self.has_next_cursor_page and results else None
+        return results
+
+    def get_cursor_ordering(self, queryset):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if ordering:
+            return ordering[0]
+        field_names = [field.name for field in queryset.model._meta.get_fields()]
+        return self.cursor_default_ordering if self.cursor_default_ordering in field_names \
+            else self.cursor_tie_breaker
+
+    def build_cursor_condition(self, ordering, position):
+        field = ordering.lstrip('-')
+        lookup = 'lt' if ordering.startswith('-') else 'gt'
+        value, last_id = position
+        return Q(**{f'{field}__{lookup}': value}) | \
+            Q(**{field: value, f'{self.cursor_tie_breaker}__gt': last_id})
+
+    def encode_cursor(self, ordering, obj):
+        value = getattr(obj, ordering.lstrip('-'))
+        position = [value.isoformat() if hasattr(value, 'isoformat') else value,
+                    getattr(obj, self.cursor_tie_breaker)]
+        return base64.urlsafe_b64encode(json.dumps(position, default=str).encode('utf8')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            value, last_id = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+        return value, last_id
+
+    def get_next_link(self):
+        if not self.is_cursor_mode():
+            return super().get_next_link()
+        if not self.next_cursor:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if self.is_cursor_mode():
+            # cursor links are forward only
+            return None
+        return super().get_previous_link()
+
+
+class UncountedPage(list):
+    """
+    Minimal replacement of django `Page` used when the exact number of results is not known.
+    """
+
+    def __init__(self, object_list, number, has_next_page, count=None):
+        super().__init__(object_list)
+        self.number = number
+        self.has_next_page = has_next_page
+        self.paginator = SimpleNamespace(count=count)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.number > 1
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class CountCacheStatistics(object):
+    """
+    Process local hit/miss counters of `CachedCountQueryset`.
+    """
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def record(cls, hit):
+        if hit:
+            cls.hits += 1
+        else:
+            cls.misses += 1
+
+    @classmethod
+    def get_statistics(cls):
+        lookups = cls.hits + cls.misses
+        return {
+            'hits': cls.hits,
+            'misses': cls.misses,
+            'hit_ratio': cls.hits / lookups if lookups else None
+        }
+
+    @classmethod
+    def reset(cls):
+        cls.hits = 0
+        cls.misses = 0
+
+
+def get_query_models(query):
+    """
+    Models whose rows affect the result of the query: the queried model, tracked models of joined tables and
+    models used in annotation subqueries (e.g. `Exists`).
+    """
+    models = {query.model}
+    for alias in query.alias_map.values():
+        model = ModelVersions.get_model_for_table(alias.table_name)
+        if model:
+            models.add(model)
+    for annotation in query.annotations.values():
+        annotation_query = getattr(annotation, 'query', None)
+        if annotation_query is not None and hasattr(annotation_query, 'alias_map'):
+            models |= get_query_models(annotation_query)
+    return models
 
 
-def CachedCountQueryset(queryset, timeout=60*60, cache_name='default'):
+def CachedCountQueryset(queryset, timeout=60*60, cache_name=None, scope=None):
     """
         Return copy of queryset with queryset.count() wrapped to cache result for `timeout` seconds.
+        The cache key is built from `scope` (or the SQL of the query if scope is not given) and the versions of
+        the models used by the query, so cached counts are invalidated on every insert/update/delete.
+        Counts are kept in the `shared_cache_backend` cache unless `cache_name` is given.
     """
-    cache = caches[cache_name]
+    cache = caches[cache_name or GeneralConfiguration.get_shared_cache_backend()]
     queryset = queryset._chain()
     real_count = queryset.count
+    scope_hash = hashlib.md5(f'{queryset.model._meta.label}|{scope}'.encode('utf8')).hexdigest() if scope else None
 
     def count(queryset):
-        cache_key = 'query-count:' + hashlib.md5(str(queryset.query).encode('utf8')).hexdigest()
+        query_hash = scope_hash or hashlib.md5(str(queryset.query).encode('utf8')).hexdigest()
+        versions = ModelVersions.get_versions(get_query_models(queryset.query))
+        cache_key = 'query-count:' + query_hash + ':' + '.'.join(str(version) for version in versions.values())
 
         # return existing value, if any
         value = cache.get(cache_key)
+        CountCacheStatistics.record(hit=value is not None)
         if value is not None:
             return value
 
@@ -104,4 +371,4 @@ def CachedCountQueryset(queryset, timeout=60*60, cache_name='default'):
         return value
 
     queryset.count = count.__get__(queryset, type(queryset))
-    return queryset
\ No newline at end of file
+    return queryset
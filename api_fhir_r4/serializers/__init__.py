@@ -1,12 +1,14 @@
 import logging
 from typing import Union
 
+from django.db.models import Manager
 from django.http.response import HttpResponseBase
 from fhir.resources.R4B import FHIRAbstractModel
 from rest_framework import serializers
 
 from api_fhir_r4.configurations import GeneralConfiguration
-from api_fhir_r4.converters import BaseFHIRConverter, OperationOutcomeConverter, ReferenceConverterMixin
+from api_fhir_r4.converters import BaseFHIRConverter, OperationOutcomeConverter, ReferenceConverterMixin, \
+    ElementsProjection, FhirDictEmitter, FhirFragments
 from core.models import User, TechnicalUser
 
 
@@ -14,9 +16,22 @@ from core.models import User, TechnicalUser
 logger = logging.getLogger(__name__)
 
 
+class BaseFHIRListSerializer(serializers.ListSerializer):
+    """
+    Converts all objects inside one converter batch, so the converter can preload related data for the whole list.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        return self.child.to_representation_many(iterable)
+
+
 class BaseFHIRSerializer(serializers.Serializer):
     fhirConverter = BaseFHIRConverter()
 
+    class Meta:
+        list_serializer_class = BaseFHIRListSerializer
+
     def __init__(self, *args, **kwargs):
         self._reference_type = kwargs.pop('reference_type', ReferenceConverterMixin.UUID_REFERENCE_TYPE)
         super().__init__(*args, **kwargs)
@@ -24,17 +39,42 @@ class BaseFHIRSerializer(serializers.Serializer):
     def to_representation(self, obj):
         try:
             if isinstance(obj, HttpResponseBase):
-                return OperationOutcomeConverter.to_fhir_obj(obj).dict()
+                return self.emit_dict(OperationOutcomeConverter.to_fhir_obj(obj))
             elif isinstance(obj, FHIRAbstractModel):
-                return obj.dict()
-            return self.fhirConverter.to_fhir_obj(obj, self.reference_type).dict()
+                return self.emit_dict(obj)
+            projection = self.elements_projection
+            converter_kwargs = {}
+            if projection is not None and self.fhirConverter.supports_projection:
+                converter_kwargs['projection'] = projection
+            fhir_dict = self.to_fhir_dict(obj, **converter_kwargs)
+            if projection is None:
+                return fhir_dict
+            return projection.apply(fhir_dict, self.fhirConverter.summary_elements)
         except Exception as e:
             from django.conf import settings
             if settings.DEBUG:
                 self._print_debug_log(e)
             raise e
 
+    def to_fhir_dict(self, obj, **converter_kwargs):
+        FhirFragments.refresh()
+        if GeneralConfiguration.get_fast_emit():
+            return self.fhirConverter.to_fhir_dict(obj, self.reference_type, **converter_kwargs)
+        return self.fhirConverter.to_fhir_obj(obj, self.reference_type, **converter_kwargs).dict()
+
+    def emit_dict(self, fhir_obj):
+        if GeneralConfiguration.get_fast_emit():
+            return FhirDictEmitter.emit(fhir_obj)
+        return fhir_obj.dict()
+
+    def to_representation_many(self, objs):
+        objs = list(objs)
+        imis_objs = [obj for obj in objs if not isinstance(obj, (HttpResponseBase, FHIRAbstractModel))]
+        with self.fhirConverter.batch(imis_objs):
+            return [self.to_representation(obj) for obj in objs]
+
     def to_internal_value(self, data):
+        FhirFragments.refresh()
         audit_user_id = self.get_audit_user_id()
         return self.fhirConverter.to_imis_obj(data, audit_user_id).__dict__
 
@@ -56,6 +96,18 @@ class BaseFHIRSerializer(serializers.Serializer):
         else:
             return self.__get_technical_audit_user(audit_user_id)
 
+    @property
+    def elements_projection(self):
+        """
+        Projection requested with `_summary`/`_elements`, taken from the `elements_projection` context entry or
+        from the request in the context.
+        """
+        if 'elements_projection' not in self.context:
+            request = self.context.get('request')
+            self.context['elements_projection'] = \
+                ElementsProjection.from_request(request) if request is not None else None
+        return self.context['elements_projection']
+
     @property
     def reference_type(self):
         return self._reference_type
@@ -1,6 +1,7 @@
-from claim.services import ClaimSubmitService, ClaimSubmit, ClaimConfig
+from claim.services import ClaimCreateService, ClaimSubmitService, ClaimSubmit, ClaimConfig
 from claim.gql_mutations import create_attachments
-from claim.models import Claim, ClaimAdmin, ClaimItem, ClaimService
+from claim.models import Claim, ClaimAdmin, ClaimItem, ClaimService, ClaimAttachment, ClaimAttachmentType, \
+    GeneralClaimAttachmentType
 from typing import List, Union
 
 from api_fhir_r4.containedResources.claimContainedResources import ClaimContainedResources
@@ -10,11 +11,12 @@ from django.http import HttpResponseForbidden
 from django.http.response import HttpResponseBase
 from django.shortcuts import get_object_or_404
 
-from api_fhir_r4.configurations import R4ClaimConfig, GeneralConfiguration
+from api_fhir_r4.configurations import GeneralConfiguration
 from api_fhir_r4.converters import ClaimResponseConverter, OperationOutcomeConverter, ReferenceConverterMixin as r
 from api_fhir_r4.converters.claimConverter import ClaimConverter
 from fhir.resources.R4B import FHIRAbstractModel
 from api_fhir_r4.serializers import BaseFHIRSerializer
+from api_fhir_r4.utils import AttachmentUtils
 
 import logging
 logger = logging.getLogger(__name__)
@@ -34,8 +36,12 @@ class ClaimSerializer(ContainedContentSerializerMixin, BaseFHIRSerializer):
         ]
 
     def create(self, validated_data):
+        # with `submit` False in the context the claim is only entered and returned, it's submitted asynchronously
+        submit = self.context.get('submit', True)
         from_contained = self._create_or_update_contained(self.initial_data)
-        claim = self._create_claim_from_validated_data(validated_data, from_contained)
+        claim = self._create_claim_from_validated_data(validated_data, from_contained, submit)
+        if not submit:
+            return claim
         return self.create_claim_response(claim.code)
 
     def create_claim_response(self, claim_code):
@@ -44,31 +50,44 @@ class ClaimSerializer(ContainedContentSerializerMixin, BaseFHIRSerializer):
 
     def create_claim_attachments(self, claim_code, attachments):
         claim = get_object_or_404(Claim, code=claim_code, validity_to=None)
-        create_attachments(claim.id, attachments)
+        spooled = [attachment for attachment in attachments if attachment.get('spool_path')]
+        create_attachments(claim.id, [attachment for attachment in attachments if not attachment.get('spool_path')])
+        for attachment in spooled:
+            self.__create_spooled_attachment(claim.id, attachment)
+
+    def __create_spooled_attachment(self, claim_id, attachment):
+        # same as claim module FILE attachment, the content is moved from the spool instead of being decoded again
+        from core import datetime
+        now = datetime.datetime.now()
+        data = {key: value for key, value in attachment.items() if key != 'spool_path'}
+        data['url'] = AttachmentUtils.store(ClaimConfig.claim_attachments_root_path, attachment['spool_path'],
+                                            now, claim_id)
+        data['claim_id'] = claim_id
+        data['module'] = 'claim'
+        data['general_type'] = GeneralClaimAttachmentType.FILE
+        data['predefined_type'] = ClaimAttachmentType.objects.get(
+            validity_to__isnull=True, claim_general_type="FILE", claim_attachment_type='default')
+        data['validity_from'] = now
+        ClaimAttachment.objects.create(**data)
 
     def to_representation(self, obj):
         if isinstance(obj, HttpResponseBase):
-            return OperationOutcomeConverter.to_fhir_obj(obj).dict()
+            return self.emit_dict(OperationOutcomeConverter.to_fhir_obj(obj))
         elif isinstance(obj, FHIRAbstractModel):
-            return obj.dict()
+            return self.emit_dict(obj)
 
-        fhir_obj = self.fhirConverter.to_fhir_obj(obj, self._reference_type)
-        self.remove_attachment_data(fhir_obj)
-        
-        if self.context.get('contained', None):
-            self._add_contained_references(fhir_obj)
-
-        fhir_dict = fhir_obj.dict()
+        inline_attachments = self.context.get('inline_attachments', False)
         if self.context.get('contained', False):
+            fhir_obj = self.fhirConverter.to_fhir_obj(obj, self._reference_type, inline_attachments=inline_attachments)
+            self._add_contained_references(fhir_obj)
+            fhir_dict = self.emit_dict(fhir_obj)
             fhir_dict['contained'] = self._create_contained_obj_dict(obj)
+        else:
+            fhir_dict = self.to_fhir_dict(obj, inline_attachments=inline_attachments)
+        if self.elements_projection is not None:
+            fhir_dict = self.elements_projection.apply(fhir_dict, self.fhirConverter.summary_elements)
         return fhir_dict
 
-    def remove_attachment_data(self, fhir_obj):
-        if hasattr(self.parent, 'many') and self.parent.many is True:
-            attachments = self.__get_attachments(fhir_obj)
-            for next_attachment in attachments:
-                next_attachment.data = None
-
     @property
     def reference_type(self):
         return super().reference_type
@@ -81,10 +100,6 @@ class ClaimSerializer(ContainedContentSerializerMixin, BaseFHIRSerializer):
             self._reference_type = reference_type
             self.__set_contained_resource_reference_types(reference_type)
 
-    def __get_attachments(self, fhir_obj):
-        attachment_category = R4ClaimConfig.get_fhir_claim_attachment_code()
-        return [a.valueAttachment for a in fhir_obj.supportingInfo if a.category.text == attachment_category]
-
     def __set_contained_resource_reference_types(self, reference_type):
         self._contained_definitions.update_reference_type(reference_type)
 
@@ -140,21 +155,28 @@ class ClaimSerializer(ContainedContentSerializerMixin, BaseFHIRSerializer):
         matching = [x.id for x in contained_collection if lookup_func(x)]
         return matching[0] if len(matching) != 0 else None
 
-    def _create_claim_from_validated_data(self, validated_data, contained):
+    def _create_claim_from_validated_data(self, validated_data, contained, submit=True):
         truncated_data = self._claim_input_from_validated_claim_data(validated_data, contained)
         user = self.context.get("request").user
+        attachments = validated_data.get('claim_attachments', [])
         if not user or not user.has_perms(
                 ClaimConfig.gql_mutation_create_claims_perms
                 + ClaimConfig.gql_mutation_submit_claims_perms
         ):
+            ClaimConverter.discard_spooled_attachments(attachments)
             return HttpResponseForbidden()
 
         rule_engine_validation = GeneralConfiguration.get_claim_rule_engine_validation()
-        claim = ClaimSubmitService(user) \
-            .enter_and_submit(truncated_data, rule_engine_validation=rule_engine_validation)
-
-        attachments = validated_data.get('claim_attachments', [])
-        self.create_claim_attachments(claim.code, attachments)
+        try:
+            if submit:
+                claim = ClaimSubmitService(user) \
+                    .enter_and_submit(truncated_data, rule_engine_validation=rule_engine_validation)
+            else:
+                claim = ClaimCreateService(user).enter_claim(truncated_data)
+            self.create_claim_attachments(claim.code, attachments)
+        except Exception:
+            ClaimConverter.discard_spooled_attachments(attachments)
+            raise
         return claim
 
     def _claim_input_from_validated_claim_data(self, validated_data, contained):
@@ -1,14 +1,26 @@
+import hashlib
+import json
+
 from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from api_fhir_r4.cache import ModelVersions, RenderedResourceCache
 from api_fhir_r4.converters import CodeSystemConverter
 from api_fhir_r4.serializers import BaseFHIRSerializer
 
 
 class CodeSystemSerializer(BaseFHIRSerializer):
+    """
+    CodeSystem built from all rows of the `model_name` model or from given `data`. CodeSystems of models with
+    tracked versions (see ModelVersions) are rendered once and served from the RenderedResourceCache until the
+    model changes.
+    """
     fhirConverter = CodeSystemConverter
     codeSystemFields = ['code_field', 'display_field', 'id', 'name', 'title', 'description', 'url']
+    _model_classes = {}  # {model name: model class}, ContentType lookup done once per model name
 
     def __init__(self, *args, **kwargs):
         self.model = {}
+        self.model_class = None
 
         for field in self.codeSystemFields:
             self.model[field] = kwargs.pop(field, None)
@@ -16,13 +28,36 @@ class CodeSystemSerializer(BaseFHIRSerializer):
         if 'data' in kwargs:
             self.model['data'] = kwargs.pop('data')
         elif 'model_name' in kwargs:
-            content_type = ContentType.objects.get(model__iexact=kwargs.pop('model_name'))
-            model_class = content_type.model_class()
-            self.model['data'] = model_class.objects.all()
+            self.model_class = self.get_model_class(kwargs.pop('model_name'))
+            self.model['data'] = self.model_class.objects.all()
         else:
             self.model['data'] = {}
 
         super().__init__(*args, **kwargs)
 
+    @classmethod
+    def get_model_class(cls, model_name):
+        model_class = cls._model_classes.get(model_name.lower())
+        if model_class is None:
+            model_class = ContentType.objects.get(model__iexact=model_name).model_class()
+            cls._model_classes[model_name.lower()] = model_class
+        return model_class
+
     def to_representation(self, obj):
-        return CodeSystemConverter.to_fhir_obj(self.model, self.reference_type).dict()
+        return self.to_representation_with_etag()[0]
+
+    def to_representation_with_etag(self):
+        """
+        Return the CodeSystem dict and its ETag, the ETag is a hash of the content except for the (build) date.
+        """
+        if self.model_class is None or not ModelVersions.is_tracked(self.model_class):
+            return self.__render()
+        url_hash = hashlib.md5(str(self.model['url']).encode('utf-8')).hexdigest()
+        object_key = f'CodeSystem:{self.model["id"]}:{url_hash}:{self.reference_type}'
+        return RenderedResourceCache.get_or_render_for_key(object_key, [self.model_class], self.__render)
+
+    def __render(self):
+        fhir_dict = CodeSystemConverter.to_fhir_obj(self.model, self.reference_type).dict()
+        content = {key: value for key, value in fhir_dict.items() if key != 'date'}
+        content_hash = hashlib.md5(json.dumps(content, sort_keys=True, cls=DjangoJSONEncoder).encode('utf-8'))
+        return fhir_dict, f'W/"{content_hash.hexdigest()}"'
@@ -1,6 +1,8 @@
 import copy
 
+from location.models import Location
 from product.models import Product
+from api_fhir_r4.cache import RenderedResourceCache
 from api_fhir_r4.converters import InsurancePlanConverter
 from api_fhir_r4.exceptions import FHIRException
 from api_fhir_r4.serializers import BaseFHIRSerializer
@@ -8,6 +10,18 @@ from api_fhir_r4.serializers import BaseFHIRSerializer
 
 class InsurancePlanSerializer(BaseFHIRSerializer):
     fhirConverter = InsurancePlanConverter()
+    # models the rendered InsurancePlan is built from (product, conversion product and coverage area)
+    rendered_from_models = (Product, Location)
+
+    def to_fhir_dict(self, obj, **converter_kwargs):
+        if converter_kwargs or not isinstance(obj, Product):
+            return super().to_fhir_dict(obj, **converter_kwargs)
+        rendered = RenderedResourceCache.get_or_render(
+            'InsurancePlan', obj, self.reference_type, self.rendered_from_models,
+            lambda: super(InsurancePlanSerializer, self).to_fhir_dict(obj)
+        )
+        # status depends on the current date, not only on the product
+        return {**rendered, 'status': InsurancePlanConverter.get_fhir_status(obj)}
 
     def create(self, validated_data):
         code = validated_data.get('code')
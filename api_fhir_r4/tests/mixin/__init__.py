@@ -2,6 +2,9 @@ import json
 from pathlib import Path
 
 from django.test import TestCase
+from rest_framework.utils.encoders import JSONEncoder
+
+from api_fhir_r4.converters import ReferenceConverterMixin
 from api_fhir_r4.tests.utils import load_and_replace_json
 
 
@@ -50,6 +53,45 @@ class ConvertToFhirTestMixin:
         self.verify_fhir_instance(fhir_instance)
 
 
+class ConvertToFhirDictTestMixin:
+    """
+    Fast emit conformance, `to_fhir_dict` has to render the same JSON as `to_fhir_obj(...).dict()`.
+    """
+    @property
+    def converter(self):
+        raise NotImplementedError()
+
+    def create_test_imis_instance(self):
+        raise NotImplementedError()
+
+    def test_to_fhir_dict(self):
+        imis_instance = self.create_test_imis_instance()
+        for reference_type in (ReferenceConverterMixin.UUID_REFERENCE_TYPE,
+                               ReferenceConverterMixin.DB_ID_REFERENCE_TYPE):
+            expected = self.converter.to_fhir_obj(imis_instance, reference_type).dict()
+            fhir_dict = self.converter.to_fhir_dict(imis_instance, reference_type)
+            self.assertEqual(json.dumps(expected, cls=JSONEncoder), json.dumps(fhir_dict, cls=JSONEncoder))
+
+
+class ConvertToFhirBatchTestMixin:
+    """
+    Batch conformance, converting the object in a batch (`to_fhir_objs`) has to give the same result as `to_fhir_obj`.
+    """
+    @property
+    def converter(self):
+        raise NotImplementedError()
+
+    def create_test_imis_instance(self):
+        raise NotImplementedError()
+
+    def test_to_fhir_objs(self):
+        imis_instance = self.create_test_imis_instance()
+        expected = self.converter.to_fhir_obj(imis_instance, ReferenceConverterMixin.UUID_REFERENCE_TYPE).dict()
+        fhir_objs = self.converter.to_fhir_objs([imis_instance], ReferenceConverterMixin.UUID_REFERENCE_TYPE)
+        self.assertEqual(len(fhir_objs), 1)
+        self.assertEqual(json.dumps(expected, cls=JSONEncoder), json.dumps(fhir_objs[0].dict(), cls=JSONEncoder))
+
+
 class ConvertJsonToFhirTestMixin:
     sub_str = {}
     @property
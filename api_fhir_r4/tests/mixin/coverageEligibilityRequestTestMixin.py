@@ -49,10 +49,10 @@ class CoverageEligibilityRequestTestMixin(GenericTestMixin):
             self._TEST_ITEM_CODE
         )
 
-    def create_test_imis_instance(self):
+    def create_test_imis_instance(self, prod_id=None):
         return EligibilityResponse(
             eligibility_request=self._TEST_ELIGIBILITY_REQUEST,
-            prod_id=None,
+            prod_id=prod_id,
             total_admissions_left=self._TEST_TOTAL_ADMISSIONS,
             total_visits_left=self._TEST_TOTAL_VISITS,
             total_consultations_left=self._TEST_TOTAL_CONSULTATIONS,
@@ -24,3 +24,12 @@ class CodeSystemDiagnosisAPITests(GenericFhirAPITestMixin, APITestCase):
         self.assertEqual(response_data['count'], self._EXPECTED_COUNT)
         self.assertEqual(response_data['name'], 'DiagnosisICD10Level1CS')
         self.assertEqual(response_data['title'], 'ICD 10 Level 1 diagnosis (Claim)')
+
+    def test_get_with_matching_etag_should_return_not_modified(self):
+        self.login()
+        response = self.client.get(self.base_url, data=None, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        response = self.client.get(self.base_url, data=None, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
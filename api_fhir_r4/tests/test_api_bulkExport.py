@@ -0,0 +1,88 @@
+import gzip
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from insuree.models import Family
+from insuree.test_helpers import create_test_insuree
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api_fhir_r4.configurations import GeneralConfiguration
+from api_fhir_r4.tests import GenericFhirAPITestMixin
+from api_fhir_r4.utils import TimeUtils
+
+
+class BulkExportAPITests(GenericFhirAPITestMixin, APITestCase):
+    base_url = GeneralConfiguration.get_base_url()
+    _TEST_INSUREE_CHFID = "BULKEXP01"
+
+    def setUp(self):
+        super(BulkExportAPITests, self).setUp()
+        self.test_insuree = create_test_insuree(custom_props={"chf_id": self._TEST_INSUREE_CHFID})
+        self.job_root_path = tempfile.mkdtemp()
+        # jobs are run within the request, the test data is not visible to other connections
+        patches = [
+            mock.patch.object(GeneralConfiguration, 'get_async_job_workers', return_value=0),
+            mock.patch.object(GeneralConfiguration, 'get_async_job_root_path', return_value=self.job_root_path),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(shutil.rmtree, self.job_root_path, True)
+
+    def test_export_requires_respond_async(self):
+        self.login()
+        response = self.client.get(self.base_url + 'Patient/$export')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_rejects_unsupported_type(self):
+        self.login()
+        response = self.client.get(self.base_url + '$export', {'_type': 'Patient,Medication'},
+                                   HTTP_PREFER='respond-async')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_patient_export(self):
+        self.login()
+        response = self.client.get(self.base_url + 'Patient/$export', {'_type': 'Patient'},
+                                   HTTP_PREFER='respond-async')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        status_response = self.client.get(response['Content-Location'])
+        self.assertEqual(status_response.status_code, status.HTTP_200_OK)
+        output = status_response.json()['output']
+        self.assertEqual([entry['type'] for entry in output], ['Patient'])
+
+        file_response = self.client.get(output[0]['url'])
+        self.assertEqual(file_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(file_response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(file_response.streaming_content)).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), output[0]['count'])
+        resources = [json.loads(line) for line in lines]
+        self.assertIn(str(self.test_insuree.uuid).lower(), [resource['id'].lower() for resource in resources])
+
+        delete_response = self.client.delete(response['Content-Location'])
+        self.assertEqual(delete_response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.client.get(response['Content-Location']).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_group_export_excludes_historical_and_out_of_scope_families(self):
+        historical_family = create_test_insuree(custom_props={"chf_id": "BULKEXP02"}).family
+        Family.objects.filter(id=historical_family.id).update(validity_to=TimeUtils.now())
+        out_of_scope_family = create_test_insuree(custom_props={"chf_id": "BULKEXP03"}).family
+        self.login()
+        # row security of the user is applied by Family.get_queryset
+        with mock.patch.object(Family, 'get_queryset',
+                               side_effect=lambda queryset, user: Family.objects.exclude(id=out_of_scope_family.id)) \
+                as get_queryset:
+            response = self.client.get(self.base_url + '$export', {'_type': 'Group'}, HTTP_PREFER='respond-async')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(get_queryset.call_args[0][1].username, self._TEST_SUPERUSER_NAME)
+
+        output = self.client.get(response['Content-Location']).json()['output']
+        file_response = self.client.get(output[0]['url'])
+        lines = gzip.decompress(b''.join(file_response.streaming_content)).decode('utf-8').splitlines()
+        exported_ids = [json.loads(line)['id'].lower() for line in lines]
+        self.assertIn(str(self.test_insuree.family.uuid).lower(), exported_ids)
+        self.assertNotIn(str(historical_family.uuid).lower(), exported_ids)
+        self.assertNotIn(str(out_of_scope_family.uuid).lower(), exported_ids)
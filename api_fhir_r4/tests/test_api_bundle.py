@@ -0,0 +1,81 @@
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from location.models import Location
+from api_fhir_r4.tests import GenericFhirAPITestMixin
+from api_fhir_r4.configurations import GeneralConfiguration
+from api_fhir_r4.tests.utils import load_and_replace_json
+from api_fhir_r4.views.fhir.location import LocationViewSet
+
+
+class BundleAPITests(GenericFhirAPITestMixin, APITestCase):
+    base_url = GeneralConfiguration.get_base_url()
+    _test_json_path = "/test/test_location.json"
+    _TEST_MUNICIPALITY_UUID = 'a82f54bf-d983-4963-a279-490312a96344'
+    _TEST_VILLAGE_CODE = "RTDTMTVT"
+    _TEST_UNKNOWN_UUID = "0c0ba0a3-0000-4000-8000-000000000000"
+
+    def setUp(self):
+        super(BundleAPITests, self).setUp()
+        parent = None
+        for code, location_type in (("RT", "R"), ("RTDT", "D"), ("R2D2", "M")):
+            parent = Location.objects.create(code=code, name="Test", type=location_type, parent=parent)
+        self._test_request_data = load_and_replace_json(
+            self._test_json_path, {self._TEST_MUNICIPALITY_UUID: parent.uuid})
+
+    def _get_bundle(self, bundle_type):
+        return {
+            "resourceType": "Bundle",
+            "type": bundle_type,
+            "entry": [
+                {"resource": self._test_request_data, "request": {"method": "POST", "url": "Location"}},
+                {"resource": self._test_request_data, "request": {"method": "POST", "url": "Unknown"}},
+            ]
+        }
+
+    def test_batch_should_process_entries_independently(self):
+        self.login()
+        response = self.client.post(self.base_url, data=self._get_bundle("batch"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response_json = response.json()
+        self.assertEqual(response_json["type"], "batch-response")
+        created, failed = response_json["entry"]
+        self.assertEqual(created["response"]["status"], "201 Created")
+        self.assertTrue(created["response"]["location"].startswith("Location/"))
+        self.assertEqual(failed["response"]["status"], "404 Not Found")
+        self.assertEqual(failed["response"]["outcome"]["resourceType"], "OperationOutcome")
+        self.assertTrue(Location.objects.filter(code=self._TEST_VILLAGE_CODE, validity_to__isnull=True).exists())
+
+    def test_batch_entry_failed_in_viewset_should_not_stop_other_entries(self):
+        self.login()
+        bundle = {
+            "resourceType": "Bundle",
+            "type": "batch",
+            "entry": [
+                {"request": {"method": "GET", "url": f"Location/{self._TEST_UNKNOWN_UUID}"}},
+                {"resource": self._test_request_data, "request": {"method": "POST", "url": "Location"}},
+            ]
+        }
+        with mock.patch.object(LocationViewSet, 'check_throttles') as check_throttles:
+            response = self.client.post(self.base_url, data=bundle, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        failed, created = response.json()["entry"]
+        self.assertEqual(failed["response"]["status"], "404 Not Found")
+        self.assertEqual(failed["response"]["outcome"]["resourceType"], "OperationOutcome")
+        self.assertEqual(created["response"]["status"], "201 Created")
+        self.assertEqual(check_throttles.call_count, 2)
+        self.assertTrue(Location.objects.filter(code=self._TEST_VILLAGE_CODE, validity_to__isnull=True).exists())
+
+    def test_transaction_should_be_rolled_back_on_error(self):
+        self.login()
+        response = self.client.post(self.base_url, data=self._get_bundle("transaction"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Location.objects.filter(code=self._TEST_VILLAGE_CODE).exists())
+
+    def test_post_should_reject_other_bundle_types(self):
+        self.login()
+        bundle = self._get_bundle("collection")
+        response = self.client.post(self.base_url, data=bundle, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,6 +1,12 @@
+import base64
 import json
 import os
+import shutil
+import tempfile
+from unittest import mock
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 
@@ -12,7 +18,7 @@ from api_fhir_r4.utils import TimeUtils
 from api_fhir_r4.tests.utils import load_and_replace_json,get_connection_payload,get_or_create_user_api
 from api_fhir_r4.utils import DbManagerUtils
 
-from claim.models import Claim, ClaimDetail
+from claim.models import Claim, ClaimAttachment, ClaimDetail
 from insuree.test_helpers import create_test_insuree
 from location.models import HealthFacility, UserDistrict
 from location.test_helpers import create_test_village, create_test_health_facility
@@ -178,6 +184,78 @@ class ClaimAPITests(GenericFhirAPITestMixin, APITestCase, LogInMixin):
                     self.assertEqual(adjudication["reason"]["coding"][0]["code"], '2')
 
 
+    def test_post_respond_async_should_return_claim_response_by_job(self):
+        response = self.client.post(
+            GeneralConfiguration.get_base_url() + 'login/', data=get_connection_payload(self._TEST_DATA_USER), format='json'
+        )
+        token = response.json()["token"]
+        headers = {
+            "Content-Type": "application/json",
+            "HTTP_AUTHORIZATION": f"Bearer {token}",
+            "HTTP_PREFER": "respond-async",
+        }
+        job_root_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, job_root_path, True)
+        # the submission job is run within the request, the test data is not visible to other connections
+        with mock.patch.object(GeneralConfiguration, 'get_async_job_workers', return_value=0), \
+                mock.patch.object(GeneralConfiguration, 'get_async_job_root_path', return_value=job_root_path):
+            # the job is submitted once the claim is committed
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                response = self._post_claim(load_and_replace_json(self._test_json_path, self.sub_str), headers)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(len(callbacks), 1)
+            status_response = self.client.get(response['Content-Location'], **headers)
+        self.assertEqual(status_response.status_code, status.HTTP_200_OK)
+        response_json = status_response.json()
+        self.assertEqual(response_json["resourceType"], 'ClaimResponse')
+        self.assertEqual(response_json["outcome"], 'complete')
+
+    def test_post_respond_async_should_not_store_job_before_commit(self):
+        response = self.client.post(
+            GeneralConfiguration.get_base_url() + 'login/', data=get_connection_payload(self._TEST_DATA_USER), format='json'
+        )
+        headers = {
+            "Content-Type": "application/json",
+            "HTTP_AUTHORIZATION": f"Bearer {response.json()['token']}",
+            "HTTP_PREFER": "respond-async",
+        }
+        job_root_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, job_root_path, True)
+        with mock.patch.object(GeneralConfiguration, 'get_async_job_workers', return_value=0), \
+                mock.patch.object(GeneralConfiguration, 'get_async_job_root_path', return_value=job_root_path):
+            # the on commit callbacks are dropped, as they would be on rollback
+            with self.captureOnCommitCallbacks(execute=False):
+                response = self._post_claim(load_and_replace_json(self._test_json_path, self.sub_str), headers)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(os.listdir(job_root_path), [])
+
+    def test_get_claim_attachment_should_be_served_by_binary(self):
+        response = self.client.post(
+            GeneralConfiguration.get_base_url() + 'login/', data=get_connection_payload(self._TEST_DATA_USER), format='json'
+        )
+        headers = {
+            "Content-Type": "application/json",
+            "HTTP_AUTHORIZATION": f"Bearer {response.json()['token']}"
+        }
+        response = self._post_claim(load_and_replace_json(self._test_json_path, self.sub_str), headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.json())
+        claim = Claim.objects.filter(validity_to__isnull=True).order_by('-id').first()
+        content = b'test attachment content'
+        attachment = ClaimAttachment.objects.create(
+            claim=claim, title='test', filename='test.txt', mime='text/plain',
+            document=base64.b64encode(content).decode('utf-8'))
+
+        response = self.client.get(f'{self.base_url}{claim.uuid}/', **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        attachment_urls = [supporting_info['valueAttachment']['url']
+                           for supporting_info in response.json().get('supportingInfo', [])
+                           if 'valueAttachment' in supporting_info]
+        self.assertEqual(attachment_urls, [f'{GeneralConfiguration.get_base_url()}Binary/{attachment.id}'])
+
+        binary_response = self.client.get(attachment_urls[0], **headers)
+        self.assertEqual(binary_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(binary_response.streaming_content), content)
+
     def test_get_should_return_200_claim_response(self):
         # test if get ClaimResponse return 200
         response = self.client.post(
@@ -193,3 +271,29 @@ class ClaimAPITests(GenericFhirAPITestMixin, APITestCase, LogInMixin):
         response = self.client.get(GeneralConfiguration.get_base_url() + 'ClaimResponse/', data=None, format='json',
                                    **headers)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_claims_should_run_constant_number_of_queries(self):
+        response = self.client.post(
+            GeneralConfiguration.get_base_url() + 'login/', data=get_connection_payload(self._TEST_DATA_USER), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        headers = {
+            "Content-Type": "application/json",
+            "HTTP_AUTHORIZATION": f"Bearer {response.json()['token']}"
+        }
+        dataset = [
+            load_and_replace_json(self._test_json_path, self.sub_str),
+            load_and_replace_json(self._test_json_path_with_code_references, self.sub_str)
+        ]
+        for data in dataset:
+            response = self.client.post(self.base_url, data=data, format='json', **headers)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.json())
+
+        query_counts = []
+        for count in (1, 2):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.base_url, data={'_count': count, '_total': 'none'}, **headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()['entry']), count)
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
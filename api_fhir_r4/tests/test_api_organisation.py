@@ -8,6 +8,10 @@ from dataclasses import dataclass
 from core.models import User
 from rest_framework import status
 from policyholder.tests.helpers import create_test_policy_holder
+from location.test_helpers import create_test_health_facility
+from claim.test_helpers import create_test_claim_admin
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 @dataclass
 class DummyContext:
@@ -27,6 +31,9 @@ class OrganisationAPITests(GenericFhirAPITestMixin, FhirApiReadTestMixin, APITes
         cls.test_policy_holder = create_test_policy_holder()
         cls.admin_user = create_test_interactive_user(username="testLocationAdmin")
         cls.admin_token = get_token(cls.admin_user, DummyContext(user=cls.admin_user))
+        for code in ('TQHF1', 'TQHF2'):
+            test_hf = create_test_health_facility(code)
+            create_test_claim_admin(custom_props={'health_facility_id': test_hf.id})
 
 
     def test_simple_list_page_2(self):
@@ -48,6 +55,20 @@ class OrganisationAPITests(GenericFhirAPITestMixin, FhirApiReadTestMixin, APITes
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIsNotNone(response.content)        
         
+    def test_hf_list_should_run_constant_number_of_queries(self):
+        headers = {
+            "Content-Type": "application/json",
+            'HTTP_AUTHORIZATION': f"Bearer {self.admin_token}"
+        }
+        query_counts = []
+        for count in (1, 2):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.base_url, data={'type': 'prov', '_count': count}, **headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()['entry']), count)
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
     def get_or_create_user_api(self):
         user = DbManagerUtils.get_object_or_none(User, username=self._TEST_USER_NAME)
         if user is None:
@@ -259,6 +259,16 @@ class PatientAPITests(GenericFhirAPITestMixin, FhirApiReadTestMixin, APITestCase
             _("Missing fhir patient attribute: name"),
         )
 
+    def test_get_ndjson_should_stream_patients(self):
+        self.login()
+        response = self.client.get(self.base_url, data={'_format': 'ndjson', '_count': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/fhir+ndjson')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertLessEqual(len(lines), 5)
+        for line in lines:
+            self.assertEqual(json.loads(line)['resourceType'], 'Patient')
+
     def _assert_filed_mandatory(self, field):
         modified_payload = self.update_payload_missing_fhir_address_details(
             data=self._test_request_data, field=field, kind_of_address="home"
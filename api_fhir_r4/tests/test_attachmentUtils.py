@@ -0,0 +1,45 @@
+import base64
+import datetime
+import hashlib
+import os
+import tempfile
+
+from django.test import TestCase
+
+from api_fhir_r4.utils import AttachmentUtils
+
+
+class AttachmentUtilsTestCase(TestCase):
+    _TEST_CONTENT = bytes(range(256)) * 1000
+
+    def setUp(self):
+        super(AttachmentUtilsTestCase, self).setUp()
+        self.root = tempfile.TemporaryDirectory()
+        self.encoded = base64.b64encode(self._TEST_CONTENT).decode('ascii')
+
+    def tearDown(self):
+        self.root.cleanup()
+        super(AttachmentUtilsTestCase, self).tearDown()
+
+    def _read(self, path):
+        with open(os.path.join(self.root.name, path), 'rb') as file:
+            return file.read()
+
+    def test_spool_base64(self):
+        spool_path, actual_hash = AttachmentUtils.spool_base64(self.root.name, self.encoded)
+        self.assertEqual(self._read(spool_path), self._TEST_CONTENT)
+        self.assertEqual(actual_hash, hashlib.sha1(self.encoded.encode('utf-8')).hexdigest())
+        self.assertEqual(actual_hash, AttachmentUtils.sha1_hexdigest(self.encoded))
+
+    def test_spool_base64_with_line_breaks(self):
+        encoded = '\n'.join(self.encoded[i:i + 76] for i in range(0, len(self.encoded), 76))
+        spool_path, _ = AttachmentUtils.spool_base64(self.root.name, encoded)
+        self.assertEqual(self._read(spool_path), self._TEST_CONTENT)
+
+    def test_store_and_discard(self):
+        spool_path, _ = AttachmentUtils.spool_base64(self.root.name, self.encoded)
+        file_path = AttachmentUtils.store(self.root.name, spool_path, datetime.date(2024, 2, 3), 12)
+        self.assertTrue(file_path.startswith('2024/02/03/12/'))
+        self.assertEqual(self._read(file_path), self._TEST_CONTENT)
+        self.assertFalse(os.path.exists(os.path.join(self.root.name, spool_path)))
+        AttachmentUtils.discard(self.root.name, spool_path)
@@ -0,0 +1,44 @@
+import io
+
+from django.test import TestCase, RequestFactory
+
+from api_fhir_r4.views.fhir.binary import BinaryViewSet, _FileRange
+
+
+class BinaryViewSetTestCase(TestCase):
+    _TEST_ETAG = '"test-etag"'
+    _TEST_SIZE = 100
+
+    def setUp(self):
+        super(BinaryViewSetTestCase, self).setUp()
+        self.view = BinaryViewSet()
+        self.factory = RequestFactory()
+
+    def _get_range(self, **headers):
+        request = self.factory.get('/Binary/test', **headers)
+        return self.view._get_byte_range(request, self._TEST_SIZE, self._TEST_ETAG)
+
+    def test_byte_range(self):
+        self.assertIsNone(self._get_range())
+        self.assertEqual(self._get_range(HTTP_RANGE='bytes=0-9'), (0, 9))
+        self.assertEqual(self._get_range(HTTP_RANGE='bytes=90-'), (90, 99))
+        self.assertEqual(self._get_range(HTTP_RANGE='bytes=90-200'), (90, 99))
+        self.assertEqual(self._get_range(HTTP_RANGE='bytes=-10'), (90, 99))
+
+    def test_byte_range_whole_content(self):
+        # multiple ranges and not matching If-Range fall back to the whole content
+        self.assertIsNone(self._get_range(HTTP_RANGE='bytes=0-9,20-29'))
+        self.assertIsNone(self._get_range(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"other-etag"'))
+        self.assertEqual(self._get_range(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=self._TEST_ETAG), (0, 9))
+
+    def test_unsatisfiable_byte_range(self):
+        with self.assertRaises(ValueError):
+            self._get_range(HTTP_RANGE='bytes=100-')
+        with self.assertRaises(ValueError):
+            self._get_range(HTTP_RANGE='bytes=-0')
+
+    def test_file_range(self):
+        file_range = _FileRange(io.BytesIO(bytes(range(10))), 2, 5)
+        self.assertEqual(file_range.read(3), bytes([2, 3, 4]))
+        self.assertEqual(file_range.read(), bytes([5, 6]))
+        self.assertEqual(file_range.read(), b'')
@@ -0,0 +1,52 @@
+import io
+import json
+
+from django.test import TestCase
+from insuree.test_helpers import create_test_insuree
+
+from api_fhir_r4.converters import GroupConverter, PatientConverter
+from api_fhir_r4.converters.batchContext import ConverterBatchContext
+from api_fhir_r4.jobs import BulkImportService
+
+
+class BulkImportTestCase(TestCase):
+    _TEST_INSUREE_CHFID = "BULKIMP01"
+
+    def setUp(self):
+        super(BulkImportTestCase, self).setUp()
+        self.test_insuree = create_test_insuree(custom_props={"chf_id": self._TEST_INSUREE_CHFID})
+
+    def test_patient_import_batch_loads_families(self):
+        fhir_patient = {"resourceType": "Patient", "extension": [{
+            "url": "https://openimis.github.io/openimis_fhir_r4_ig/StructureDefinition/patient-group-reference",
+            "valueReference": {"reference": f"Group/{self.test_insuree.family.uuid}"}
+        }]}
+        batch_context = ConverterBatchContext([fhir_patient])
+        PatientConverter.prepare_import_batch([fhir_patient], batch_context)
+        families = batch_context.get('import_families')
+        self.assertEqual(families[self.test_insuree.family.uuid].id, self.test_insuree.family.id)
+
+    def test_group_import_batch_loads_members(self):
+        fhir_group = {"resourceType": "Group", "member": [
+            {"entity": {"reference": f"Patient/{self.test_insuree.uuid}"}}
+        ]}
+        batch_context = ConverterBatchContext([fhir_group])
+        GroupConverter.prepare_import_batch([fhir_group], batch_context)
+        insurees = batch_context.get('import_insurees')
+        self.assertEqual(insurees[('uuid', str(self.test_insuree.uuid).lower())].id, self.test_insuree.id)
+
+    def test_invalid_lines_reported_in_outcome(self):
+        lines = [
+            "not a json",
+            json.dumps({"resourceType": "Medication"}),
+            json.dumps({"resourceType": "Group", "member": [{"entity": {"reference": "Patient/UNKNOWN"}}]}),
+        ]
+        outcome_file = io.StringIO()
+        job = type('Job', (), {'id': 'test', 'set_progress': lambda self, progress: None})()
+        result = BulkImportService(None).import_ndjson(job, io.StringIO('\n'.join(lines) + '\n'), outcome_file)
+
+        self.assertEqual(result['processed'], 3)
+        self.assertEqual(result['output'], [])
+        self.assertEqual(result['error'][0]['count'], 3)
+        outcomes = [json.loads(line) for line in outcome_file.getvalue().splitlines()]
+        self.assertEqual([outcome['issue'][0]['diagnostics'] for outcome in outcomes], ['line 1', 'line 2', 'line 3'])
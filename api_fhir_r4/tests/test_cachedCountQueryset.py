@@ -0,0 +1,32 @@
+from django.test import TestCase
+
+from api_fhir_r4.cache import ModelVersions
+from api_fhir_r4.paginations import CachedCountQueryset, CountCacheStatistics
+from insuree.models import Insuree
+from insuree.test_helpers import create_test_insuree
+
+
+class CachedCountQuerysetTestCase(TestCase):
+    _TEST_SCOPE = '/api_fhir_r4/Patient/|1|'
+
+    def setUp(self):
+        ModelVersions.track('insuree.Insuree', 'insuree.Family')
+        CountCacheStatistics.reset()
+
+    def _count(self):
+        queryset = Insuree.objects.filter(validity_to__isnull=True)
+        return CachedCountQueryset(queryset, scope=self._TEST_SCOPE).count()
+
+    def test_count_is_cached(self):
+        first = self._count()
+        second = self._count()
+        self.assertEqual(first, second)
+        self.assertEqual(CountCacheStatistics.get_statistics()['hits'], 1)
+        self.assertEqual(CountCacheStatistics.get_statistics()['misses'], 1)
+
+    def test_count_invalidated_on_insert(self):
+        before = self._count()
+        create_test_insuree()
+        after = self._count()
+        self.assertEqual(before + 1, after)
+        self.assertEqual(CountCacheStatistics.get_statistics()['misses'], 2)
@@ -1,13 +1,15 @@
 from api_fhir_r4.converters.claimConverter import ClaimConverter
 from api_fhir_r4.models import ClaimV2 as Claim
 from api_fhir_r4.tests import ClaimTestMixin
-from api_fhir_r4.tests.mixin import ConvertToImisTestMixin, ConvertToFhirTestMixin, ConvertJsonToFhirTestMixin
+from api_fhir_r4.tests.mixin import ConvertToImisTestMixin, ConvertToFhirTestMixin, ConvertJsonToFhirTestMixin, \
+    ConvertToFhirDictTestMixin
 
 
 class ClaimConverterTestCase(ClaimTestMixin,
                              ConvertToImisTestMixin,
                              ConvertToFhirTestMixin,
-                             ConvertJsonToFhirTestMixin):
+                             ConvertJsonToFhirTestMixin,
+                             ConvertToFhirDictTestMixin):
     converter = ClaimConverter
     fhir_resource = Claim
     json_repr = 'test/test_claim.json'
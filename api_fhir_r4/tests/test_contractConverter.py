@@ -2,13 +2,16 @@ from api_fhir_r4.converters import ContractConverter
 from api_fhir_r4.tests import ContractTestMixin
 from fhir.resources.R4B.contract import Contract
 
-from api_fhir_r4.tests.mixin import ConvertToImisTestMixin, ConvertToFhirTestMixin, ConvertJsonToFhirTestMixin
+from api_fhir_r4.tests.mixin import ConvertToImisTestMixin, ConvertToFhirTestMixin, ConvertJsonToFhirTestMixin, \
+    ConvertToFhirDictTestMixin, ConvertToFhirBatchTestMixin
 
 
 class ContractConverterTestCase(ContractTestMixin,
                                 ConvertToImisTestMixin,
                                 ConvertToFhirTestMixin,
-                                ConvertJsonToFhirTestMixin):
+                                ConvertJsonToFhirTestMixin,
+                                ConvertToFhirDictTestMixin,
+                                ConvertToFhirBatchTestMixin):
     converter = ContractConverter
     fhir_resource = Contract
     json_repr = 'test/test_contract.json'
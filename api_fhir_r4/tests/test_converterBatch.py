@@ -0,0 +1,44 @@
+from django.test import TestCase
+
+from api_fhir_r4.converters import BaseFHIRConverter
+
+
+class ConverterBatchTestCase(TestCase):
+
+    class TestConverter(BaseFHIRConverter):
+        prepared_batches = 0
+
+        @classmethod
+        def prepare_batch(cls, imis_objs, batch_context):
+            cls.prepared_batches += 1
+            batch_context.set('squares', {obj: obj * obj for obj in imis_objs})
+
+        @classmethod
+        def to_fhir_obj(cls, obj, reference_type):
+            squares = cls.get_batch_lookup('squares')
+            return squares[obj] if squares is not None else obj * obj
+
+    class NestedTestConverter(BaseFHIRConverter):
+
+        @classmethod
+        def to_fhir_obj(cls, obj, reference_type):
+            return cls.get_batch_lookup('squares')
+
+    def setUp(self):
+        super(ConverterBatchTestCase, self).setUp()
+        self.TestConverter.prepared_batches = 0
+
+    def test_batch_lookups_shared_by_batch(self):
+        result = self.TestConverter.to_fhir_objs(iter([1, 2, 3]), None)
+        self.assertEqual(result, [1, 4, 9])
+        self.assertEqual(self.TestConverter.prepared_batches, 1)
+
+    def test_batch_context_not_available_outside_batch(self):
+        self.TestConverter.to_fhir_objs([1], None)
+        self.assertIsNone(self.TestConverter.get_batch_context())
+        self.assertIsNone(self.TestConverter.get_batch_lookup('squares'))
+
+    def test_batch_lookups_not_visible_to_nested_converter(self):
+        with self.TestConverter.batch([1]):
+            self.assertIsNotNone(self.TestConverter.get_batch_lookup('squares'))
+            self.assertIsNone(self.NestedTestConverter.to_fhir_obj(1, None))
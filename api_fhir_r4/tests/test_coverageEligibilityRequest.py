@@ -1,5 +1,12 @@
 import json
 import os
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import DatabaseError
+
+from policy.test_helpers import create_test_policy
+from product.test_helpers import create_test_product
 
 from api_fhir_r4.converters import CoverageEligibilityRequestConverter
 from api_fhir_r4.tests import CoverageEligibilityRequestTestMixin
@@ -35,3 +42,36 @@ class CoverageEligibilityRequestConverterTestCase(CoverageEligibilityRequestTest
         dict_coverage_eligibility_response = json.loads(self._test_coverage_eligibility_response_json_representation)
         fhir_coverage_eligibility_response = CoverageEligibilityResponse(**dict_coverage_eligibility_response)
         self.verify_fhir_instance(fhir_coverage_eligibility_response)
+
+    def test_to_fhir_obj_runs_enquiry_once(self):
+        product = create_test_product('ELIGPRD', valid=True, custom_props=None)
+        policies = [create_test_policy(product, self._TEST_INSUREE) for _ in range(2)]
+        by_insuree_response = SimpleNamespace(items=[
+            SimpleNamespace(status='A', policy_uuid=policy.uuid, start_date=policy.start_date,
+                            expiry_date=policy.expiry_date)
+            for policy in policies
+        ])
+        with mock.patch.object(CoverageEligibilityRequestConverter, 'get_service_item_enquiry',
+                               return_value=self.create_test_imis_instance(product.id)) as enquiry:
+            fhir_response = CoverageEligibilityRequestConverter.to_fhir_obj(
+                by_insuree_response, self._TEST_ELIGIBILITY_REQUEST)
+
+        enquiry.assert_called_once_with(self._TEST_ELIGIBILITY_REQUEST)
+        self.assertEqual(len(fhir_response.insurance), 2)
+        self.assertEqual({insurance.coverage.display for insurance in fhir_response.insurance},
+                         {str(policy.uuid) for policy in policies})
+        self.verify_fhir_instance(fhir_response)
+
+    def test_to_fhir_obj_failed_enquiry(self):
+        product = create_test_product('ELIGFAIL', valid=True, custom_props=None)
+        policy = create_test_policy(product, self._TEST_INSUREE)
+        by_insuree_response = SimpleNamespace(items=[SimpleNamespace(
+            status='A', policy_uuid=policy.uuid, start_date=policy.start_date, expiry_date=policy.expiry_date)])
+        with mock.patch('api_fhir_r4.converters.coverageEligibilityRequestConverter.connection') as connection:
+            connection.cursor.side_effect = DatabaseError('uspServiceItemEnquiry failed')
+            fhir_response = CoverageEligibilityRequestConverter.to_fhir_obj(
+                by_insuree_response, self._TEST_ELIGIBILITY_REQUEST)
+
+        self.assertEqual(len(fhir_response.insurance), 1)
+        # no product, no benefit item
+        self.assertEqual(fhir_response.insurance[0].item, [])
@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from api_fhir_r4.converters import ElementsProjection
+
+
+class ElementsProjectionTestCase(TestCase):
+    _TEST_PATIENT = {
+        'resourceType': 'Patient',
+        'id': 'test-id',
+        'identifier': [{'value': '123'}],
+        'name': [{'family': 'TEST'}],
+        'address': [{'text': 'TEST'}],
+        'photo': [{'title': 'TEST'}],
+    }
+
+    @staticmethod
+    def _build_request(**query_params):
+        request = MagicMock()
+        request.query_params = query_params
+        return request
+
+    def test_no_projection(self):
+        self.assertIsNone(ElementsProjection.from_request(self._build_request()))
+        self.assertIsNone(ElementsProjection.from_request(self._build_request(_summary='false')))
+
+    def test_invalid_summary(self):
+        with self.assertRaises(ValidationError):
+            ElementsProjection.from_request(self._build_request(_summary='everything'))
+
+    def test_elements(self):
+        projection = ElementsProjection.from_request(self._build_request(_elements='identifier, name'))
+        self.assertTrue(projection.includes('id'))
+        self.assertTrue(projection.includes('name'))
+        self.assertFalse(projection.includes('address'))
+
+        projected = projection.apply(self._TEST_PATIENT)
+        self.assertEqual(set(projected.keys()), {'resourceType', 'id', 'identifier', 'name', 'meta'})
+        self.assertEqual(projected['meta']['tag'][0]['code'], 'SUBSETTED')
+
+    def test_summary(self):
+        projection = ElementsProjection.from_request(self._build_request(_summary='true'))
+        summary_elements = ('identifier', 'name', 'address')
+        self.assertTrue(projection.includes('address', summary_elements))
+        self.assertFalse(projection.includes('photo', summary_elements))
+        self.assertTrue(projection.includes('photo'))
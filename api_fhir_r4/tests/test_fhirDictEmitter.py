@@ -0,0 +1,66 @@
+from django.test import TestCase
+from fhir.resources.R4B.address import Address
+from fhir.resources.R4B.codeableconcept import CodeableConcept
+from fhir.resources.R4B.coding import Coding
+from fhir.resources.R4B.extension import Extension
+from fhir.resources.R4B.humanname import HumanName
+from fhir.resources.R4B.patient import Patient
+
+from api_fhir_r4.converters import FhirDictEmitter
+
+
+class FhirDictEmitterTestCase(TestCase):
+
+    def test_emit_constructed_resource(self):
+        patient = Patient.construct()
+        patient.id = 'test-id'
+        patient.active = False
+        name = HumanName.construct()
+        name.family = 'TEST_LAST_NAME'
+        name.given = ['TEST_OTHER_NAME']
+        patient.name = [name]
+        extension = Extension.construct()
+        extension.url = 'https://openimis.github.io/openimis_fhir_r4_ig/StructureDefinition/patient-is-head'
+        extension.valueBoolean = False
+        patient.extension = [extension]
+        patient.telecom = []
+        patient.maritalStatus = CodeableConcept.construct()
+        patient.maritalStatus.coding = [Coding.construct(system='test-system', code='D')]
+        patient.address = [Address(**{'type': 'physical', 'city': 'TEST_CITY',
+                                      'extension': [{'url': 'address-municipality', 'valueString': 'TEST'}]})]
+
+        emitted = FhirDictEmitter.emit(patient)
+
+        self.assertEqual(patient.dict(), emitted)
+        self.assertEqual(list(patient.dict().keys()), list(emitted.keys()))
+        self.assertNotIn('telecom', emitted)
+
+    def test_emit_parsed_resource_with_primitive_extension(self):
+        patient = Patient.parse_obj({
+            'resourceType': 'Patient',
+            'id': 'test-id',
+            'birthDate': '1990-03-24',
+            '_birthDate': {'extension': [{'url': 'test-url', 'valueString': 'test'}]},
+            'contained': [{'resourceType': 'Patient', 'id': 'contained-id'}]
+        })
+
+        self.assertEqual(patient.dict(), FhirDictEmitter.emit(patient))
+
+    def test_construct_from_emitted_dict(self):
+        patient_dict = {
+            'resourceType': 'Patient',
+            'id': 'test-id',
+            'extension': [{'url': 'test-url', 'valueBoolean': False}],
+            'name': [{'family': 'TEST_LAST_NAME', 'given': ['TEST_OTHER_NAME']}],
+            'birthDate': '1990-03-24',
+            'contained': [{'resourceType': 'Organization', 'id': 'contained-id', 'name': 'TEST_NAME'}]
+        }
+
+        patient = FhirDictEmitter.construct(Patient, patient_dict)
+
+        self.assertIsInstance(patient.name[0], HumanName)
+        self.assertEqual(patient.name[0].given, ['TEST_OTHER_NAME'])
+        self.assertIsInstance(patient.extension[0], Extension)
+        self.assertEqual(patient.birthDate.isoformat(), '1990-03-24')
+        self.assertEqual(patient.contained[0].resource_type, 'Organization')
+        self.assertEqual(Patient.parse_obj(patient_dict).dict(), FhirDictEmitter.emit(patient))
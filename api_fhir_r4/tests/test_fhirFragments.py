@@ -0,0 +1,53 @@
+import copy
+
+from django.test import TestCase
+
+from api_fhir_r4.configurations import ModuleConfiguration, R4IdentifierConfig
+from api_fhir_r4.converters import BaseFHIRConverter, FhirFragments
+from api_fhir_r4.defaultConfig import DEFAULT_CFG
+
+
+class FhirFragmentsTestCase(TestCase):
+    _TEST_BASE_URL = "https://test.openimis.org/fhir_r4_ig/"
+
+    def tearDown(self):
+        ModuleConfiguration.build_configuration(DEFAULT_CFG)
+        FhirFragments.clear()
+
+    def test_identifier_type_not_shared(self):
+        first = BaseFHIRConverter.build_fhir_identifier(
+            'first', R4IdentifierConfig.get_fhir_identifier_type_system(), R4IdentifierConfig.get_fhir_uuid_type_code())
+        second = BaseFHIRConverter.build_fhir_identifier(
+            'second', R4IdentifierConfig.get_fhir_identifier_type_system(), R4IdentifierConfig.get_fhir_uuid_type_code())
+
+        self.assertIsNot(first.type, second.type)
+        self.assertIsNot(first.type.coding[0], second.type.coding[0])
+        self.assertEqual(first.type.coding[0].code, R4IdentifierConfig.get_fhir_uuid_type_code())
+        self.assertEqual(
+            BaseFHIRConverter.build_codeable_concept(
+                R4IdentifierConfig.get_fhir_uuid_type_code(), R4IdentifierConfig.get_fhir_identifier_type_system()
+            ).dict(),
+            first.type.dict()
+        )
+
+        first.type.coding[0].code = 'modified'
+        self.assertEqual(second.type.coding[0].code, R4IdentifierConfig.get_fhir_uuid_type_code())
+
+    def test_codeable_concept_dict_not_shared(self):
+        first = FhirFragments.codeable_concept_dict('code', 'system', 'display')
+        first['coding'][0]['code'] = 'modified'
+        self.assertEqual(FhirFragments.codeable_concept_dict('code', 'system', 'display')['coding'][0]['code'], 'code')
+
+    def test_fragments_rebuilt_on_configuration_change(self):
+        url = FhirFragments.structure_definition_url('patient-is-head')
+        self.assertEqual(url, f"{DEFAULT_CFG['base_url']}StructureDefinition/patient-is-head")
+
+        cfg = copy.deepcopy(DEFAULT_CFG)
+        cfg['base_url'] = self._TEST_BASE_URL
+        ModuleConfiguration.build_configuration(cfg)
+        # configuration is checked once per batch or conversion
+        self.assertEqual(FhirFragments.structure_definition_url('patient-is-head'), url)
+        FhirFragments.refresh()
+
+        self.assertEqual(FhirFragments.structure_definition_url('patient-is-head'),
+                         f"{self._TEST_BASE_URL}StructureDefinition/patient-is-head")
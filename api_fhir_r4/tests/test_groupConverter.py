@@ -2,13 +2,15 @@ from api_fhir_r4.converters import GroupConverter
 
 from fhir.resources.R4B.group import Group
 from api_fhir_r4.tests import GroupTestMixin
-from api_fhir_r4.tests.mixin import ConvertToImisTestMixin, ConvertToFhirTestMixin, ConvertJsonToFhirTestMixin
+from api_fhir_r4.tests.mixin import ConvertToImisTestMixin, ConvertToFhirTestMixin, ConvertJsonToFhirTestMixin, \
+    ConvertToFhirBatchTestMixin
 
 
 class GroupConverterTestCase(GroupTestMixin,
                              ConvertToImisTestMixin,
                              ConvertToFhirTestMixin,
-                             ConvertJsonToFhirTestMixin):
+                             ConvertJsonToFhirTestMixin,
+                             ConvertToFhirBatchTestMixin):
     converter = GroupConverter
     fhir_resource = Group
     json_repr = 'test/test_group.json'
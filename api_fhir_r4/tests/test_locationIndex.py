@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.test import TestCase
+from location.test_helpers import create_test_village
+
+from api_fhir_r4.cache import LocationIndex, ModelVersions
+from api_fhir_r4.configurations import GeneralConfiguration
+from api_fhir_r4.converters import LocationConverter, ReferenceConverterMixin
+
+
+class LocationIndexTestCase(TestCase):
+    _TEST_VILLAGE_CODE = "RTDTMTVI"
+    _TEST_VILLAGE_NAME = "TEST_INDEX_VILLAGE"
+
+    def setUp(self):
+        super(LocationIndexTestCase, self).setUp()
+        self.test_village = create_test_village(
+            custom_props={"code": self._TEST_VILLAGE_CODE, "name": self._TEST_VILLAGE_NAME})
+        self.test_ward = self.test_village.parent
+        self.test_district = self.test_ward.parent
+        self.test_region = self.test_district.parent
+        LocationIndex.invalidate()
+
+    def tearDown(self):
+        LocationIndex.invalidate()
+        super(LocationIndexTestCase, self).tearDown()
+
+    def test_ancestors(self):
+        node = LocationIndex.get_node(code=self._TEST_VILLAGE_CODE)
+        self.assertEqual(
+            [ancestor.id for ancestor in node.ancestors],
+            [self.test_ward.id, self.test_district.id, self.test_region.id]
+        )
+        self.assertIs(LocationIndex.get_node(uuid=self.test_village.uuid), node)
+        self.assertIs(LocationIndex.get_node(id=self.test_village.id), node)
+
+    def test_address_without_queries(self):
+        LocationIndex.get_node(id=self.test_village.id)
+        with self.assertNumQueries(0):
+            names = LocationConverter.get_location_ancestor_names(self.test_village, 3)
+            location = LocationIndex.get_location(uuid=self.test_village.uuid)
+        self.assertEqual(names, [self.test_ward.name, self.test_district.name, self.test_region.name])
+        self.assertEqual(location.pk, self.test_village.pk)
+        self.assertEqual(location.parent_id, self.test_ward.id)
+
+    def test_part_of(self):
+        LocationIndex.get_node(id=self.test_village.id)
+        village = LocationIndex.get_location(id=self.test_village.id)
+        with self.assertNumQueries(0):
+            fhir_location = LocationConverter.to_fhir_obj(village, ReferenceConverterMixin.CODE_REFERENCE_TYPE)
+        self.assertEqual(fhir_location.partOf.reference, f'Location/{self.test_ward.code}')
+
+    def test_invalidated_on_save(self):
+        LocationIndex.get_node(id=self.test_village.id)
+        self.test_village.name = "TEST_INDEX_RENAMED"
+        self.test_village.save()
+        self.assertEqual(LocationIndex.get_node(id=self.test_village.id).name, "TEST_INDEX_RENAMED")
+
+    def test_rebuilt_on_version_change(self):
+        # change made by another worker, no signal received by this process
+        LocationIndex.get_node(id=self.test_village.id)
+        type(self.test_village).objects.filter(id=self.test_village.id).update(name="TEST_INDEX_OTHER_WORKER")
+        self.assertEqual(LocationIndex.get_node(id=self.test_village.id).name, self._TEST_VILLAGE_NAME)
+        with mock.patch.object(LocationIndex, '_get_version', return_value='changed'), \
+                mock.patch.object(GeneralConfiguration, 'get_model_version_check_interval', return_value=0):
+            LocationIndex._next_version_check = 0
+            self.assertEqual(LocationIndex.get_node(id=self.test_village.id).name, "TEST_INDEX_OTHER_WORKER")
+
+    def test_version_checked_once_per_interval(self):
+        LocationIndex.get_node(id=self.test_village.id)
+        with mock.patch.object(LocationIndex, '_get_version') as get_version:
+            LocationIndex.get_node(id=self.test_village.id)
+            LocationIndex.find_nodes(self._TEST_VILLAGE_NAME)
+        get_version.assert_not_called()
+
+    def test_find_nodes(self):
+        nodes = LocationIndex.find_nodes(self._TEST_VILLAGE_NAME, parent_name=self.test_ward.name, type='V')
+        self.assertEqual([node.id for node in nodes], [self.test_village.id])
+        self.assertEqual(LocationIndex.find_nodes(self._TEST_VILLAGE_NAME, type='D'), [])
+        self.assertEqual(LocationIndex.find_nodes(self._TEST_VILLAGE_NAME, parent_name='OTHER PARENT'), [])
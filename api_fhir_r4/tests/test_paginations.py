@@ -0,0 +1,136 @@
+import datetime
+import json
+import logging
+import os
+import timeit
+import uuid
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from insuree.models import Insuree
+from rest_framework.exceptions import ValidationError
+
+from api_fhir_r4.paginations import FhirBundleResultsSetPagination, UncountedPage
+from api_fhir_r4.utils import DbManagerUtils
+
+logger = logging.getLogger(__name__)
+
+
+class FhirBundleResultsSetPaginationCursorTestCase(TestCase):
+
+    def setUp(self):
+        self.pagination = FhirBundleResultsSetPagination()
+
+    def test_cursor_round_trip(self):
+        obj = MagicMock()
+        obj.validity_from = datetime.datetime(2021, 5, 4, 10, 30, 0)
+        obj.id = 42
+        encoded = self.pagination.encode_cursor('validity_from', obj)
+        value, last_id = self.pagination.decode_cursor(encoded)
+        self.assertEqual(value, '2021-05-04T10:30:00')
+        self.assertEqual(last_id, 42)
+
+    def test_empty_cursor_starts_from_first_page(self):
+        self.assertIsNone(self.pagination.decode_cursor(''))
+
+    def test_invalid_cursor_raises_validation_error(self):
+        with self.assertRaises(ValidationError):
+            self.pagination.decode_cursor('not-a-cursor')
+
+    def test_descending_cursor_condition(self):
+        condition = self.pagination.build_cursor_condition('-validity_from', ('2021-05-04T10:30:00', 42))
+        self.assertIn(('validity_from__lt', '2021-05-04T10:30:00'), condition.children)
+
+
+class BundlePaginationTestMixin(object):
+    _TEST_URL = 'http://testserver/api_fhir_r4/Patient/?_count=2&page-offset=2'
+
+    def _build_pagination(self, total):
+        pagination = FhirBundleResultsSetPagination()
+        pagination.request = MagicMock()
+        pagination.request.build_absolute_uri.return_value = self._TEST_URL
+        pagination.page = MagicMock()
+        pagination.page.paginator.count = total
+        pagination.get_next_link = MagicMock(return_value=self._TEST_URL.replace('page-offset=2', 'page-offset=3'))
+        pagination.get_previous_link = MagicMock(return_value=self._TEST_URL.replace('page-offset=2', 'page-offset=1'))
+        return pagination
+
+    @staticmethod
+    def _build_test_resources(count):
+        return [{
+            'resourceType': 'Patient',
+            'id': str(uuid.uuid4()),
+            'name': [{'use': 'usual', 'family': f'TEST_{index}', 'given': ['TEST']}],
+            'gender': 'male'
+        } for index in range(count)]
+
+
+class FhirBundleResultsSetPaginationBundleTestCase(BundlePaginationTestMixin, TestCase):
+
+    def setUp(self):
+        self.pagination = self._build_pagination(total=5)
+
+    def test_dict_bundle_matches_validated_bundle(self):
+        data = self._build_test_resources(2)
+        expected = json.loads(self.pagination.build_bundle_set(data).json())
+        actual = json.loads(json.dumps(self.pagination.build_bundle_set_dict(data)))
+        self.assertEqual(expected, actual)
+
+    def test_dict_bundle_without_entries(self):
+        bundle = self.pagination.build_bundle_set_dict([])
+        self.assertNotIn('entry', bundle)
+        self.assertEqual(bundle['total'], 5)
+
+
+@skipUnless(os.environ.get('FHIR_BENCHMARK'), 'Set FHIR_BENCHMARK=1 to run searchset bundle benchmark')
+class FhirBundleResultsSetPaginationBenchmark(BundlePaginationTestMixin, TestCase):
+    _PAGE_SIZES = [10, 100, 500]
+    _REPEAT = 20
+
+    def test_bundle_assembly_benchmark(self):
+        for page_size in self._PAGE_SIZES:
+            pagination = self._build_pagination(total=page_size * 10)
+            data = self._build_test_resources(page_size)
+            validated = timeit.timeit(lambda: pagination.build_bundle_set(data).dict(), number=self._REPEAT)
+            plain = timeit.timeit(lambda: pagination.build_bundle_set_dict(data), number=self._REPEAT)
+            logger.info(f'_count={page_size}: validated {validated / self._REPEAT * 1000:.2f} ms, '
+                        f'plain dict {plain / self._REPEAT * 1000:.2f} ms, x{validated / plain:.1f}')
+
+
+class FhirBundleResultsSetPaginationTotalTestCase(TestCase):
+    _TEST_URL = 'http://testserver/api_fhir_r4/Patient/?_total=none&page-offset=2'
+
+    def setUp(self):
+        self.pagination = FhirBundleResultsSetPagination()
+        self.pagination.request = MagicMock()
+        self.pagination.request.build_absolute_uri.return_value = self._TEST_URL
+
+    def test_invalid_total_mode(self):
+        request = MagicMock()
+        request.query_params = {'_total': 'sometimes'}
+        with self.assertRaises(ValidationError):
+            self.pagination.get_total_mode(request)
+
+    def test_links_without_total(self):
+        self.pagination.page = UncountedPage([{'id': 1}], 2, has_next_page=True)
+        bundle = self.pagination.build_bundle_set_dict([])
+        self.assertNotIn('total', bundle)
+        relations = [link['relation'] for link in bundle['link']]
+        self.assertEqual(relations, ['self', 'next', 'previous'])
+        self.assertIn('page-offset%3D3', bundle['link'][1]['url'])
+
+    def test_last_page_without_total(self):
+        self.pagination.page = UncountedPage([{'id': 1}], 2, has_next_page=False, count=11)
+        bundle = self.pagination.build_bundle_set_dict([])
+        self.assertEqual(bundle['total'], 11)
+        relations = [link['relation'] for link in bundle['link']]
+        self.assertEqual(relations, ['self', 'previous'])
+
+    def test_filtered_estimate_not_from_table_statistics(self):
+        # MS SQL table statistics count history rows too, filtered querysets are counted
+        queryset = Insuree.objects.filter(validity_to__isnull=True)
+        db_connection = MagicMock(vendor='microsoft')
+        with patch('api_fhir_r4.utils.dbManagerUtils.connections', {queryset.db: db_connection}):
+            self.assertEqual(DbManagerUtils.get_estimated_count(queryset), queryset.count())
+        db_connection.cursor.assert_not_called()
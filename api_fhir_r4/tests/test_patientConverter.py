@@ -4,13 +4,15 @@ from api_fhir_r4.converters import PatientConverter
 
 from fhir.resources.R4B.patient import Patient
 from api_fhir_r4.tests import PatientTestMixin
-from api_fhir_r4.tests.mixin import ConvertToFhirTestMixin, ConvertToImisTestMixin, ConvertJsonToFhirTestMixin
+from api_fhir_r4.tests.mixin import ConvertToFhirTestMixin, ConvertToImisTestMixin, ConvertJsonToFhirTestMixin, \
+    ConvertToFhirDictTestMixin
 
 
 class PatientConverterTestCase(PatientTestMixin,
                                ConvertToFhirTestMixin,
                                ConvertToImisTestMixin,
-                               ConvertJsonToFhirTestMixin):
+                               ConvertJsonToFhirTestMixin,
+                               ConvertToFhirDictTestMixin):
     converter = PatientConverter
     fhir_resource = Patient
     json_repr = 'test/test_patient.json'
@@ -0,0 +1,53 @@
+from django.test import TestCase
+from medical.test_helpers import create_test_item, create_test_service
+from product.test_helpers import create_test_product, create_test_product_item, create_test_product_service
+
+from api_fhir_r4.cache import ProductCoverageCache
+from api_fhir_r4.utils import TimeUtils
+
+
+class ProductCoverageCacheTestCase(TestCase):
+    _TEST_PRODUCT_CODE = "TCOV1"
+    _TEST_ITEM_CODE = "TCI01"
+    _TEST_SERVICE_CODE = "TCS01"
+
+    def setUp(self):
+        super(ProductCoverageCacheTestCase, self).setUp()
+        self.test_product = create_test_product(self._TEST_PRODUCT_CODE, valid=True)
+        self.test_item = create_test_item('D', custom_props={"code": self._TEST_ITEM_CODE})
+        self.test_service = create_test_service('D', custom_props={"code": self._TEST_SERVICE_CODE})
+        create_test_product_item(self.test_product, self.test_item)
+        ProductCoverageCache.invalidate()
+
+    def tearDown(self):
+        ProductCoverageCache.invalidate()
+        super(ProductCoverageCacheTestCase, self).tearDown()
+
+    def test_coverage_loaded_once(self):
+        coverage = ProductCoverageCache.get(self.test_product.id)
+        self.assertEqual(list(coverage.items), [self._TEST_ITEM_CODE])
+        self.assertEqual(coverage.services, {})
+        with self.assertNumQueries(0):
+            self.assertIs(ProductCoverageCache.get(self.test_product.id), coverage)
+
+    def test_invalidated_on_product_service_change(self):
+        ProductCoverageCache.get(self.test_product.id)
+        create_test_product_service(self.test_product, self.test_service)
+        coverage = ProductCoverageCache.get(self.test_product.id)
+        self.assertEqual(coverage.services[self._TEST_SERVICE_CODE].id, self.test_service.id)
+
+    def test_invalidated_on_item_change(self):
+        ProductCoverageCache.get(self.test_product.id)
+        self.test_item.name = "TEST COVERED ITEM RENAMED"
+        self.test_item.save()
+        coverage = ProductCoverageCache.get(self.test_product.id)
+        self.assertEqual(coverage.items[self._TEST_ITEM_CODE].name, "TEST COVERED ITEM RENAMED")
+
+    def test_historical_rows_only_in_codes(self):
+        historical_item = create_test_item('D', custom_props={"code": "TCI02"})
+        create_test_product_item(self.test_product, historical_item,
+                                 custom_props={"validity_to": TimeUtils.now()})
+        ProductCoverageCache.invalidate()
+        coverage = ProductCoverageCache.get(self.test_product.id)
+        self.assertEqual(list(coverage.items), [self._TEST_ITEM_CODE])
+        self.assertEqual(coverage.item_codes, [self._TEST_ITEM_CODE, "TCI02"])
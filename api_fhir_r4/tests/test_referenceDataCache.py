@@ -0,0 +1,76 @@
+import copy
+from unittest import mock
+
+from django.test import TestCase
+from insuree.models import Profession
+
+from api_fhir_r4.cache import ModelVersions, ReferenceDataCache, ReferenceTable
+from api_fhir_r4.configurations import GeneralConfiguration, ModuleConfiguration
+from api_fhir_r4.defaultConfig import DEFAULT_CFG
+from api_fhir_r4.mapping.patientMapping import PatientProfessionMapping
+
+
+class ReferenceDataCacheTestCase(TestCase):
+    _TEST_PROFESSION_ID = 99
+    _TEST_PROFESSION = 'Test profession'
+
+    def setUp(self):
+        super(ReferenceDataCacheTestCase, self).setUp()
+        ReferenceDataCache.register('insuree.Profession')
+        ReferenceDataCache.clear()
+
+    def tearDown(self):
+        ReferenceDataCache.clear()
+        ModuleConfiguration.build_configuration(DEFAULT_CFG)
+        super(ReferenceDataCacheTestCase, self).tearDown()
+
+    def test_table_lookup(self):
+        table = ReferenceTable([
+            Profession(id=1, profession='First'),
+            Profession(id=2, profession='Second'),
+        ])
+        self.assertEqual(table.lookup('id', 'profession'), {'1': 'First', '2': 'Second'})
+        self.assertIs(table.lookup('id', 'profession'), table.lookup('id', 'profession'))
+        self.assertEqual(table.get('id', 2).profession, 'Second')
+        self.assertIsNone(table.get('id', 3))
+
+    def test_table_loaded_once(self):
+        table = ReferenceDataCache.get_table('insuree.Profession')
+        with self.assertNumQueries(0):
+            self.assertIs(ReferenceDataCache.get_table('insuree.Profession'), table)
+            PatientProfessionMapping.load()
+
+    def test_invalidated_on_save(self):
+        ReferenceDataCache.get_table('insuree.Profession')
+        Profession.objects.create(id=self._TEST_PROFESSION_ID, profession=self._TEST_PROFESSION)
+
+        PatientProfessionMapping.load()
+        self.assertEqual(PatientProfessionMapping.patient_profession[str(self._TEST_PROFESSION_ID)],
+                         self._TEST_PROFESSION)
+        self.assertEqual(
+            ReferenceDataCache.get('insuree.Profession', 'id', self._TEST_PROFESSION_ID).profession,
+            self._TEST_PROFESSION
+        )
+
+    def test_reloaded_after_ttl(self):
+        cfg = copy.deepcopy(DEFAULT_CFG)
+        cfg['reference_data_cache_ttl'] = 10
+        ModuleConfiguration.build_configuration(cfg)
+
+        with mock.patch('api_fhir_r4.cache.referenceData.time.monotonic', return_value=1000):
+            table = ReferenceDataCache.get_table('insuree.Profession')
+        with mock.patch('api_fhir_r4.cache.referenceData.time.monotonic', return_value=1005):
+            self.assertIs(ReferenceDataCache.get_table('insuree.Profession'), table)
+        with mock.patch('api_fhir_r4.cache.referenceData.time.monotonic', return_value=1011):
+            self.assertIsNot(ReferenceDataCache.get_table('insuree.Profession'), table)
+
+    def test_reloaded_on_version_change(self):
+        # change made by another worker, no signal received by this process
+        table = ReferenceDataCache.get_table('insuree.Profession')
+        with mock.patch.object(ModelVersions, 'get_versions') as get_versions:
+            self.assertIs(ReferenceDataCache.get_table('insuree.Profession'), table)
+        get_versions.assert_not_called()
+        ReferenceDataCache._next_version_check = 0
+        with mock.patch.object(GeneralConfiguration, 'get_model_version_check_interval', return_value=0), \
+                mock.patch.object(ModelVersions, 'get_versions', return_value={'insuree.Profession': 'changed'}):
+            self.assertIsNot(ReferenceDataCache.get_table('insuree.Profession'), table)
@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.test import TestCase
+from product.test_helpers import create_test_product
+
+from api_fhir_r4.cache import RenderedResourceCache
+from api_fhir_r4.converters import InsurancePlanConverter, ReferenceConverterMixin
+from api_fhir_r4.serializers import InsurancePlanSerializer
+
+
+class RenderedResourceCacheTestCase(TestCase):
+    _TEST_PRODUCT_CODE = "TREND"
+
+    def setUp(self):
+        super(RenderedResourceCacheTestCase, self).setUp()
+        self.test_product = create_test_product(self._TEST_PRODUCT_CODE, valid=True)
+
+    def _get_key(self):
+        object_key = RenderedResourceCache.get_object_key(
+            'InsurancePlan', self.test_product, ReferenceConverterMixin.UUID_REFERENCE_TYPE)
+        return RenderedResourceCache.get_key(object_key, InsurancePlanSerializer.rendered_from_models)
+
+    def test_insurance_plan_same_as_converter(self):
+        expected = InsurancePlanConverter.to_fhir_obj(self.test_product).dict()
+        self.assertEqual(InsurancePlanSerializer(self.test_product).data, expected)
+        # second time served from the cache
+        self.assertEqual(InsurancePlanSerializer(self.test_product).data, expected)
+
+    def test_key_changed_on_product_save(self):
+        key = self._get_key()
+        self.test_product.name = "TEST RENDERED RENAMED"
+        self.test_product.save()
+        self.assertNotEqual(self._get_key(), key)
+        self.assertEqual(InsurancePlanSerializer(self.test_product).data['name'], "TEST RENDERED RENAMED")
+
+    def test_insurance_plan_status_not_cached(self):
+        InsurancePlanSerializer(self.test_product).data
+        # the cached rendering is used but the status is computed again for the current date
+        with mock.patch.object(InsurancePlanConverter, 'get_fhir_status', return_value='retired'):
+            self.assertEqual(InsurancePlanSerializer(self.test_product).data['status'], 'retired')
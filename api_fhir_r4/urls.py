@@ -1,13 +1,12 @@
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
-from rest_framework.routers import DefaultRouter
 from openIMIS.openimisapps import openimis_apps
 
 from api_fhir_r4.views import LoginView, fhir as fhir_viewsets
 
 imis_modules = openimis_apps()
 
-router = DefaultRouter()
+router = fhir_viewsets.FHIRRouter()
 router.register(r'login', LoginView, basename="login")
 router.register(r'Subscription', fhir_viewsets.SubscriptionViewSet, basename='Subscription_R4')
 
@@ -80,6 +79,7 @@ if 'medical' in imis_modules:
 if 'claim' in imis_modules:
     router.register(r'Claim', fhir_viewsets.ClaimViewSet, basename="Claim_R4")
     router.register(r'ClaimResponse', fhir_viewsets.ClaimResponseViewSet, basename="ClaimResponse_R4")
+    router.register(r'Binary', fhir_viewsets.BinaryViewSet, basename="Binary_R4")
     router.register(r'PractitionerRole', fhir_viewsets.PractitionerRoleViewSet, basename="PractitionerRole_R4")
     router.register(r'Practitioner', fhir_viewsets.PractitionerViewSet, basename="Practitioner_R4")
     router.register(r'CommunicationRequest', fhir_viewsets.CommunicationRequestViewSet,
@@ -109,6 +109,10 @@ if 'invoice' in imis_modules:
     router.register(r'PaymentNotice', fhir_viewsets.PaymentNoticeViewSet, basename="PaymentNotice_R4")
 
 urlpatterns = [
+    path('$export', fhir_viewsets.BulkExportView.as_view(), name='bulk-export'),
+    path('$import', fhir_viewsets.BulkImportView.as_view(), name='bulk-import'),
+    path('job/<str:job_id>/', fhir_viewsets.AsyncJobStatusView.as_view(), name='async-job-status'),
+    path('job/<str:job_id>/<str:file_name>', fhir_viewsets.AsyncJobFileView.as_view(), name='async-job-file'),
     path('', include(router.urls)),
     path('docs/', SpectacularAPIView.as_view(), name='docs'),
     path('docs/swagger/', SpectacularSwaggerView.as_view(url_name='docs'), name='swagger-ui'),
@@ -0,0 +1,75 @@
+import base64
+import hashlib
+import os
+import pathlib
+import re
+from uuid import uuid4
+
+
+class AttachmentUtils(object):
+    """
+    Incremental processing of base64 attachment content: the data is hashed and decoded chunk by chunk and
+    written to a spool file under the claim attachments root path, so no decoded copy of the document is held
+    in memory.
+    """
+    CHUNK_SIZE = 64 * 1024  # has to be a multiple of 4
+    SPOOL_DIR = 'spool'
+    __NOT_BASE64_CHARACTERS = re.compile(r'[^A-Za-z0-9+/=]')
+
+    @classmethod
+    def iter_chunks(cls, data):
+        for start in range(0, len(data), cls.CHUNK_SIZE):
+            yield data[start:start + cls.CHUNK_SIZE]
+
+    @classmethod
+    def sha1_hexdigest(cls, data):
+        sha1 = hashlib.sha1()
+        for chunk in cls.iter_chunks(data):
+            sha1.update(chunk.encode('utf-8'))
+        return sha1.hexdigest()
+
+    @classmethod
+    def spool_base64(cls, root_path, data):
+        """
+        Decode base64 `data` to a new spool file. Returns the spool file path relative to `root_path` and
+        the sha1 hexdigest of the (encoded) data.
+        """
+        spool_path = '%s/%s' % (cls.SPOOL_DIR, uuid4())
+        pathlib.Path('%s/%s' % (root_path, cls.SPOOL_DIR)).mkdir(parents=True, exist_ok=True)
+        sha1 = hashlib.sha1()
+        remainder = ''
+        try:
+            with open('%s/%s' % (root_path, spool_path), 'xb') as file:
+                for chunk in cls.iter_chunks(data):
+                    sha1.update(chunk.encode('utf-8'))
+                    # line breaks and other separators are ignored, decoding requires groups of 4 characters
+                    chunk = remainder + cls.__NOT_BASE64_CHARACTERS.sub('', chunk)
+                    split = len(chunk) - len(chunk) % 4
+                    file.write(base64.b64decode(chunk[:split]))
+                    remainder = chunk[split:]
+                if remainder:
+                    file.write(base64.b64decode(remainder + '=' * (-len(remainder) % 4)))
+        except Exception:
+            cls.discard(root_path, spool_path)
+            raise
+        return spool_path, sha1.hexdigest()
+
+    @classmethod
+    def store(cls, root_path, spool_path, date, claim_id):
+        """
+        Move a spool file to the claim attachments directory, the layout is the same as the one of claim module
+        (`<year>/<month>/<day>/<claim_id>/<uuid>`). Returns the new path relative to `root_path`.
+        """
+        date_iso = date.isoformat()
+        file_dir = '%s/%s/%s/%s' % (date_iso[0:4], date_iso[5:7], date_iso[8:10], claim_id)
+        file_path = '%s/%s' % (file_dir, uuid4())
+        pathlib.Path('%s/%s' % (root_path, file_dir)).mkdir(parents=True, exist_ok=True)
+        os.replace('%s/%s' % (root_path, spool_path), '%s/%s' % (root_path, file_path))
+        return file_path
+
+    @classmethod
+    def discard(cls, root_path, spool_path):
+        try:
+            os.remove('%s/%s' % (root_path, spool_path))
+        except FileNotFoundError:
+            pass
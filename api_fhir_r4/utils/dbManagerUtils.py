@@ -1,7 +1,13 @@
+import json
+import logging
+
 from django.core.exceptions import MultipleObjectsReturned
+from django.db import connections, DatabaseError
 from django.http import Http404
 from django.shortcuts import get_object_or_404, get_list_or_404
 
+logger = logging.getLogger(__name__)
+
 
 class DbManagerUtils(object):
 
@@ -16,3 +22,59 @@ class DbManagerUtils(object):
         except Http404:
             result = None
         return result
+
+    @classmethod
+    def get_related_objects(cls, instance, related_name, valid_only=True):
+        """
+        Objects of the `related_name` relation of the instance (only ones with validity_to None if `valid_only`).
+        Relation prefetched by the queryset is read from the prefetch cache instead of querying the database again.
+        """
+        prefetched = getattr(instance, '_prefetched_objects_cache', {}).get(related_name)
+        if prefetched is not None:
+            return [obj for obj in prefetched if not valid_only or obj.validity_to is None]
+        related = getattr(instance, related_name)
+        return list(related.filter(validity_to=None) if valid_only else related.all())
+
+    @classmethod
+    def get_estimated_count(cls, queryset):
+        """
+        Number of rows estimated by the database without running COUNT(*): the query planner estimate for
+        PostgreSQL and the table statistics for MS SQL Server. Table statistics contain all rows (including
+        history rows), so they are only used for querysets without filters. Other cases fall back to the exact count.
+        """
+        db_connection = connections[queryset.db]
+        try:
+            if db_connection.vendor == 'postgresql':
+                return cls.__get_planner_estimated_count(db_connection, queryset)
+            if db_connection.vendor == 'microsoft' and cls.__is_whole_table(queryset):
+                return cls.__get_table_statistics_count(db_connection, queryset)
+        except DatabaseError as e:
+            logger.warning(f"Failed to estimate count for {queryset.model.__name__}, using exact count: {e}")
+        return queryset.count()
+
+    @classmethod
+    def __get_planner_estimated_count(cls, db_connection, queryset):
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        with db_connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @classmethod
+    def __is_whole_table(cls, queryset):
+        query = queryset.query
+        return not query.where.children and not query.distinct and not query.combinator \
+            and query.low_mark == 0 and query.high_mark is None
+
+    @classmethod
+    def __get_table_statistics_count(cls, db_connection, queryset):
+        with db_connection.cursor() as cursor:
+            cursor.execute('SELECT SUM(row_count) FROM sys.dm_db_partition_stats '
+                           'WHERE object_id = OBJECT_ID(%s) AND index_id IN (0, 1)',
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if not row or row[0] is None:
+            raise DatabaseError('No table statistics available')
+        return int(row[0])
@@ -1,4 +1,5 @@
 from api_fhir_r4.views.fhir.activity_definition import ActivityDefinitionViewSet
+from api_fhir_r4.views.fhir.binary import BinaryViewSet
 from api_fhir_r4.views.fhir.claim import ClaimViewSet
 from api_fhir_r4.views.fhir.claim_response import ClaimResponseViewSet
 from api_fhir_r4.views.fhir.code_systems.diagnosis import CodeSystemOpenIMISDiagnosisViewSet
@@ -29,3 +30,6 @@ from api_fhir_r4.views.fhir.practitioner import PractitionerViewSet
 from api_fhir_r4.views.fhir.practitioner_role import PractitionerRoleViewSet
 from api_fhir_r4.views.fhir.subscription import SubscriptionViewSet
 from api_fhir_r4.views.fhir.payment_notice import PaymentNoticeViewSet
+from api_fhir_r4.views.fhir.bundle import FHIRRootView, FHIRRouter
+from api_fhir_r4.views.fhir.bulk_data import BulkExportView, BulkImportView, AsyncJobStatusView, \
+    AsyncJobFileView
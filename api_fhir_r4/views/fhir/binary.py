@@ -0,0 +1,157 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import uuid
+
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from rest_framework.renderers import BaseRenderer
+from rest_framework.viewsets import GenericViewSet
+
+from api_fhir_r4.converters.claimConverter import ClaimConverter
+from api_fhir_r4.permissions import FHIRApiClaimPermissions
+from api_fhir_r4.views.fhir.base import BaseFHIRView
+from claim.models import Claim, ClaimAttachment
+
+
+class _AnyContentRenderer(BaseRenderer):
+    """
+    Accepts any `Accept` header, binary content is returned as plain django response. Errors (dict data) are
+    rendered as json.
+    """
+    media_type = '*/*'
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, str)):
+            return data
+        return json.dumps(data).encode('utf-8')
+
+
+class _FileRange(object):
+    """
+    File-like object reading `length` bytes of `file` from `start`, used to stream a byte range.
+    """
+
+    def __init__(self, file, start, length):
+        self._file = file
+        self._remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+class BinaryViewSet(BaseFHIRView, GenericViewSet):
+    """
+    Content of claim attachments (referenced by `Attachment.url` of Claim supportingInfo). Supports single range
+    requests (`Range`, `If-Range`) and conditional requests (`If-None-Match`).
+    """
+    # ClaimAttachment is a UUIDModel, its primary key is the uuid
+    lookup_field = 'id'
+    permission_classes = (FHIRApiClaimPermissions,)
+    _RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+    def get_renderers(self):
+        return super().get_renderers() + [_AnyContentRenderer()]
+
+    def get_queryset(self):
+        return ClaimAttachment.objects.filter(claim__in=Claim.get_queryset(None, self.request.user).values('id'))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            attachment_id = uuid.UUID(kwargs['id'])
+        except ValueError:
+            raise Http404(f'Binary {kwargs["id"]} not found')
+        attachment = get_object_or_404(self.get_queryset(), id=attachment_id)
+        file, size, etag = self._open_content(attachment)
+        if file is None:
+            return HttpResponse(status=404)
+
+        if etag in self._get_if_none_match(request):
+            file.close()
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        content_type = attachment.mime or 'application/octet-stream'
+        filename = attachment.filename or ''
+        try:
+            byte_range = self._get_byte_range(request, size, etag)
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type, filename=filename)
+            response['Content-Length'] = str(size)
+        else:
+            start, end = byte_range
+            response = FileResponse(_FileRange(file, start, end - start + 1), status=206,
+                                    content_type=content_type, filename=filename)
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        return response
+
+    def _open_content(self, attachment):
+        file_path = ClaimConverter.get_attachment_file_path(attachment)
+        if file_path:
+            if not os.path.isfile(file_path):
+                return None, 0, None
+            file = open(file_path, 'rb')
+            stat = os.fstat(file.fileno())
+            etag = f'"{attachment.id}-{stat.st_size:x}-{int(stat.st_mtime):x}"'
+            return file, stat.st_size, etag
+        if attachment.document:
+            content = base64.b64decode(attachment.document)
+            etag = f'"{hashlib.md5(attachment.document.encode("utf-8")).hexdigest()}"'
+            return io.BytesIO(content), len(content), etag
+        return None, 0, None
+
+    def _get_if_none_match(self, request):
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return set()
+        return {tag.strip() for tag in header.split(',')}
+
+    def _get_byte_range(self, request, size, etag):
+        """
+        Return (start, end) of the requested range, None if whole content has to be sent (no or unsupported
+        Range header, If-Range not matching). Raises ValueError for unsatisfiable range.
+        """
+        header = request.META.get('HTTP_RANGE')
+        if not header:
+            return None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range and if_range != etag:
+            return None
+        match = self._RANGE_PATTERN.match(header.strip())
+        if not match or match.groups() == ('', ''):
+            # multiple ranges or invalid header, whole content is sent
+            return None
+        start, end = match.groups()
+        if start == '':
+            suffix_length = int(end)
+            if suffix_length == 0:
+                raise ValueError(header)
+            return max(size - suffix_length, 0), size - 1
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+        if start >= size or start > end:
+            raise ValueError(header)
+        return start, end
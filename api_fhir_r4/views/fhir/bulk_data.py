@@ -0,0 +1,221 @@
+import datetime
+
+from django.http import FileResponse, Http404
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api_fhir_r4.configurations import GeneralConfiguration
+from api_fhir_r4.jobs import AsyncJob, AsyncJobRunner, BulkExportService, BulkImportService, ClaimSubmitJob
+from api_fhir_r4.views.fhir.base import BaseFHIRView
+
+
+class AsyncRequestMixin(object):
+    """
+    Helpers of the FHIR asynchronous request pattern: kick-off requests with `Prefer: respond-async` get
+    `202 Accepted` with the AsyncJob status url in `Content-Location`.
+    """
+
+    @classmethod
+    def is_respond_async_request(cls, request):
+        return 'respond-async' in request.META.get('HTTP_PREFER', '')
+
+    @classmethod
+    def get_job_url(cls, request, job, file_name=None):
+        url = f'{GeneralConfiguration.get_base_url()}job/{job.id}/'
+        return request.build_absolute_uri(url + file_name if file_name else url)
+
+    def get_accepted_response(self, request, job):
+        response = Response(status=status.HTTP_202_ACCEPTED)
+        response['Content-Location'] = self.get_job_url(request, job)
+        return response
+
+
+class BulkExportMixin(AsyncRequestMixin):
+    """
+    Kick-off of the Bulk Data `$export` operation, supports `_type`, `_since` and `_outputFormat` parameters.
+    """
+    export_output_formats = ('ndjson', 'application/ndjson', 'application/fhir+ndjson')
+
+    def start_bulk_export(self, request, group_id=None):
+        if not self.is_respond_async_request(request):
+            raise exceptions.ValidationError('$export requires the "Prefer: respond-async" header')
+        output_format = request.GET.get('_outputFormat')
+        if output_format and output_format not in self.export_output_formats:
+            raise exceptions.ValidationError(f'Unsupported _outputFormat {output_format}')
+        resource_types = self._get_export_resource_types(request)
+        since = self._get_export_since(request)
+        for resource_type in resource_types:
+            if not request.user.has_perms(BulkExportService.PERMISSIONS[resource_type]):
+                raise exceptions.PermissionDenied(f'No permission to export {resource_type}')
+
+        job = AsyncJob.create(BulkExportService.JOB_KIND, str(request.user.id), request.build_absolute_uri())
+        AsyncJobRunner.submit(job, BulkExportService.run_job, resource_types, since, group_id)
+        return self.get_accepted_response(request, job)
+
+    def _get_export_resource_types(self, request):
+        requested = request.GET.get('_type')
+        if not requested:
+            return list(BulkExportService.RESOURCE_TYPES)
+        resource_types = [resource_type.strip() for resource_type in requested.split(',') if resource_type.strip()]
+        unsupported = [rt for rt in resource_types if rt not in BulkExportService.RESOURCE_TYPES]
+        if unsupported:
+            raise exceptions.ValidationError(f'Bulk export of {", ".join(unsupported)} is not supported')
+        return resource_types
+
+    def _get_export_since(self, request):
+        since = request.GET.get('_since')
+        if not since:
+            return None
+        try:
+            parsed = parse_datetime(since) or parse_date(since)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise exceptions.ValidationError({'_since': 'Invalid instant, should be in ISO 8601 format'})
+        if not isinstance(parsed, datetime.datetime):
+            parsed = datetime.datetime.combine(parsed, datetime.time.min)
+        return parsed
+
+
+class BulkExportView(BulkExportMixin, APIView):
+    """
+    System level `$export` of all supported resource types.
+    """
+    authentication_classes = BaseFHIRView.authentication_classes
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        return self.start_bulk_export(request)
+
+
+class BulkImportView(AsyncRequestMixin, APIView):
+    """
+    `$import` of Patient and Group resources posted as NDJSON. The content is stored in the AsyncJob directory and
+    imported in the background, the job result contains imported counts, throughput and the OperationOutcome
+    NDJSON file of rejected lines.
+    """
+    authentication_classes = BaseFHIRView.authentication_classes
+    permission_classes = (IsAuthenticated,)
+    import_content_types = ('application/fhir+ndjson', 'application/ndjson', 'application/x-ndjson')
+    upload_chunk_size = 64 * 1024
+
+    def post(self, request, *args, **kwargs):
+        if not self.is_respond_async_request(request):
+            raise exceptions.ValidationError('$import requires the "Prefer: respond-async" header')
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type not in self.import_content_types:
+            raise exceptions.UnsupportedMediaType(content_type)
+        for resource_type, permissions in BulkImportService.PERMISSIONS.items():
+            if not request.user.has_perms(permissions):
+                raise exceptions.PermissionDenied(f'No permission to import {resource_type}')
+        stream = request.stream
+        if stream is None:
+            raise exceptions.ValidationError('No resources to import')
+
+        job = AsyncJob.create(BulkImportService.JOB_KIND, str(request.user.id), request.build_absolute_uri())
+        with open(job.get_file_path(BulkImportService.INPUT_FILE), 'wb') as input_file:
+            for chunk in iter(lambda: stream.read(self.upload_chunk_size), b''):
+                input_file.write(chunk)
+        AsyncJobRunner.submit(job, BulkImportService.run_job)
+        return self.get_accepted_response(request, job)
+
+
+class AsyncJobMixin(AsyncRequestMixin):
+
+    def get_job(self, request, job_id):
+        job = AsyncJob.load(job_id)
+        if job is None or job.user_id != str(request.user.id):
+            raise Http404(f'Job {job_id} not found')
+        return job
+
+    @classmethod
+    def get_job_file_names(cls, job):
+        return [entry['file_name'] for key in ('output', 'error')
+                for entry in job.result.get(key, []) if 'file_name' in entry]
+
+
+class AsyncJobStatusView(AsyncJobMixin, APIView):
+    """
+    Status of an AsyncJob: `202 Accepted` with `X-Progress` while in progress, the job result when completed.
+    DELETE cancels the job and removes its files.
+    """
+    authentication_classes = BaseFHIRView.authentication_classes
+    permission_classes = (IsAuthenticated,)
+    retry_after = 5
+
+    def get(self, request, job_id, *args, **kwargs):
+        job = self.get_job(request, job_id)
+        if job.status == AsyncJob.IN_PROGRESS:
+            response = Response(status=status.HTTP_202_ACCEPTED)
+            response['X-Progress'] = job.progress or job.status
+            response['Retry-After'] = str(self.retry_after)
+            return response
+        if job.status == AsyncJob.FAILED:
+            raise exceptions.APIException(job.error)
+        return Response(self.get_job_result(request, job))
+
+    def delete(self, request, job_id, *args, **kwargs):
+        self.get_job(request, job_id).delete()
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+    def get_job_result(self, request, job):
+        if job.kind == BulkExportService.JOB_KIND:
+            return self._build_export_manifest(request, job)
+        if job.kind == BulkImportService.JOB_KIND:
+            return self._build_import_manifest(request, job)
+        if job.kind == ClaimSubmitJob.JOB_KIND:
+            return ClaimSubmitJob.get_claim_response(job)
+        return job.result
+
+    def _build_export_manifest(self, request, job):
+        return {
+            'transactionTime': job.transaction_time,
+            'request': job.request_url,
+            'requiresAccessToken': True,
+            'output': [{
+                'type': output['type'],
+                'url': self.get_job_url(request, job, output['file_name']),
+                'count': output['count'],
+            } for output in job.result.get('output', [])],
+            'error': [],
+        }
+
+    def _build_import_manifest(self, request, job):
+        return {
+            'transactionTime': job.transaction_time,
+            'request': job.request_url,
+            'output': job.result.get('output', []),
+            'error': [{
+                'type': error['type'],
+                'url': self.get_job_url(request, job, error['file_name']),
+                'count': error['count'],
+            } for error in job.result.get('error', [])],
+            'processed': job.result.get('processed'),
+            'duration': job.result.get('duration'),
+            'recordsPerSecond': job.result.get('records_per_second'),
+        }
+
+
+class AsyncJobFileView(AsyncJobMixin, APIView):
+    """
+    Download of an NDJSON file produced by an AsyncJob, `.gz` files are sent with `Content-Encoding: gzip`.
+    """
+    authentication_classes = BaseFHIRView.authentication_classes
+    permission_classes = (IsAuthenticated,)
+    content_type = 'application/fhir+ndjson'
+
+    def get(self, request, job_id, file_name, *args, **kwargs):
+        job = self.get_job(request, job_id)
+        if job.status != AsyncJob.COMPLETED or file_name not in self.get_job_file_names(job):
+            raise Http404(f'File {file_name} not found')
+        response = FileResponse(open(job.get_file_path(file_name), 'rb'), content_type=self.content_type)
+        if file_name.endswith('.gz'):
+            response['Content-Encoding'] = 'gzip'
+        return response
+
+    def perform_content_negotiation(self, request, force=False):
+        # the file is not rendered, any Accept header (e.g. application/fhir+ndjson) is fine
+        return super().perform_content_negotiation(request, force=True)
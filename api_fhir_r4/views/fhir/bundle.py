@@ -0,0 +1,180 @@
+import copy
+import logging
+from http import HTTPStatus
+
+from django.db import transaction
+from django.utils.datastructures import MultiValueDict
+from django.utils.translation import gettext as _
+from rest_framework import exceptions, routers, views
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from api_fhir_r4.converters import OperationOutcomeConverter
+from api_fhir_r4.views.fhir.base import BaseFHIRView
+
+logger = logging.getLogger(__name__)
+
+
+class FHIRRootView(routers.APIRootView):
+    """
+    Root of the FHIR api. GET lists the endpoints, POST processes a `batch` or `transaction` Bundle. Each entry is
+    dispatched to the viewset registered for its resource type (create for POST, update for PUT, retrieve for GET),
+    with the permissions, throttling and exception handling of that viewset. Entries of a transaction are processed in one database transaction and
+    `urn:uuid` fullUrls of created resources are replaced in the references of the following entries.
+    """
+    authentication_classes = BaseFHIRView.authentication_classes
+    resource_viewsets = None  # {resource type: viewset class}, set by FHIRRouter
+
+    _BATCH = 'batch'
+    _TRANSACTION = 'transaction'
+    _ENTRY_ACTIONS = {'POST': 'create', 'PUT': 'update', 'GET': 'retrieve'}
+
+    def get_permissions(self):
+        if self.request.method == 'POST':
+            return [IsAuthenticated()]
+        return super().get_permissions()
+
+    def post(self, request, *args, **kwargs):
+        bundle = request.data
+        if not isinstance(bundle, dict) or bundle.get('resourceType') != 'Bundle':
+            raise exceptions.ValidationError(_('Only Bundle resources can be posted to the api root'))
+        bundle_type = bundle.get('type')
+        if bundle_type not in (self._BATCH, self._TRANSACTION):
+            raise exceptions.ValidationError(_('Bundle type must be batch or transaction, got %s') % bundle_type)
+
+        entries = bundle.get('entry') or []
+        references = {}  # {fullUrl of created resource: 'Type/id'}
+        if bundle_type == self._TRANSACTION:
+            with transaction.atomic():
+                response_entries = [self._process_transaction_entry(request, entry, references) for entry in entries]
+        else:
+            response_entries = [self._process_batch_entry(request, entry, references) for entry in entries]
+        return Response({
+            'resourceType': 'Bundle',
+            'type': f'{bundle_type}-response',
+            'entry': response_entries,
+        })
+
+    def _process_transaction_entry(self, request, entry, references):
+        view, resource_type = self._get_entry_view(request, entry, references)
+        return self._process_entry(view, resource_type, entry, references)
+
+    def _process_batch_entry(self, request, entry, references):
+        view = None
+        try:
+            with transaction.atomic():
+                view, resource_type = self._get_entry_view(request, entry, references)
+                return self._process_entry(view, resource_type, entry, references)
+        except Exception as exc:
+            logger.debug('Batch entry failed', exc_info=True)
+            return self._build_error_entry(exc, view)
+
+    def _get_entry_view(self, request, entry, references):
+        entry_request = entry.get('request') or {}
+        method = (entry_request.get('method') or '').upper()
+        url = (entry_request.get('url') or '').split('?')[0].strip('/')
+        resource_type, separator, resource_id = url.partition('/')
+        viewset = (self.resource_viewsets or {}).get(resource_type)
+        if viewset is None:
+            raise exceptions.NotFound(_('Resource type %s is not supported') % resource_type)
+        action = self._ENTRY_ACTIONS.get(method)
+        # create is done on the type, update and retrieve on an instance
+        if action is None or not hasattr(viewset, action) or (action == 'create') == bool(resource_id):
+            raise exceptions.MethodNotAllowed(f'{method} {resource_type}')
+
+        resource = self._replace_references(copy.deepcopy(entry.get('resource')), references)
+        view = viewset(action=action, args=(), format_kwarg=None, headers={})
+        view.kwargs = {view.lookup_url_kwarg or view.lookup_field: resource_id} if resource_id else {}
+        view.request = self._build_entry_request(request, method, resource)
+        return view, resource_type
+
+    def _process_entry(self, view, resource_type, entry, references):
+        # same checks as a request sent to the viewset: permissions, throttling, content negotiation
+        view.initial(view.request, **view.kwargs)
+        response = getattr(view, view.action)(view.request, **view.kwargs)
+
+        response_entry = {
+            'response': {'status': self._get_status_text(response.status_code)},
+            'resource': response.data,
+        }
+        if view.request.method == 'POST':
+            location = f"{resource_type}/{response.data.get('id')}"
+            response_entry['response']['location'] = location
+            if entry.get('fullUrl'):
+                references[entry['fullUrl']] = location
+        return response_entry
+
+    def _build_entry_request(self, request, method, resource):
+        http_request = copy.copy(request._request)
+        http_request.method = method
+        entry_request = Request(
+            http_request,
+            parsers=request.parsers,
+            authenticators=request.authenticators,
+            negotiator=request.negotiator,
+            parser_context=request.parser_context,
+        )
+        entry_request._full_data = resource if resource is not None else {}
+        entry_request._data = entry_request._full_data
+        entry_request._files = MultiValueDict()
+        entry_request._user = request.user
+        entry_request._auth = request.auth
+        entry_request._authenticator = request.successful_authenticator
+        return entry_request
+
+    @classmethod
+    def _replace_references(cls, value, references):
+        if not references:
+            return value
+        if isinstance(value, dict):
+            return {
+                key: references.get(item, item) if key == 'reference' and isinstance(item, str)
+                else cls._replace_references(item, references)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [cls._replace_references(item, references) for item in value]
+        return value
+
+    @classmethod
+    def _build_error_entry(cls, exc, view=None):
+        response = cls._get_error_response(exc, view)
+        status_code = response.status_code if response else HTTPStatus.INTERNAL_SERVER_ERROR
+        outcome = response.data if response and isinstance(response.data, dict) \
+            and response.data.get('resourceType') == 'OperationOutcome' \
+            else OperationOutcomeConverter.to_fhir_obj(exc).dict()
+        return {
+            'response': {
+                'status': cls._get_status_text(status_code),
+                'outcome': outcome,
+            },
+        }
+
+    @classmethod
+    def _get_error_response(cls, exc, view):
+        if view is None:
+            return views.exception_handler(exc, {})
+        try:
+            # error response of the entry viewset, with its exception handler and authentication headers
+            return view.handle_exception(exc)
+        except Exception:
+            # not handled by the exception handler, reported as server error
+            return None
+
+    @classmethod
+    def _get_status_text(cls, status_code):
+        return f'{status_code} {HTTPStatus(status_code).phrase}'
+
+
+class FHIRRouter(routers.DefaultRouter):
+    """
+    DefaultRouter with the FHIRRootView as api root, the root view knows the registered viewsets by resource type.
+    """
+    APIRootView = FHIRRootView
+
+    def get_api_root_view(self, api_urls=None):
+        list_name = self.routes[0].name
+        api_root_dict = {prefix: list_name.format(basename=basename) for prefix, viewset, basename in self.registry}
+        resource_viewsets = {prefix: viewset for prefix, viewset, basename in self.registry}
+        return self.APIRootView.as_view(api_root_dict=api_root_dict, resource_viewsets=resource_viewsets)
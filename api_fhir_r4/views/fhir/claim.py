@@ -1,26 +1,33 @@
 import datetime
+from functools import partial
 
+from django.db import transaction
 from django.db.models import Prefetch
+from django.http.response import HttpResponseBase
 from rest_framework import mixins
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 from rest_framework.viewsets import GenericViewSet
 
-from api_fhir_r4.mixins import MultiIdentifierRetrieverMixin
+from api_fhir_r4.jobs import AsyncJob, AsyncJobRunner, ClaimSubmitJob
+from api_fhir_r4.mixins import MultiIdentifierRetrieverMixin, StreamingListModelMixin
 from api_fhir_r4.model_retrievers import UUIDIdentifierModelRetriever, CodeIdentifierModelRetriever
 from api_fhir_r4.permissions import FHIRApiClaimPermissions
 from api_fhir_r4.serializers import ClaimSerializer
 from api_fhir_r4.views.fhir.base import BaseFHIRView
+from api_fhir_r4.views.fhir.bulk_data import AsyncRequestMixin
 from api_fhir_r4.views.filters import ValidityFromRequestParameterFilter
-from claim.models import Claim, ClaimItem, ClaimService
+from claim.models import Claim, ClaimItem, ClaimService, ClaimAttachment
 from insuree.models import Insuree, InsureePolicy
 
 
-class ClaimViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, mixins.ListModelMixin,
-                   mixins.CreateModelMixin, GenericViewSet):
+class ClaimViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, StreamingListModelMixin, AsyncRequestMixin,
+                   mixins.ListModelMixin, mixins.CreateModelMixin, GenericViewSet):
     retrievers = [UUIDIdentifierModelRetriever, CodeIdentifierModelRetriever]
     serializer_class = ClaimSerializer
     permission_classes = (FHIRApiClaimPermissions,)
+    # attachments are referenced by Binary url, content is inlined only with inlineAttachments=true
+    inline_attachments_param = 'inlineAttachments'
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -28,6 +35,7 @@ class ClaimViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, mixins.ListModel
         identifier = request.GET.get("identifier")
         patient = request.GET.get("patient")
         contained = bool(request.GET.get("contained"))
+        inline_attachments = self.is_inline_attachments_request(request)
 
         if identifier is not None:
             return self.retrieve(request, *args, **{**kwargs, 'identifier': identifier})
@@ -44,15 +52,48 @@ class ClaimViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, mixins.ListModel
                 for_patient = Insuree.objects.get(uuid=patient)
                 queryset = queryset.filter(insuree=for_patient)
 
-        serializer = ClaimSerializer(self.paginate_queryset(queryset), many=True, context={'contained': contained})
+        if self.is_streaming_request(request):
+            return self.get_streaming_response(queryset, ClaimSerializer, context={
+                'contained': contained, 'inline_attachments': inline_attachments})
+
+        serializer = ClaimSerializer(self.paginate_queryset(queryset), many=True,
+                                     context={**self.get_serializer_context(), 'contained': contained,
+                                              'inline_attachments': inline_attachments})
         return self.get_paginated_response(serializer.data)
 
+    def create(self, request, *args, **kwargs):
+        if not self.is_respond_async_request(request):
+            return super().create(request, *args, **kwargs)
+        # `Prefer: respond-async`, the claim is entered right away and submitted by a background job,
+        # the ClaimResponse is returned by the job status url when the submission is done
+        serializer = self.get_serializer(data=request.data, context={**self.get_serializer_context(), 'submit': False})
+        serializer.is_valid(raise_exception=True)
+        claim = serializer.save()
+        if isinstance(claim, HttpResponseBase):
+            return Response(serializer.data, status=claim.status_code)
+        # the worker reads the claim with its own connection, it has to be committed first; the job is only stored
+        # on commit as well, a rolled back request leaves no job behind
+        job = AsyncJob.new(ClaimSubmitJob.JOB_KIND, str(request.user.id), request.build_absolute_uri())
+        transaction.on_commit(partial(self._start_submit_job, job, claim.code))
+        return self.get_accepted_response(request, job)
+
+    @staticmethod
+    def _start_submit_job(job, claim_code):
+        job.start()
+        AsyncJobRunner.submit(job, ClaimSubmitJob.run_job, claim_code)
+
     def retrieve(self, request, *args, **kwargs):
         contained = bool(request.GET.get("contained"))
+        inline_attachments = self.is_inline_attachments_request(request)
         ref_type, instance = self._get_object_with_first_valid_retriever(kwargs['identifier'])
-        serializer = self.get_serializer(instance, context={'contained': contained}, reference_type=ref_type)
+        serializer = self.get_serializer(instance, context={'contained': contained,
+                                                            'inline_attachments': inline_attachments},
+                                         reference_type=ref_type)
         return Response(serializer.data)
 
+    def is_inline_attachments_request(self, request):
+        return request.GET.get(self.inline_attachments_param, '').lower() == 'true'
+
     def get_queryset(self):
         queryset = Claim.get_queryset(None, self.request.user).order_by('validity_from') \
             .select_related('insuree') \
@@ -62,9 +103,20 @@ class ClaimViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, mixins.ListModel
             .select_related('icd_2') \
             .select_related('icd_3') \
             .select_related('icd_4') \
-            .prefetch_related(Prefetch('items', queryset=ClaimItem.objects.filter(validity_to__isnull=True))) \
-            .prefetch_related(Prefetch('services', queryset=ClaimService.objects.filter(validity_to__isnull=True))) \
+            .select_related('admin') \
+            .prefetch_related(Prefetch('items', queryset=ClaimItem.objects.filter(validity_to__isnull=True)
+                                       .select_related('item'))) \
+            .prefetch_related(Prefetch('services', queryset=ClaimService.objects.filter(validity_to__isnull=True)
+                                       .select_related('service'))) \
+            .prefetch_related(Prefetch('attachments', queryset=self.get_attachments_queryset())) \
             .prefetch_related(Prefetch('insuree__insuree_policies',
                                        queryset=InsureePolicy.objects.filter(validity_to__isnull=True).select_related(
                                            "policy")))
         return ValidityFromRequestParameterFilter(self.request).filter_queryset(queryset)
+
+    def get_attachments_queryset(self):
+        queryset = ClaimAttachment.objects.all()
+        if not self.is_inline_attachments_request(self.request):
+            # only metadata is needed, documents stored in the database can be large
+            queryset = queryset.defer('document')
+        return queryset
@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import mixins
 from rest_framework.viewsets import GenericViewSet
 
@@ -7,7 +8,7 @@ from api_fhir_r4.permissions import FHIRApiClaimPermissions
 from api_fhir_r4.serializers import ClaimResponseSerializer
 from api_fhir_r4.views.fhir.base import BaseFHIRView
 from api_fhir_r4.views.filters import ValidityFromRequestParameterFilter
-from claim.models import Claim
+from claim.models import Claim, ClaimItem, ClaimService
 
 
 class ClaimResponseViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, mixins.ListModelMixin, GenericViewSet,
@@ -17,5 +18,12 @@ class ClaimResponseViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, mixins.L
     permission_classes = (FHIRApiClaimPermissions,)
 
     def get_queryset(self):
-        queryset = Claim.get_queryset(None, self.request.user).order_by('validity_from')
+        queryset = Claim.get_queryset(None, self.request.user).order_by('validity_from') \
+            .select_related('insuree') \
+            .select_related('admin') \
+            .select_related('feedback') \
+            .prefetch_related(Prefetch('items', queryset=ClaimItem.objects.filter(validity_to__isnull=True)
+                                       .select_related('item'))) \
+            .prefetch_related(Prefetch('services', queryset=ClaimService.objects.filter(validity_to__isnull=True)
+                                       .select_related('service')))
         return ValidityFromRequestParameterFilter(self.request).filter_queryset(queryset)
@@ -1,7 +1,7 @@
+from api_fhir_r4.mixins import CodeSystemResponseMixin
 from api_fhir_r4.serializers import CodeSystemSerializer
 
 from rest_framework import viewsets
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from api_fhir_r4.permissions import FHIRApiGroupPermissions
 
@@ -10,7 +10,7 @@ from api_fhir_r4.views import CsrfExemptSessionAuthentication
 from django.core.exceptions import PermissionDenied
 
 
-class CodeSystemOpenIMISGroupTypeViewSet(viewsets.ViewSet):
+class CodeSystemOpenIMISGroupTypeViewSet(CodeSystemResponseMixin, viewsets.ViewSet):
 
     serializer_class = CodeSystemSerializer
     permission_classes = (IsAuthenticated,)
@@ -34,5 +34,4 @@ class CodeSystemOpenIMISGroupTypeViewSet(viewsets.ViewSet):
                 "url": self.request.build_absolute_uri()
             }
         )
-        data = serializer.to_representation(obj=None)
-        return Response(data)
+        return self.get_code_system_response(request, serializer)
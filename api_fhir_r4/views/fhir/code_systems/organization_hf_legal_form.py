@@ -1,14 +1,14 @@
+from api_fhir_r4.mixins import CodeSystemResponseMixin
 from api_fhir_r4.serializers import CodeSystemSerializer
 
 from rest_framework import viewsets
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.views import APIView
 from api_fhir_r4.views import CsrfExemptSessionAuthentication
 
 
-class CodeSystemOrganizationHFLegalFormViewSet(viewsets.ViewSet):
+class CodeSystemOrganizationHFLegalFormViewSet(CodeSystemResponseMixin, viewsets.ViewSet):
     serializer_class = CodeSystemSerializer
     permission_classes = (IsAuthenticated,)
     authentication_classes = [CsrfExemptSessionAuthentication] + APIView.settings.DEFAULT_AUTHENTICATION_CLASSES
@@ -29,5 +29,4 @@ class CodeSystemOrganizationHFLegalFormViewSet(viewsets.ViewSet):
                 'url': self.request.build_absolute_uri()
             }
         )
-        data = serializer.to_representation(obj=None)
-        return Response(data)
+        return self.get_code_system_response(request, serializer)
@@ -1,7 +1,7 @@
+from api_fhir_r4.mixins import CodeSystemResponseMixin
 from api_fhir_r4.serializers import CodeSystemSerializer
 
 from rest_framework import viewsets
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.views import APIView
@@ -9,7 +9,7 @@ from api_fhir_r4.views import CsrfExemptSessionAuthentication
 from location.services import HealthFacilityLevel
 
 
-class CodeSystemOrganizationHFLevelViewSet(viewsets.ViewSet):
+class CodeSystemOrganizationHFLevelViewSet(CodeSystemResponseMixin, viewsets.ViewSet):
     serializer_class = CodeSystemSerializer
     permission_classes = (IsAuthenticated,)
     authentication_classes = [CsrfExemptSessionAuthentication] + APIView.settings.DEFAULT_AUTHENTICATION_CLASSES
@@ -30,5 +30,4 @@ class CodeSystemOrganizationHFLevelViewSet(viewsets.ViewSet):
                 'url': self.request.build_absolute_uri()
             }
         )
-        data = serializer.to_representation(obj=None)
-        return Response(data)
+        return self.get_code_system_response(request, serializer)
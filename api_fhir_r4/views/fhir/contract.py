@@ -1,19 +1,18 @@
 import datetime
 
-from django.db.models import Prefetch
 from rest_framework import mixins
 from rest_framework.viewsets import GenericViewSet
 
+from api_fhir_r4.mixins import StreamingListModelMixin
 from api_fhir_r4.permissions import FHIRApiCoverageRequestPermissions
 from api_fhir_r4.serializers import ContractSerializer
 from api_fhir_r4.views.fhir.base import BaseFHIRView
 from api_fhir_r4.views.filters import ValidityFromRequestParameterFilter
-from insuree.models import InsureePolicy
 from policy.models import Policy
 
 
-class ContractViewSet(BaseFHIRView, mixins.RetrieveModelMixin, mixins.ListModelMixin, mixins.CreateModelMixin,
-                      GenericViewSet):
+class ContractViewSet(BaseFHIRView, StreamingListModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                      mixins.CreateModelMixin, GenericViewSet):
     lookup_field = 'uuid'
     serializer_class = ContractSerializer
     permission_classes = (FHIRApiCoverageRequestPermissions,)
@@ -23,11 +22,7 @@ class ContractViewSet(BaseFHIRView, mixins.RetrieveModelMixin, mixins.ListModelM
             .select_related('product') \
             .select_related('officer') \
             .select_related('family__head_insuree') \
-            .select_related('family__location') \
-            .prefetch_related(
-            Prefetch('insuree_policies',
-                     queryset=InsureePolicy.objects.filter(validity_to__isnull=True).select_related('insuree'))
-        )
+            .select_related('family__location')
         refDate = request.GET.get('refDate')
         refEndDate = request.GET.get('refEndDate')
         identifier = request.GET.get("identifier")
@@ -50,7 +45,11 @@ class ContractViewSet(BaseFHIRView, mixins.RetrieveModelMixin, mixins.ListModelM
                     isValidDate = False
                 queryset = queryset.filter(validity_from__lt=datevar)
 
-        serializer = ContractSerializer(self.paginate_queryset(queryset), many=True)
+        if self.is_streaming_request(request):
+            return self.get_streaming_response(queryset, ContractSerializer)
+
+        serializer = ContractSerializer(self.paginate_queryset(queryset), many=True,
+                                        context=self.get_serializer_context())
         return self.get_paginated_response(serializer.data)
 
     def get_queryset(self):
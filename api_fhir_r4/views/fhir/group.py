@@ -1,16 +1,18 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
 
 from api_fhir_r4.mixins import MultiIdentifierRetrieverMixin, MultiIdentifierUpdateMixin
 from api_fhir_r4.model_retrievers import UUIDIdentifierModelRetriever, GroupIdentifierModelRetriever
 from api_fhir_r4.permissions import FHIRApiGroupPermissions
 from api_fhir_r4.serializers import GroupSerializer
 from api_fhir_r4.views.fhir.base import BaseFHIRView
+from api_fhir_r4.views.fhir.bulk_data import BulkExportMixin
 from api_fhir_r4.views.filters import ValidityFromRequestParameterFilter
 from insuree.models import Family
 
 
 class GroupViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin,
-                   MultiIdentifierUpdateMixin, viewsets.ModelViewSet):
+                   MultiIdentifierUpdateMixin, BulkExportMixin, viewsets.ModelViewSet):
     retrievers = [UUIDIdentifierModelRetriever, GroupIdentifierModelRetriever]
     serializer_class = GroupSerializer
     permission_classes = (FHIRApiGroupPermissions,)
@@ -22,13 +24,24 @@ class GroupViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin,
             return self.retrieve(request, *args, **{**kwargs, 'identifier': identifier})
         else:
             queryset = queryset.filter(validity_to__isnull=True)
-        serializer = GroupSerializer(self.paginate_queryset(queryset), many=True)
+        serializer = GroupSerializer(self.paginate_queryset(queryset), many=True,
+                                     context=self.get_serializer_context())
         return self.get_paginated_response(serializer.data)
 
     def retrieve(self, *args, **kwargs):
         response = super().retrieve(self, *args, **kwargs)
         return response
 
+    @action(detail=True, methods=['get'], url_path=r'\$export', url_name='export')
+    def export(self, request, *args, **kwargs):
+        ref_type, family = self._get_object_with_first_valid_retriever(kwargs['identifier'])
+        return self.start_bulk_export(request, group_id=family.id)
+
     def get_queryset(self):
-        queryset = Family.objects.all().order_by('validity_from')
+        queryset = Family.objects.all().order_by('validity_from') \
+            .select_related('head_insuree') \
+            .select_related('location') \
+            .select_related('family_type') \
+            .select_related('confirmation_type') \
+            .prefetch_related('members')
         return ValidityFromRequestParameterFilter(self.request).filter_queryset(queryset)
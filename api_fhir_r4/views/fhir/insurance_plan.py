@@ -21,7 +21,8 @@ class ProductViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, viewsets.ReadO
             return self.retrieve(request, *args, **{**kwargs, 'identifier': identifier})
         else:
             queryset = queryset.filter(validity_to__isnull=True)
-        serializer = InsurancePlanSerializer(self.paginate_queryset(queryset), many=True)
+        serializer = InsurancePlanSerializer(self.paginate_queryset(queryset), many=True,
+                                             context=self.get_serializer_context())
         return self.get_paginated_response(serializer.data)
 
     def retrieve(self, *args, **kwargs):
@@ -2,21 +2,23 @@ import datetime
 
 from django.db.models import OuterRef, Exists
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from api_fhir_r4.converters import OperationOutcomeConverter
-from api_fhir_r4.mixins import MultiIdentifierRetrieverMixin, MultiIdentifierUpdateMixin
+from api_fhir_r4.mixins import MultiIdentifierRetrieverMixin, MultiIdentifierUpdateMixin, StreamingListModelMixin
 from api_fhir_r4.model_retrievers import UUIDIdentifierModelRetriever, CHFIdentifierModelRetriever
 from api_fhir_r4.permissions import FHIRApiInsureePermissions
 from api_fhir_r4.serializers import PatientSerializer
 from api_fhir_r4.views.fhir.base import BaseFHIRView
+from api_fhir_r4.views.fhir.bulk_data import BulkExportMixin
 from api_fhir_r4.views.filters import ValidityFromRequestParameterFilter
 from claim.models import Claim
 from insuree.models import Insuree
 
 
 class InsureeViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin,
-                     MultiIdentifierUpdateMixin, viewsets.ModelViewSet):
+                     MultiIdentifierUpdateMixin, StreamingListModelMixin, BulkExportMixin, viewsets.ModelViewSet):
     retrievers = [UUIDIdentifierModelRetriever, CHFIdentifierModelRetriever]
     serializer_class = PatientSerializer
     permission_classes = (FHIRApiInsureePermissions,)
@@ -52,13 +54,22 @@ class InsureeViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin,
                     .annotate(has_claim_in_range=Exists(has_claim_in_range)) \
                     .filter(has_claim_in_range=True)
 
-        serializer = PatientSerializer(self.paginate_queryset(queryset), many=True)
+        if self.is_streaming_request(request):
+            return self.get_streaming_response(queryset, PatientSerializer)
+
+        serializer = PatientSerializer(self.paginate_queryset(queryset), many=True,
+                                       context=self.get_serializer_context())
         return self.get_paginated_response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path=r'\$export', url_name='export')
+    def export(self, request, *args, **kwargs):
+        return self.start_bulk_export(request)
+
     def get_queryset(self):
         queryset = Insuree.get_queryset(None, self.request.user) \
             .select_related('gender') \
             .select_related('photo') \
-            .select_related('family__location')
+            .select_related('family__location') \
+            .select_related('current_village')
 
         return ValidityFromRequestParameterFilter(self.request).filter_queryset(queryset)
@@ -21,7 +21,8 @@ class MedicationViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin, MultiIdenti
             return self.retrieve(request, *args, **{**kwargs, 'identifier': identifier})
         else:
             queryset = queryset.filter(validity_to__isnull=True)
-        serializer = MedicationSerializer(self.paginate_queryset(queryset), many=True)
+        serializer = MedicationSerializer(self.paginate_queryset(queryset), many=True,
+                                          context=self.get_serializer_context())
         return self.get_paginated_response(serializer.data)
 
     def retrieve(self, *args, **kwargs):
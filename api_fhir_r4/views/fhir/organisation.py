@@ -194,7 +194,9 @@ class OrganisationViewSet(BaseMultiserializerFHIRView,
         return HealthFacility.objects
 
     def _hf_queryset(self):
-        queryset = HealthFacility.objects.filter(validity_to__isnull=True).order_by('validity_from')
+        queryset = HealthFacility.objects.filter(validity_to__isnull=True) \
+            .select_related('location__parent', 'legal_form') \
+            .order_by('validity_from')
         return ValidityFromRequestParameterFilter(self.request).filter_queryset(queryset)
 
     def _ph_queryset(self):
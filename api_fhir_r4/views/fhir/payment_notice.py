@@ -28,7 +28,8 @@ class PaymentNoticeViewSet(BaseFHIRView, MultiIdentifierRetrieverMixin,
             return self.retrieve(request, *args, **{**kwargs, 'identifier': identifier})
         else:
             queryset = queryset.filter(is_deleted=False)
-        serializer = PaymentNoticeSerializer(self.paginate_queryset(queryset), many=True)
+        serializer = PaymentNoticeSerializer(self.paginate_queryset(queryset), many=True,
+                                             context=self.get_serializer_context())
         return self.get_paginated_response(serializer.data)
 
     def retrieve(self, *args, **kwargs):